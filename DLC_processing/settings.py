@@ -29,6 +29,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    # Outermost so "total" covers the whole stack; inactive unless REQUEST_PROFILING is set.
+    'processor.profiling.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,6 +40,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request SQL count / time, render time and latency: Server-Timing header and
+# p50 / p95 per endpoint at /api/request-profiles/ (processor.profiling).
+REQUEST_PROFILING = os.getenv('REQUEST_PROFILING', '') == '1'
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
@@ -82,6 +88,24 @@ DATABASES = {
     }
 }
 
+# "api" caches the region API payloads (api_app.services). Local memory per
+# process by default; set API_CACHE_REDIS_URL (e.g. redis://redis:6380/1, a
+# different DB from the Celery broker) to share one cache across workers.
+API_CACHE_REDIS_URL = os.getenv('API_CACHE_REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': API_CACHE_REDIS_URL,
+        'TIMEOUT': 60 * 60,
+    } if API_CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api',
+        'TIMEOUT': 60 * 60,
+    },
+}
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -112,20 +136,38 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://redis:6380/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6380/0')
 
+# vidyutpravah capture: "http" reads the page with requests + lxml and falls back to
+# the pooled headless Chromium; "browser" always renders it (processor.demand_capture).
+DEMAND_CAPTURE_BACKEND = os.getenv('DEMAND_CAPTURE_BACKEND', 'http')
+# vidyutpravah state slugs captured every run (comma-separated). Only tamil-nadu's selectors are
+# verified against the live site; the other processor.demand_capture.STATE_PAGES slugs are opt-in.
+DEMAND_CAPTURE_STATES = [s.strip() for s in os.getenv('DEMAND_CAPTURE_STATES', 'tamil-nadu').split(',') if s.strip()]
+# Browser-capture screenshots (processor.screenshots): written by a background thread,
+# "jpeg" or "webp" (needs Pillow), pruned by sweep_screenshots_task.
+DEMAND_SCREENSHOT_DIR = os.getenv('DEMAND_SCREENSHOT_DIR', 'screenshots')
+DEMAND_SCREENSHOT_FORMAT = os.getenv('DEMAND_SCREENSHOT_FORMAT', 'jpeg')
+DEMAND_SCREENSHOT_QUALITY = int(os.getenv('DEMAND_SCREENSHOT_QUALITY', '70'))
+DEMAND_SCREENSHOT_KEEP_DAYS = int(os.getenv('DEMAND_SCREENSHOT_KEEP_DAYS', '2'))
+
 CELERY_BEAT_SCHEDULE = {
     "capture-demand-every-5-minutes": {
         "task": "processor.tasks.capture_demand_data_task",
         "schedule": 300,
     },
-    'run_management_commands_at_8am': {
-        'task': 'processor.tasks.run_management_commands',
+    "sweep-screenshots-hourly": {
+        "task": "processor.tasks.sweep_screenshots_task",
+        "schedule": crontab(minute=30),
+    },
+    # All four regions run concurrently; merge_reports fires once they finish.
+    'run_daily_ingestion_at_8am': {
+        'task': 'processor.tasks.run_daily_ingestion',
         'schedule': crontab(minute=0, hour=8),  # Runs daily at 8 AM
-        'args': (['nrldc_project', 'posoco', 'srldc_project', 'wrldc_project', 'merge_reports'],),
+        'args': (['nrldc_project', 'posoco', 'srldc_project', 'wrldc_project'],),
     },
-    'run_management_commands_at_11am': {
-        'task': 'processor.tasks.run_management_commands',
+    'run_daily_ingestion_at_11am': {
+        'task': 'processor.tasks.run_daily_ingestion',
         'schedule': crontab(minute=0, hour=11),  # Runs daily at 11 AM
-        'args': (['nrldc_project', 'posoco', 'srldc_project', 'wrldc_project', 'merge_reports'],),
+        'args': (['nrldc_project', 'posoco', 'srldc_project', 'wrldc_project'],),
     },
 }
 
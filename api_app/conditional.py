@@ -0,0 +1,81 @@
+"""
+Conditional GET support (ETag / Last-Modified, 304 Not Modified) for the
+region APIs, so dashboards and downstream consumers polling them between
+ingestion runs get an empty 304 instead of the full serialized tables.
+
+    a_tab, c_tab = ...
+    etag, last_modified = slice_validators(request, (a_tab, c_tab), ledger_sources=("NRLDC",))
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+    ...
+    return with_validators(Response(...), etag, last_modified)
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from processor.models import IngestionLedger
+
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+
+def _newest(current, candidate):
+    if candidate is None:
+        return current
+    return candidate if current is None or candidate > current else current
+
+
+def slice_validators(request, querysets, ledger_sources=()):
+    """
+    (etag, last_modified) for the rows a response is built from.
+
+    Each queryset contributes its row count and newest created_at /
+    updated_at (one aggregate query each). Most region tables only have
+    created_at, which an upsert that changes values in place leaves alone,
+    so the newest IngestionLedger.updated_at of ledger_sources (written by
+    every ingestion run) is folded in as well. The query string is part of
+    the tag so different views of the same rows never share one.
+    last_modified is a Unix timestamp, or None when the slice is empty.
+    """
+    parts = [repr(sorted(request.GET.lists()))]
+    newest = None
+
+    for queryset in querysets:
+        names = {f.name for f in queryset.model._meta.concrete_fields}
+        aggregates = {"rows": Count("pk")}
+        aggregates.update({name: Max(name) for name in TIMESTAMP_FIELDS if name in names})
+        values = queryset.order_by().aggregate(**aggregates)
+        parts.append(f"{queryset.model._meta.label}:{sorted(values.items())!r}")
+        for name in TIMESTAMP_FIELDS:
+            newest = _newest(newest, values.get(name))
+
+    if ledger_sources:
+        ledger_updated = IngestionLedger.objects.filter(
+            source__in=ledger_sources
+        ).aggregate(latest=Max("updated_at"))["latest"]
+        parts.append(f"ledger:{ledger_updated!r}")
+        newest = _newest(newest, ledger_updated)
+
+    etag = '"%s"' % hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+    last_modified = int(newest.timestamp()) if newest else None
+    return etag, last_modified
+
+
+def with_validators(response, etag, last_modified):
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    # Clients may keep the body but must revalidate before reusing it.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 response when the client's If-None-Match / If-Modified-Since still matches, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+    return with_validators(response, etag, last_modified)
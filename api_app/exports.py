@@ -0,0 +1,177 @@
+"""
+Columnar exports of the RLDC tables: /api/<region>/export/?format=parquet|arrow|csv.
+
+Files are built straight from values_list() querysets, EXPORT_CHUNK_SIZE rows
+at a time, without DRF serializers, and streamed out as they are written:
+Parquet gets one row group per chunk, Arrow IPC one record batch per chunk.
+Worker memory is bounded by one chunk however many years are exported, and
+pandas.read_parquet / pyarrow load the result without re-parsing JSON.
+
+Datetimes (created_at, SRLDC 3(B) reporting_datetime) are the same instants
+in every format but are written differently. Parquet and Arrow store them
+as timestamp[us, tz=UTC] columns: pandas / pyarrow can convert them with
+tz_convert. CSV has no column types, so it writes ISO 8601 strings in the
+current time zone with their offset ("2025-01-10T09:00:00+05:30"), the way
+the serializer-built API tables render them.
+
+Parquet and Arrow need pyarrow; CSV only uses the standard library.
+"""
+import csv
+from datetime import datetime
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from processor.models import (Nrldc2AData, Nrldc2CData, PosocoTableA, PosocoTableG, Srldc2AData, Srldc2CData,
+                              SRLDC3BData, Wrldc2AData, Wrldc2CData)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV export still works without pyarrow
+    pa = pq = None
+
+ARROW_AVAILABLE = pa is not None
+
+EXPORT_CHUNK_SIZE = 50000
+
+# Region -> table key (as in the JSON APIs) -> model
+EXPORT_TABLES = {
+    "srldc": {"table_a": Srldc2AData, "table_c": Srldc2CData, "table_b": SRLDC3BData},
+    "nrldc": {"table_a": Nrldc2AData, "table_c": Nrldc2CData},
+    "wrldc": {"table_a": Wrldc2AData, "table_c": Wrldc2CData},
+    "posoco": {"table_a": PosocoTableA, "table_c": PosocoTableG},
+}
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+ARROW_FORMATS = ("parquet", "arrow")
+
+
+class _Sink:
+    """Write-only file object for pyarrow writers; drain() hands out what has been written so far."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+class _Echo:
+    """csv.writer target that returns each formatted line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _chunks(queryset, columns):
+    rows = queryset.values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, EXPORT_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _arrow_type(field):
+    kind = field.get_internal_type()
+    if kind in ("AutoField", "BigAutoField", "IntegerField", "BigIntegerField", "SmallIntegerField",
+                "PositiveIntegerField"):
+        return pa.int64()
+    if kind in ("FloatField", "DecimalField"):
+        # Decimals go out as floats, as in the JSON APIs.
+        return pa.float64()
+    if kind == "DateField":
+        return pa.date32()
+    if kind == "DateTimeField":
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+def _batches(queryset, fields, schema):
+    columns = [field.name for field in fields]
+    decimals = [i for i, field in enumerate(fields) if field.get_internal_type() == "DecimalField"]
+    for chunk in _chunks(queryset, columns):
+        values = [list(column) for column in zip(*chunk)]
+        for i in decimals:
+            values[i] = [None if v is None else float(v) for v in values[i]]
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(column, type=schema.field(i).type) for i, column in enumerate(values)], schema=schema
+        )
+
+
+def _arrow_file(queryset, fields, fmt):
+    schema = pa.schema([(field.name, _arrow_type(field)) for field in fields])
+    sink = _Sink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+    with writer:
+        for batch in _batches(queryset, fields, schema):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    return value
+
+
+def _csv_file(queryset, fields):
+    writer = csv.writer(_Echo())
+    columns = [field.name for field in fields]
+    yield writer.writerow(columns)
+    for chunk in _chunks(queryset, columns):
+        yield "".join(writer.writerow([_csv_value(v) for v in row]) for row in chunk)
+
+
+def export_fields(model, names=None):
+    """The model's concrete fields in declaration order, limited to names when given."""
+    fields = model._meta.concrete_fields
+    return [f for f in fields if f.name in names] if names else list(fields)
+
+
+def export_response(queryset, fields, fmt, filename):
+    """
+    StreamingHttpResponse with queryset's rows (fields, in order) as a
+    Parquet / Arrow IPC / CSV attachment named filename.<extension>.
+    fmt must be one of FORMATS, and pyarrow installed for ARROW_FORMATS.
+    """
+    content_type, extension = FORMATS[fmt]
+    if fmt in ARROW_FORMATS:
+        content = _arrow_file(queryset, fields, fmt)
+    else:
+        content = _csv_file(queryset, fields)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return response
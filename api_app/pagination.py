@@ -0,0 +1,103 @@
+"""
+Cursor pagination for the region APIs.
+
+Every region response carries two tables side by side, so one opaque
+?cursor= holds a position per table and the response's "next" URL advances
+all of them together. Rows come newest first, ordered by (report_date, id)
+descending, and a position is the (report_date, id) of the last row
+served: the next page is a keyset query on the report_date index instead
+of an OFFSET that rescans every earlier page.
+
+Response shape (changed from the unpaginated API, which returned every row):
+
+    {"table_a": [...], "table_c": [...], "next": "<url>" | null}
+
+Each table holds at most ?limit= rows (default DEFAULT_LIMIT = 500, capped
+at MAX_LIMIT; below 1 or not a number is a 400). Clients that need every
+row follow "next" until it is null, or use ?stream=1.
+"""
+import base64
+import binascii
+import json
+from datetime import date
+
+from django.db.models import Q
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+ORDERING = ("-report_date", "-id")
+
+# Position of a table whose last page has been served.
+END = "end"
+
+
+class PaginationError(ValueError):
+    """Bad ?cursor= or ?limit=; the API answers 400 with the message."""
+
+
+def _decode_cursor(value):
+    if not value:
+        return {}
+    try:
+        positions = json.loads(base64.urlsafe_b64decode(value.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeEncodeError):
+        raise PaginationError("Invalid cursor")
+    if not isinstance(positions, dict):
+        raise PaginationError("Invalid cursor")
+    return positions
+
+
+def _encode_cursor(positions):
+    return base64.urlsafe_b64encode(json.dumps(positions, separators=(",", ":")).encode("ascii")).decode("ascii")
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise PaginationError("Invalid limit")
+    if limit < 1:
+        raise PaginationError("Invalid limit")
+    return min(limit, MAX_LIMIT)
+
+
+def _after(queryset, position):
+    if position == END:
+        return queryset.none()
+    try:
+        report_date, pk = date.fromisoformat(position[0]), int(position[1])
+    except (TypeError, ValueError, IndexError, KeyError):
+        raise PaginationError("Invalid cursor")
+    return queryset.filter(Q(report_date__lt=report_date) | Q(report_date=report_date, id__lt=pk))
+
+
+def paginate_tables(request, tables):
+    """
+    One page of each queryset in tables ({"table_a": queryset, ...}), which
+    must be .values() querysets that include report_date and id.
+
+    Returns ({name: [rows]}, next_url); next_url is None once every table has
+    been served to the end. Raises PaginationError for a bad cursor or limit.
+    """
+    limit = _limit(request)
+    positions = _decode_cursor(request.GET.get("cursor"))
+
+    pages, next_positions = {}, {}
+    for name, queryset in tables.items():
+        queryset = queryset.order_by(*ORDERING)
+        if name in positions:
+            queryset = _after(queryset, positions[name])
+        rows = list(queryset[:limit + 1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_positions[name] = [rows[-1]["report_date"].isoformat(), rows[-1]["id"]]
+        else:
+            next_positions[name] = END
+        pages[name] = rows
+
+    if all(position == END for position in next_positions.values()):
+        return pages, None
+
+    query = request.GET.copy()
+    query["cursor"] = _encode_cursor(next_positions)
+    return pages, request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
@@ -1,5 +1,7 @@
+from django.db.models import QuerySet
+from django.utils import timezone
 from rest_framework import serializers
-from processor.models import Srldc2AData, Srldc2CData ,SRLDC3BData, Nrldc2AData, Nrldc2CData, Wrldc2CData, Wrldc2AData, PosocoTableG, PosocoTableA
+from processor.models import Srldc2AData, Srldc2CData ,SRLDC3BData, Nrldc2AData, Nrldc2CData, Wrldc2CData, Wrldc2AData, PosocoTableG, PosocoTableA, IngestionTiming
 
 
 class SrldcASerializer(serializers.ModelSerializer):
@@ -52,3 +54,73 @@ class PosocoGSerializer(serializers.ModelSerializer):
     class Meta:
         model = PosocoTableG
         fields = '__all__'
+
+
+class IngestionTimingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IngestionTiming
+        fields = '__all__'
+
+
+def _iso_datetime(value):
+    # serializers.DateTimeField: current time zone, ISO 8601, "Z" for UTC.
+    value = timezone.localtime(value) if timezone.is_aware(value) else value
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+# DRF field class -> converter for the raw .values() value. Fields not
+# listed (CharField, IntegerField, ...) are output as read from the database.
+VALUE_CONVERTERS = (
+    (serializers.DateTimeField, _iso_datetime),
+    (serializers.DateField, lambda value: value.isoformat()),
+    (serializers.FloatField, float),
+    # Decimals go out as floats, as the SRLDC 3(B) table always has.
+    (serializers.DecimalField, float),
+)
+
+
+class ValuesSerializer:
+    """
+    Read-only fast path for a ModelSerializer.
+
+    Serializes .values() rows with one precomputed converter per field
+    instead of building a DRF field object tree and calling to_representation
+    for every field of every instance. Output matches
+    serializer_class(instances, many=True).data, apart from Decimals coming
+    out as floats. fields limits the output to those field names.
+
+        ValuesSerializer(NrldcASerializer).serialize(queryset)
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        declared = serializer_class().fields
+        self.fields = [name for name in declared if not fields or name in fields]
+        self._converters = []
+        for name in self.fields:
+            for field_class, convert in VALUE_CONVERTERS:
+                if isinstance(declared[name], field_class):
+                    self._converters.append((name, convert))
+                    break
+
+    def values(self, queryset):
+        """queryset.values() with the columns this serializer outputs."""
+        return queryset.values(*self.fields)
+
+    def serialize(self, rows):
+        """
+        Output dicts for rows: a queryset (read through values()) or .values()
+        dicts, which may carry extra keys.
+        """
+        if isinstance(rows, QuerySet):
+            rows = self.values(rows)
+        fields, converters = self.fields, self._converters
+        data = []
+        for row in rows:
+            item = {name: row[name] for name in fields}
+            for name, convert in converters:
+                value = item[name]
+                if value is not None:
+                    item[name] = convert(value)
+            data.append(item)
+        return data
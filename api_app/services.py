@@ -0,0 +1,206 @@
+"""
+In-process SRLDC query service.
+
+Builds the /api/srldc/ payload straight from the ORM, so Django code that
+needs SRLDC data (the dailyreports pages) calls srldc_report() directly
+instead of making an HTTP request to its own /api/srldc/ endpoint, which
+held a second worker for the round trip.
+
+Payloads are cached in the "api" cache (settings.CACHES) per (mode, date)
+or (mode, year-month). The SRLDC data only changes when an ingestion
+command writes it, and every such run ends by writing its IngestionLedger
+row, so the newest SRLDC ledger timestamp is part of the cache key: one
+small query per request, and a finished ingestion run invalidates every
+cached SRLDC payload, even with the per-process local-memory backend.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.db.models import Max
+from rest_framework.utils.encoders import JSONEncoder
+
+from processor.models import IngestionLedger, Srldc2AData, Srldc2CData, SRLDC3BData
+from .serializers import SrldcASerializer, SrldcCSerializer, ValuesSerializer
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = "api"
+# Ledger sources whose runs write Srldc2AData / Srldc2CData / SRLDC3BData.
+SRLDC_LEDGER_SOURCES = ("SRLDC", "SRLDC_3B")
+
+
+class SrldcQueryError(Exception):
+    """Bad parameters or no data; status is the HTTP status the API answers with."""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+_encoder = JSONEncoder()
+
+
+# Payload tables built by _plain_values rather than a serializer: their
+# datetimes are written as stored, in UTC ("...Z"), not in local time.
+SRLDC_UTC_TABLES = ("table_b",)
+
+
+def _plain_values(queryset):
+    # .values() rows converted the way the API's JSON renderer does (Decimal ->
+    # float, date/datetime -> ISO string), so in-process callers get exactly
+    # what an API client parses out of the response.
+    return [
+        {k: _encoder.default(v) if isinstance(v, (Decimal, date, datetime)) else v for k, v in row.items()}
+        for row in queryset.values()
+    ]
+
+
+def _payload(a_tab, c_tab, b_tab):
+    # One query per table; the counts are taken from the fetched rows.
+    table_a = ValuesSerializer(SrldcASerializer).serialize(a_tab)
+    table_c = ValuesSerializer(SrldcCSerializer).serialize(c_tab)
+    table_b = _plain_values(b_tab)
+    return {
+        "record_count": {
+            "table_a": len(table_a),
+            "table_c": len(table_c),
+            "table_b": len(table_b),
+        },
+        "table_a": table_a,
+        "table_c": table_c,
+        "table_b": table_b,
+    }
+
+
+def _srldc_tables(**filters):
+    return (
+        Srldc2AData.objects.filter(**filters),
+        Srldc2CData.objects.filter(**filters),
+        SRLDC3BData.objects.filter(**filters),
+    )
+
+
+def _monthly_tables(year, month):
+    header = {"mode": "monthly", "month": f"{year}-{month:02d}"}
+    return header, _srldc_tables(report_date__year=year, report_date__month=month)
+
+
+def _latest_report_date(dates):
+    """The newest of dates that any SRLDC table has rows for, or None (one UNION query)."""
+    a_dates, c_dates, b_dates = (
+        queryset.values_list("report_date", flat=True) for queryset in _srldc_tables(report_date__in=dates)
+    )
+    latest = list(a_dates.union(c_dates, b_dates).order_by("-report_date")[:1])
+    return latest[0] if latest else None
+
+
+def _daily_tables(requested_date):
+    # ---------- fallback only for DAILY: the previous day when requested_date has no data yet ----------
+    report_date = _latest_report_date([requested_date, requested_date - timedelta(days=1)])
+    if report_date is None:
+        raise SrldcQueryError("No data available", 404)
+
+    header = {
+        "mode": "daily",
+        "requested_date": str(requested_date),
+        "actual_report_date": str(report_date),
+    }
+    return header, _srldc_tables(report_date=report_date)
+
+
+def srldc_monthly(year, month):
+    """Every SRLDC 2(A) / 2(C) / 3(B) row reported in the given month."""
+    header, tables = _monthly_tables(year, month)
+    return {**header, **_payload(*tables)}
+
+
+def srldc_daily(requested_date):
+    """
+    SRLDC rows for requested_date, falling back to the previous day when the
+    requested date has no data yet.
+    """
+    header, tables = _daily_tables(requested_date)
+    return {**header, **_payload(*tables)}
+
+
+def _srldc_data_version():
+    latest = IngestionLedger.objects.filter(
+        source__in=SRLDC_LEDGER_SOURCES
+    ).aggregate(latest=Max("updated_at"))["latest"]
+    return latest.strftime("%Y%m%d%H%M%S%f") if latest else "0"
+
+
+def _cached(key, build):
+    """build() through the api cache; a cache outage falls back to querying."""
+    cache = caches[CACHE_ALIAS]
+    key = f"srldc:{_srldc_data_version()}:{key}"
+    try:
+        data = cache.get(key)
+    except Exception as e:
+        logger.warning(f"API cache read failed for {key}: {e}")
+        return build()
+    if data is None:
+        data = build()
+        try:
+            cache.set(key, data)
+        except Exception as e:
+            logger.warning(f"API cache write failed for {key}: {e}")
+    return data
+
+
+def _parse_params(date, month, year):
+    """("monthly", (year, month)) when both month and year are given, else ("daily", requested_date)."""
+    if month and year:
+        try:
+            return "monthly", (int(year), int(month))
+        except (TypeError, ValueError):
+            raise SrldcQueryError("Invalid month/year", 400)
+
+    if not date:
+        return "daily", datetime.today().date()
+    try:
+        return "daily", datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        raise SrldcQueryError("Invalid date format. Use YYYY-MM-DD", 400)
+
+
+def srldc_report(date=None, month=None, year=None):
+    """
+    The /api/srldc/ payload for the same query parameters: monthly mode when
+    both month and year are given, otherwise daily mode for date
+    (YYYY-MM-DD, default today). Raises SrldcQueryError where the API would
+    answer 400 / 404; those answers are not cached.
+    """
+    mode, arg = _parse_params(date, month, year)
+    if mode == "monthly":
+        year, month = arg
+        return _cached(f"monthly:{year}-{month:02d}", lambda: srldc_monthly(year, month))
+    return _cached(f"daily:{arg}", lambda: srldc_daily(arg))
+
+
+def srldc_slice(date=None, month=None, year=None):
+    """
+    (Srldc2AData, Srldc2CData, SRLDC3BData) querysets covering every row the
+    srldc_report() payload for these parameters can contain, including the
+    previous-day fallback, for building conditional-request validators.
+    """
+    mode, arg = _parse_params(date, month, year)
+    if mode == "monthly":
+        year, month = arg
+        return _srldc_tables(report_date__year=year, report_date__month=month)
+    return _srldc_tables(report_date__in=[arg, arg - timedelta(days=1)])
+
+
+def srldc_rows(date=None, month=None, year=None):
+    """
+    (header, {"table_a": ..., "table_c": ..., "table_b": ...}) for the same
+    parameters as srldc_report(): the payload's non-row keys and the
+    unevaluated querysets behind its tables, for streaming them row by row
+    (api_app.streaming) instead of building the payload. Not cached.
+    """
+    mode, arg = _parse_params(date, month, year)
+    header, (a_tab, c_tab, b_tab) = _monthly_tables(*arg) if mode == "monthly" else _daily_tables(arg)
+    return header, {"table_a": a_tab, "table_c": c_tab, "table_b": b_tab}
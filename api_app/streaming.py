@@ -0,0 +1,79 @@
+"""
+NDJSON streaming for large API responses (?stream=1).
+
+A month or a long ?from=&to= range serialized in one go holds every model
+instance, every serializer dict and the rendered body in the worker at the
+same time. Streaming reads rows with values_list().iterator(), which uses a
+server-side cursor on PostgreSQL, and writes them out CHUNK_SIZE lines at a
+time, so worker memory stays flat whatever the range.
+
+Output is one JSON object per line: an optional header line first (the
+non-row keys of the normal response, e.g. mode / actual_report_date), then
+one line per row, tagged with its table:
+
+    {"mode": "monthly", "month": "2025-01"}
+    {"table": "table_a", "id": 1, "report_date": "2025-01-01", ...}
+
+Datetimes come out as the normal response renders them: in the current
+time zone for serializer-built tables, in UTC for the tables listed in
+utc_tables (built from .values(), e.g. SRLDC table_b).
+"""
+import json
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+CHUNK_SIZE = 2000
+CONTENT_TYPE = "application/x-ndjson"
+
+
+def wants_stream(request):
+    return request.GET.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def _dumps(obj):
+    return json.dumps(obj, cls=JSONEncoder, ensure_ascii=False) + "\n"
+
+
+def _columns(queryset, fields=None):
+    names = [f.name for f in queryset.model._meta.concrete_fields]
+    return [name for name in names if name in fields] if fields else names
+
+
+def _local(value):
+    # Datetimes come out as the serializers render them: in the current time zone.
+    return timezone.localtime(value) if isinstance(value, datetime) and timezone.is_aware(value) else value
+
+
+def _as_stored(value):
+    return value
+
+
+def _lines(tables, header, fields, utc_tables):
+    if header is not None:
+        yield _dumps(header)
+    for name, queryset in tables.items():
+        columns = _columns(queryset, fields)
+        convert = _as_stored if name in utc_tables else _local
+        chunk = []
+        for values in queryset.values_list(*columns).iterator(chunk_size=CHUNK_SIZE):
+            row = {"table": name}
+            row.update(zip(columns, map(convert, values)))
+            chunk.append(_dumps(row))
+            if len(chunk) >= CHUNK_SIZE:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+
+def ndjson_response(tables, header=None, fields=None, utc_tables=()):
+    """
+    StreamingHttpResponse of the rows of each queryset in tables
+    ({"table_a": queryset, ...}, in output order). fields limits the
+    columns, like the region APIs' ?fields=. Datetimes of the tables named
+    in utc_tables stay in UTC, like the non-streamed payload writes them.
+    """
+    return StreamingHttpResponse(_lines(tables, header, fields, utc_tables), content_type=CONTENT_TYPE)
@@ -1,3 +1,271 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.core.cache import caches
 from django.test import TestCase
 
-# Create your tests here.
+from processor.ledger import LedgerRun
+from processor.models import Nrldc2AData, Nrldc2CData, Srldc2AData, Srldc2CData, SRLDC3BData
+from . import pagination
+from .exports import ARROW_AVAILABLE
+from processor.upsert import bulk_upsert
+from .services import CACHE_ALIAS, SrldcQueryError, srldc_daily, srldc_monthly
+
+
+class SrldcQueryCountTests(TestCase):
+    """Each SRLDC table is read once per payload; the daily fallback date is found with one query."""
+
+    report_date = date(2025, 1, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        for state in ("Andhra Pradesh", "Karnataka", "Tamil Nadu"):
+            Srldc2AData.objects.create(report_date=cls.report_date, state=state, thermal=1.5)
+            Srldc2CData.objects.create(report_date=cls.report_date, state=state, max_demand=2.5)
+        SRLDC3BData.objects.create(report_date=cls.report_date, station="Ramagundam", day_energy_mu=Decimal("12.5"))
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+
+    def test_daily(self):
+        # fallback lookup + one query per table
+        with self.assertNumQueries(4):
+            data = srldc_daily(self.report_date)
+        self.assertEqual(data["actual_report_date"], str(self.report_date))
+        self.assertEqual(data["record_count"], {"table_a": 3, "table_c": 3, "table_b": 1})
+        self.assertEqual(len(data["table_a"]), 3)
+
+    def test_daily_falls_back_to_previous_day(self):
+        with self.assertNumQueries(4):
+            data = srldc_daily(self.report_date + timedelta(days=1))
+        self.assertEqual(data["actual_report_date"], str(self.report_date))
+        self.assertEqual(data["record_count"]["table_c"], 3)
+
+    def test_daily_no_data(self):
+        with self.assertNumQueries(1):
+            with self.assertRaises(SrldcQueryError) as raised:
+                srldc_daily(self.report_date + timedelta(days=2))
+        self.assertEqual(raised.exception.status, 404)
+
+    def test_monthly(self):
+        with self.assertNumQueries(3):
+            data = srldc_monthly(self.report_date.year, self.report_date.month)
+        self.assertEqual(data["record_count"], {"table_a": 3, "table_c": 3, "table_b": 1})
+
+    def test_view(self):
+        url = f"/api/srldc/?date={self.report_date}"
+        # ETag validators (3 tables + ledger), cache version, payload
+        with self.assertNumQueries(9):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["record_count"]["table_b"], 1)
+
+        # cached payload: validators and cache version only
+        with self.assertNumQueries(5):
+            self.assertEqual(self.client.get(url).json(), response.json())
+
+
+
+class SrldcConditionalGetTests(TestCase):
+    """Repeat requests revalidate with ETag / Last-Modified and get a 304 until the next ingest."""
+
+    report_date = date(2025, 1, 10)
+    url = f"/api/srldc/?date={report_date}"
+
+    @classmethod
+    def setUpTestData(cls):
+        Srldc2AData.objects.create(report_date=cls.report_date, state="Karnataka", thermal=1.5)
+        Srldc2CData.objects.create(report_date=cls.report_date, state="Karnataka", max_demand=2.5)
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+
+    def test_if_none_match(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+        self.assertEqual(response.content, b"")
+
+    def test_if_modified_since(self):
+        first = self.client.get(self.url)
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_after_an_ingest(self):
+        first = self.client.get(self.url)
+
+        # A re-ingested report corrects a value in place: created_at stays, the ledger row is rewritten.
+        run = LedgerRun("SRLDC", self.report_date, "0" * 64, "1", ["Srldc2AData"])
+        run.saved("Srldc2AData", *bulk_upsert(
+            Srldc2AData, [{"report_date": self.report_date, "state": "Karnataka", "thermal": 3.0}],
+            ("report_date", "state"),
+        ))
+        run.finish()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertEqual(response.json()["table_a"][0]["thermal"], 3.0)
+
+class SrldcStreamTests(TestCase):
+    """?stream=1 rows carry the same values, timestamps included, as the JSON payload."""
+
+    report_date = date(2025, 1, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        Srldc2AData.objects.create(report_date=cls.report_date, state="Karnataka", thermal=1.5)
+        Srldc2CData.objects.create(report_date=cls.report_date, state="Karnataka", max_demand=2.5)
+        SRLDC3BData.objects.create(
+            report_date=cls.report_date,
+            reporting_datetime=datetime(2025, 1, 10, 3, 30, tzinfo=dt_timezone.utc),
+            station="Ramagundam",
+            day_energy_mu=Decimal("12.5"),
+        )
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+
+    def test_streamed_rows_match_json_rows(self):
+        url = f"/api/srldc/?date={self.report_date}"
+        payload = self.client.get(url).json()
+
+        response = self.client.get(url + "&stream=1")
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        streamed = {}
+        for row in lines[1:]:
+            streamed.setdefault(row.pop("table"), []).append(row)
+
+        for table in ("table_a", "table_c", "table_b"):
+            self.assertEqual(streamed[table], payload[table], table)
+        self.assertEqual(payload["table_b"][0]["reporting_datetime"], "2025-01-10T03:30:00Z")
+
+
+class RegionPaginationTests(TestCase):
+    """?cursor= / ?limit= paging, ?from= and ?fields= on the region APIs (here /api/nrldc/)."""
+
+    url = "/api/nrldc/"
+    start = date(2025, 1, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        for offset in range(3):
+            day = cls.start + timedelta(days=offset)
+            for state in ("Delhi", "Punjab"):
+                Nrldc2AData.objects.create(report_date=day, state=state, thermal=float(offset))
+        Nrldc2CData.objects.create(report_date=cls.start, state="Delhi", max_demand=2.5)
+
+    def test_cursor_round_trip(self):
+        response = self.client.get(self.url, {"limit": 4})
+        data = response.json()
+        self.assertEqual(len(data["table_a"]), 4)
+        self.assertEqual(len(data["table_c"]), 1)
+        self.assertIsNotNone(data["next"])
+        # newest first
+        self.assertEqual(data["table_a"][0]["report_date"], str(self.start + timedelta(days=2)))
+
+        # the next page keeps ?limit and only continues the table that had more rows
+        last = self.client.get(data["next"]).json()
+        self.assertEqual(len(last["table_a"]), 2)
+        self.assertEqual(last["table_c"], [])
+        self.assertIsNone(last["next"])
+
+        ids = [row["id"] for row in data["table_a"] + last["table_a"]]
+        self.assertCountEqual(ids, Nrldc2AData.objects.values_list("id", flat=True))
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {"cursor": "not-a-cursor"}).status_code, 400)
+
+    def test_limit_bounds(self):
+        for limit in ("0", "-1", "many"):
+            response = self.client.get(self.url, {"limit": limit})
+            self.assertEqual(response.status_code, 400, limit)
+            self.assertEqual(response.json(), {"error": "Invalid limit"})
+
+        with mock.patch.object(pagination, "MAX_LIMIT", 2):
+            data = self.client.get(self.url, {"limit": 1000}).json()
+        self.assertEqual(len(data["table_a"]), 2)
+
+        # default page size: everything here, and no next page
+        data = self.client.get(self.url).json()
+        self.assertEqual(len(data["table_a"]), 6)
+        self.assertIsNone(data["next"])
+
+    def test_from_filter(self):
+        data = self.client.get(self.url, {"from": str(self.start + timedelta(days=1))}).json()
+        self.assertEqual(
+            {row["report_date"] for row in data["table_a"]},
+            {str(self.start + timedelta(days=1)), str(self.start + timedelta(days=2))},
+        )
+        self.assertEqual(data["table_c"], [])
+
+        self.assertEqual(self.client.get(self.url, {"from": "01-01-2025"}).status_code, 400)
+
+    def test_fields(self):
+        data = self.client.get(self.url, {"fields": "state,thermal", "state": "delhi"}).json()
+        self.assertEqual(data["table_a"][0], {"state": "Delhi", "thermal": 2.0})
+        self.assertEqual(data["table_c"], [{"state": "Delhi"}])
+
+        response = self.client.get(self.url, {"fields": "state,bogus"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Unknown fields: bogus"})
+
+
+class ExportRoundTripTests(TestCase):
+    """The export formats carry the stored rows back unchanged; datetimes are UTC in Arrow / Parquet, local in CSV."""
+
+    url = "/api/srldc/export/?table=table_b&fields=report_date,station,reporting_datetime,day_energy_mu"
+    reporting_datetime = datetime(2025, 1, 10, 3, 30, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        SRLDC3BData.objects.create(
+            report_date=date(2025, 1, 10), station="Ramagundam",
+            reporting_datetime=cls.reporting_datetime, day_energy_mu=Decimal("12.5"),
+        )
+        SRLDC3BData.objects.create(report_date=date(2025, 1, 11), station="Simhadri", day_energy_mu=None)
+
+    def expected(self):
+        return [
+            {"report_date": date(2025, 1, 10), "station": "Ramagundam",
+             "reporting_datetime": self.reporting_datetime, "day_energy_mu": 12.5},
+            {"report_date": date(2025, 1, 11), "station": "Simhadri",
+             "reporting_datetime": None, "day_energy_mu": None},
+        ]
+
+    def download(self, fmt):
+        response = self.client.get(f"{self.url}&format={fmt}")
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    @skipUnless(ARROW_AVAILABLE, "needs pyarrow")
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(io.BytesIO(self.download("parquet")))
+        self.assertEqual(str(table.schema.field("reporting_datetime").type), "timestamp[us, tz=UTC]")
+        self.assertEqual(table.to_pylist(), self.expected())
+
+    @skipUnless(ARROW_AVAILABLE, "needs pyarrow")
+    def test_arrow(self):
+        import pyarrow as pa
+
+        table = pa.ipc.open_file(pa.BufferReader(self.download("arrow"))).read_all()
+        self.assertEqual(table.to_pylist(), self.expected())
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.download("csv").decode("utf-8"))))
+        self.assertEqual(rows, [
+            {"report_date": "2025-01-10", "station": "Ramagundam",
+             "reporting_datetime": "2025-01-10T09:00:00+05:30", "day_energy_mu": "12.5000"},
+            {"report_date": "2025-01-11", "station": "Simhadri", "reporting_datetime": "", "day_energy_mu": ""},
+        ])
+        self.assertEqual(datetime.fromisoformat(rows[0]["reporting_datetime"]), self.reporting_datetime)
@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import srldc_view, nrldc_view, wrldc_view, posoco_view
+from .views import srldc_view, nrldc_view, wrldc_view, posoco_view, region_export_view, ingestion_timings_view, \
+    request_profiles_view
 from rest_framework.routers import DefaultRouter
 
 
@@ -8,6 +9,9 @@ urlpatterns =[
     path('nrldc/', nrldc_view, name='nrldcapi'),
     path('wrldc/', wrldc_view, name='nrldcapi'),
     path('posoco/', posoco_view, name='posocoapi'),
+    path('<slug:region>/export/', region_export_view, name='regionexportapi'),
+    path('ingestion-timings/', ingestion_timings_view, name='ingestiontimingsapi'),
+    path('request-profiles/', request_profiles_view, name='requestprofilesapi'),
 
 ]
 
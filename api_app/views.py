@@ -1,11 +1,22 @@
 # views.py
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from processor.models import Srldc2AData, Srldc2CData, Nrldc2CData, Nrldc2AData, Wrldc2AData, Wrldc2CData, PosocoTableA, \
-    PosocoTableG, SRLDC3BData
-from .serializers import SrldcASerializer, SrldcCSerializer, NrldcASerializer, NrldcCSerializer, WrldcASerializer, WrldcCSerializer, PosocoGSerializer, PosocoASerializer
+    PosocoTableG, SRLDC3BData, IngestionTiming
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+from processor import profiling
+from processor.filters import ReportDateFilter, StateReportFilter
+from .exports import ARROW_AVAILABLE, ARROW_FORMATS, EXPORT_TABLES, FORMATS, export_fields, export_response
+from .conditional import not_modified, slice_validators, with_validators
+from .pagination import ORDERING, PaginationError, paginate_tables
+from .services import SRLDC_LEDGER_SOURCES, SRLDC_UTC_TABLES, SrldcQueryError, srldc_report, srldc_rows, srldc_slice
+from .streaming import ndjson_response, wants_stream
+from .serializers import SrldcASerializer, SrldcCSerializer, NrldcASerializer, NrldcCSerializer, WrldcASerializer, WrldcCSerializer, PosocoGSerializer, PosocoASerializer, \
+    IngestionTimingSerializer, ValuesSerializer
 
 
 from datetime import datetime, timedelta
@@ -19,137 +30,200 @@ from rest_framework import status
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def srldc_view(request):
-    date_param = request.GET.get("date")
-    month = request.GET.get("month")
-    year = request.GET.get("year")
+    # Monthly mode (month click) when month & year are given, else daily mode (date click).
+    # ?stream=1 streams the same rows as NDJSON instead of one JSON document.
+    params = dict(
+        date=request.GET.get("date"),
+        month=request.GET.get("month"),
+        year=request.GET.get("year"),
+    )
+    try:
+        etag, last_modified = slice_validators(request, srldc_slice(**params), SRLDC_LEDGER_SOURCES)
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
+        if wants_stream(request):
+            header, tables = srldc_rows(**params)
+            return with_validators(ndjson_response(tables, header, utc_tables=SRLDC_UTC_TABLES), etag, last_modified)
+        data = srldc_report(**params)
+    except SrldcQueryError as e:
+        return Response({"error": e.message}, status=e.status)
+
+    return with_validators(Response(data, status=status.HTTP_200_OK), etag, last_modified)
+
+
+
+def _region_response(request, filter_class, ledger_source, tables):
+    """
+    Filtered, paginated response for a region endpoint.
+
+    tables is (("table_a", queryset, serializer_class), ...). Both tables take
+    the same ?date= / ?from=&to= / ?state= filters (filter_class), ?fields=
+    (comma separated) limits the columns returned, and ?cursor= / ?limit=
+    page through them newest first (see api_app.pagination). ?stream=1
+    streams every matching row as NDJSON instead of a page (api_app.streaming).
+    """
+    filtered = {}
+    for name, queryset, serializer_class in tables:
+        filterset = filter_class(request.GET, queryset=queryset)
+        if not filterset.is_valid():
+            return Response({"error": filterset.errors}, status=status.HTTP_400_BAD_REQUEST)
+        filtered[name] = filterset.qs
+
+    fields = [f.strip() for f in request.GET.get("fields", "").split(",") if f.strip()] or None
+    serializers = {name: ValuesSerializer(serializer_class, fields) for name, _, serializer_class in tables}
+    if fields:
+        unknown = sorted(set(fields).difference(*(s.fields for s in serializers.values())))
+        if unknown:
+            return Response({"error": f"Unknown fields: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    etag, last_modified = slice_validators(request, filtered.values(), (ledger_source,))
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    if wants_stream(request):
+        tables_by_name = {name: queryset.order_by(*ORDERING) for name, queryset in filtered.items()}
+        return with_validators(ndjson_response(tables_by_name, fields=fields), etag, last_modified)
+
+    # report_date and id are always read: the pagination cursor is built from them.
+    rows = {
+        name: queryset.values(*dict.fromkeys(serializers[name].fields + ["report_date", "id"]))
+        for name, queryset in filtered.items()
+    }
+    try:
+        pages, next_url = paginate_tables(request, rows)
+    except PaginationError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {name: serializers[name].serialize(pages[name]) for name in pages}
+    data["next"] = next_url
+    return with_validators(Response(data, status=status.HTTP_200_OK), etag, last_modified)
 
-    # =========================================================
-    # 🟢 MODE 1: MONTHLY MODE (month click)
-    # =========================================================
-    if month and year:
-        try:
-            month = int(month)
-            year = int(year)
-        except ValueError:
-            return Response(
-                {"error": "Invalid month/year"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
 
-        a_tab = Srldc2AData.objects.filter(
-            report_date__year=year,
-            report_date__month=month
-        )
-        c_tab = Srldc2CData.objects.filter(
-            report_date__year=year,
-            report_date__month=month
-        )
-        b_tab = SRLDC3BData.objects.filter(
-            report_date__year=year,
-            report_date__month=month
-        )
-        print(a_tab.query,"a_tab")
-        print(c_tab.query,"c_tab")
-        print(b_tab.query,"b_tab")
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def nrldc_view(request):
+    return _region_response(request, StateReportFilter, "NRLDC", (
+        ("table_a", Nrldc2AData.objects.all(), NrldcASerializer),
+        ("table_c", Nrldc2CData.objects.all(), NrldcCSerializer),
+    ))
 
-        print("📦 MONTHLY RAW:", a_tab)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def wrldc_view(request):
+    return _region_response(request, StateReportFilter, "WRLDC", (
+        ("table_a", Wrldc2AData.objects.all(), WrldcASerializer),
+        ("table_c", Wrldc2CData.objects.all(), WrldcCSerializer),
+    ))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def posoco_view(request):
+    # Table A / G rows are per category / fuel type with one column per region; there is no state to filter on.
+    return _region_response(request, ReportDateFilter, "POSOCO", (
+        ("table_a", PosocoTableA.objects.all(), PosocoASerializer),
+        ("table_c", PosocoTableG.objects.all(), PosocoGSerializer),
+    ))
+
+
+@require_GET
+def region_export_view(request, region):
+    """
+    /api/<region>/export/?format=parquet|arrow|csv (default csv) &table=table_a|table_c|table_b
+    (default table_a), with the region APIs' ?date= / ?from=&to= / ?state= / ?fields= filters.
+
+    A plain Django view: DRF would treat ?format= as a renderer override.
+    """
+    tables = EXPORT_TABLES.get(region)
+    if tables is None:
+        raise Http404(f"Unknown region: {region}")
+
+    fmt = request.GET.get("format", "csv").lower()
+    if fmt not in FORMATS:
+        return JsonResponse({"error": f"Unknown format. Use {', '.join(FORMATS)}"}, status=400)
+    if fmt in ARROW_FORMATS and not ARROW_AVAILABLE:
+        return JsonResponse({"error": f"{fmt} export needs pyarrow installed"}, status=501)
+
+    table = request.GET.get("table", "table_a")
+    model = tables.get(table)
+    if model is None:
+        return JsonResponse({"error": f"Unknown table. Use {', '.join(tables)}"}, status=400)
+
+    has_state = any(f.name == "state" for f in model._meta.concrete_fields)
+    filterset = (StateReportFilter if has_state else ReportDateFilter)(request.GET, queryset=model.objects.all())
+    if not filterset.is_valid():
+        return JsonResponse({"error": filterset.errors}, status=400)
+
+    names = [f.strip() for f in request.GET.get("fields", "").split(",") if f.strip()]
+    fields = export_fields(model, names)
+    if names and len(fields) != len(set(names)):
+        unknown = sorted(set(names) - {f.name for f in fields})
+        return JsonResponse({"error": f"Unknown fields: {', '.join(unknown)}"}, status=400)
+
+    queryset = filterset.qs.order_by("report_date", "id")
+    ledger_sources = SRLDC_LEDGER_SOURCES if region == "srldc" else (region.upper(),)
+    etag, last_modified = slice_validators(request, (queryset,), ledger_sources)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    span = "_".join(request.GET[key] for key in ("date", "from", "to") if request.GET.get(key)) or "all"
+    return with_validators(export_response(queryset, fields, fmt, f"{region}_{table}_{span}"), etag, last_modified)
 
-        return Response(
-            {
-                "mode": "monthly",
-                "month": f"{year}-{month:02d}",
-                "record_count": {
-                    "table_a": a_tab.count(),
-                    "table_c": c_tab.count(),
-                    "table_b": b_tab.count(),
-                },
-                "table_a": SrldcASerializer(a_tab, many=True).data,
-                "table_c": SrldcCSerializer(c_tab, many=True).data,
-                "table_b": list(b_tab.values()),
-            },
-            status=status.HTTP_200_OK
-        )
 
-    # =========================================================
-    # 🟢 MODE 2: DAILY MODE (old behaviour – date click)
-    # =========================================================
-    if not date_param:
-        requested_date = datetime.today().date()
-    else:
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def ingestion_timings_view(request):
+    """
+    Per-stage timings of recent ingestion runs, newest first.
+    ?source=SRLDC|NRLDC|WRLDC|POSOCO, ?date=YYYY-MM-DD (report date), ?limit=N (default 50, max 500)
+    """
+    runs = IngestionTiming.objects.all()
+
+    source = request.GET.get("source")
+    if source:
+        runs = runs.filter(source=source.upper())
+
+    date_param = request.GET.get("date")
+    if date_param:
         try:
-            requested_date = datetime.strptime(date_param, "%Y-%m-%d").date()
+            runs = runs.filter(report_date=datetime.strptime(date_param, "%Y-%m-%d").date())
         except ValueError:
             return Response(
                 {"error": "Invalid date format. Use YYYY-MM-DD"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-    report_date = requested_date
-
-    a_tab = Srldc2AData.objects.filter(report_date=report_date)
-    c_tab = Srldc2CData.objects.filter(report_date=report_date)
-    b_tab = SRLDC3BData.objects.filter(report_date=report_date)
-
-    # ---------- fallback only for DAILY ----------
-    if not a_tab.exists() and not c_tab.exists() and not b_tab.exists():
-        report_date = requested_date - timedelta(days=1)
-
-        a_tab = Srldc2AData.objects.filter(report_date=report_date)
-        c_tab = Srldc2CData.objects.filter(report_date=report_date)
-        b_tab = SRLDC3BData.objects.filter(report_date=report_date)
-
-        if not a_tab.exists() and not c_tab.exists() and not b_tab.exists():
-            return Response(
-                {"error": "No data available"},
-                status=status.HTTP_404_NOT_FOUND
-            )
+    try:
+        limit = int(request.GET.get("limit", 50))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return Response({"error": "Invalid limit"}, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(limit, 500)
 
     return Response(
-        {
-            "mode": "daily",
-            "requested_date": str(requested_date),
-            "actual_report_date": str(report_date),
-            "record_count": {
-                "table_a": a_tab.count(),
-                "table_c": c_tab.count(),
-                "table_b": b_tab.count(),
-            },
-            "table_a": SrldcASerializer(a_tab, many=True).data,
-            "table_c": SrldcCSerializer(c_tab, many=True).data,
-            "table_b": list(b_tab.values()),
-        },
+        {"runs": IngestionTimingSerializer(runs[:limit], many=True).data},
         status=status.HTTP_200_OK
     )
 
 
-
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def nrldc_view(request):
-    a_tab = Nrldc2AData.objects.all()
-    c_tab = Nrldc2CData.objects.all()
-    return Response({
-        "table_a": NrldcASerializer(a_tab, many=True).data,
-        "table_c": NrldcCSerializer(c_tab, many=True).data
-    }, status=status.HTTP_200_OK)
-
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def wrldc_view(request):
-    a_tab = Wrldc2CData.objects.all()
-    c_tab = Wrldc2AData.objects.all()
-    return Response({
-        "table_a": WrldcASerializer(a_tab, many=True).data,
-        "table_c": WrldcCSerializer(c_tab, many=True).data
-    }, status=status.HTTP_200_OK)
-
-
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def posoco_view(request):
-    a_tab = PosocoTableA.objects.all()
-    c_tab = PosocoTableG.objects.all()
-    return Response({
-        "table_a": PosocoASerializer(a_tab, many=True).data,
-        "table_c": PosocoGSerializer(c_tab, many=True).data
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def request_profiles_view(request):
+    """
+    Per-endpoint request latency, SQL and render time (p50 / p95) collected by
+    processor.profiling.RequestProfilingMiddleware in this worker process,
+    slowest first. DELETE clears the samples.
+    """
+    if not settings.REQUEST_PROFILING:
+        return Response(
+            {"error": "Request profiling is off. Set REQUEST_PROFILING=1 to enable it."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    if request.method == "DELETE":
+        profiling.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({"endpoints": profiling.summary()}, status=status.HTTP_200_OK)
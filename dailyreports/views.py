@@ -1,7 +1,6 @@
 from datetime import date
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-import requests
 from datetime import date, timedelta, datetime
 from datetime import timedelta, datetime
 from django.contrib.auth.decorators import login_required
@@ -17,18 +16,25 @@ from openpyxl.styles import Font, Alignment, Border, Side
 
 
 
-SRLDC_API_BASE = "http://127.0.0.1:1236/api/srldc/"
+from django.db import DatabaseError
+
+from api_app.services import SrldcQueryError, srldc_report
+from processor.aggregates import daily_values
+
 
 def fetch_srldc_data(params: dict):
     """
-    Helper to fetch SRLDC data from the local API.
-    Returns parsed JSON on success or None on failure.
+    Helper to get the /api/srldc/ payload for params, queried in-process.
+    Returns the same dict the API answers with, or None where it would fail
+    (bad parameters, no data, or the database being unavailable), as the
+    pages did when the HTTP call failed.
     """
     try:
-        resp = requests.get(SRLDC_API_BASE, params=params, timeout=5)
-        resp.raise_for_status()
-        return resp.json()
-    except requests.RequestException:
+        return srldc_report(date=params.get("date"), month=params.get("month"), year=params.get("year"))
+    except SrldcQueryError:
+        return None
+    except DatabaseError as e:
+        print("❌ SRLDC data query failed:", e)
         return None
 
 
@@ -155,31 +161,14 @@ def monthly_error_report(request):
     years = [str(y) for y in range(2015, today.year + 1)]
 
     # ---------------- Fetch data ----------------
-    srldc_params = {"month": month, "year": year, "type": "monthly"}
-    raw = fetch_srldc_data(srldc_params) or {}
-
-    records = raw.get("table_a", []) if isinstance(raw, dict) else raw
-
-    def normalize(s):
-        return str(s).lower().replace(" ", "") if s else ""
-
-    tn_wind_by_date = {}
-
-    for r in records:
-        if normalize(r.get("state")) in ("tamilnadu", "tn"):
-            d = str(r.get("report_date"))[:10]
-            try:
-                tn_wind_by_date[d] = float(r.get("wind"))
-            except:
-                pass
-
+    # Precomputed daily aggregates (processor.aggregates); days not aggregated yet come from Srldc2AData.
     m, y = int(month), int(year)
     _, ndays = calendar.monthrange(y, m)
+    tn_wind_by_date = daily_values("SRLDC", ("tamilnadu", "tn"), "wind", date(y, m, 1), date(y, m, ndays))
 
     rows, total = [], 0.0
     for d in range(1, ndays + 1):
-        iso = f"{y}-{m:02d}-{d:02d}"
-        val = tn_wind_by_date.get(iso)
+        val = tn_wind_by_date.get(date(y, m, d))
         if val:
             total += val
         rows.append({
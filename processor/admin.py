@@ -1,3 +1,43 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IngestionLedger, IngestionTiming, MetricAggregate
+
+
+@admin.register(IngestionLedger)
+class IngestionLedgerAdmin(admin.ModelAdmin):
+    list_display = ('source', 'report_date', 'status', 'extractor_version', 'pdf_sha256', 'updated_at')
+    list_filter = ('source', 'status')
+    search_fields = ('pdf_sha256',)
+    date_hierarchy = 'report_date'
+
+
+@admin.register(IngestionTiming)
+class IngestionTimingAdmin(admin.ModelAdmin):
+    list_display = ('source', 'report_date', 'status', 'started_at', 'total_seconds', 'slowest_stage')
+    list_filter = ('source', 'status')
+    date_hierarchy = 'started_at'
+    readonly_fields = ('source', 'report_date', 'status', 'started_at', 'total_seconds', 'stage_breakdown')
+    exclude = ('stages',)
+
+    @admin.display(description='Slowest stage')
+    def slowest_stage(self, obj):
+        if not obj.stages:
+            return '-'
+        stage = max(obj.stages, key=lambda s: s.get('seconds', 0))
+        return f"{stage['stage']} ({stage.get('seconds', 0):.2f}s)"
+
+    @admin.display(description='Stages')
+    def stage_breakdown(self, obj):
+        return "\n".join(
+            f"{s['stage']}: {s.get('seconds', 0):.3f}s"
+            + "".join(f", {k}={v}" for k, v in s.items() if k not in ('stage', 'seconds'))
+            for s in obj.stages
+        )
+
+
+@admin.register(MetricAggregate)
+class MetricAggregateAdmin(admin.ModelAdmin):
+    list_display = ('region', 'state', 'metric', 'period', 'period_start', 'value', 'days', 'updated_at')
+    list_filter = ('region', 'period', 'metric')
+    search_fields = ('state',)
+    date_hierarchy = 'period_start'
@@ -0,0 +1,158 @@
+"""
+Per (region, state, metric) daily and monthly rollups of the 2(A) tables.
+
+The ingestion commands call refresh_aggregates(region, report_date) after
+writing a region's 2(A) rows: that date's day rows are rebuilt from the
+table and its month row re-summed from the day rows, so the work per run is
+one day plus one month whatever the history. Reports then read a month or
+years of values with one indexed MetricAggregate lookup (daily_values /
+monthly_values) instead of pulling and looping over every table row.
+
+States are stored normalized (state_key): "Tamil Nadu" -> "tamilnadu".
+Run the rebuild_aggregates command once to fill in existing history; until
+then daily_values() reads the days that have no day row from the 2(A)
+table itself, so reports on older months keep their data.
+"""
+import datetime
+import re
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import MetricAggregate, Nrldc2AData, Srldc2AData, Wrldc2AData
+
+# Region (ledger source name) -> its state-wise 2(A) table
+SOURCES = {
+    "SRLDC": Srldc2AData,
+    "NRLDC": Nrldc2AData,
+    "WRLDC": Wrldc2AData,
+}
+
+NON_METRIC_FIELDS = {"id", "report_date", "state", "created_at"}
+
+DAY = MetricAggregate.PERIOD_DAY
+MONTH = MetricAggregate.PERIOD_MONTH
+
+
+def state_key(name):
+    return re.sub(r"\s+", "", str(name or "")).lower()
+
+
+def metric_fields(model):
+    """Every 2(A) column that is aggregated: all but the key / bookkeeping fields."""
+    return [f.name for f in model._meta.concrete_fields if f.name not in NON_METRIC_FIELDS]
+
+
+def _number(value):
+    # WRLDC stores its 2(A) figures as text.
+    if value is None:
+        return None
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def _month_bounds(day):
+    start = day.replace(day=1)
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def refresh_day(region, report_date):
+    """Rebuild the day rows of region for report_date from its 2(A) table. Returns rows written."""
+    model = SOURCES[region]
+    metrics = metric_fields(model)
+
+    values = {}
+    for row in model.objects.filter(report_date=report_date).values("state", *metrics):
+        state = state_key(row["state"])
+        if not state:
+            continue
+        for metric in metrics:
+            value = _number(row[metric])
+            if value is not None:
+                values[(state, metric)] = value
+
+    with transaction.atomic():
+        MetricAggregate.objects.filter(region=region, period=DAY, period_start=report_date).delete()
+        MetricAggregate.objects.bulk_create([
+            MetricAggregate(region=region, state=state, metric=metric, period=DAY,
+                            period_start=report_date, value=value, days=1)
+            for (state, metric), value in values.items()
+        ])
+    return len(values)
+
+
+def refresh_month(region, day):
+    """Re-sum the month row of region for the month containing day from its day rows. Returns rows written."""
+    start, end = _month_bounds(day)
+    totals = (
+        MetricAggregate.objects
+        .filter(region=region, period=DAY, period_start__gte=start, period_start__lt=end)
+        .values("state", "metric")
+        .annotate(total=Sum("value"), days=Count("id"))
+    )
+    with transaction.atomic():
+        MetricAggregate.objects.filter(region=region, period=MONTH, period_start=start).delete()
+        created = MetricAggregate.objects.bulk_create([
+            MetricAggregate(region=region, state=row["state"], metric=row["metric"], period=MONTH,
+                            period_start=start, value=row["total"], days=row["days"])
+            for row in totals
+        ])
+    return len(created)
+
+
+def refresh_aggregates(region, report_date):
+    """Bring region's rollups up to date after its 2(A) rows for report_date were written."""
+    with transaction.atomic():
+        days = refresh_day(region, report_date)
+        months = refresh_month(region, report_date)
+    return days, months
+
+
+def _series(region, states, metric, period, start, end):
+    rows = MetricAggregate.objects.filter(
+        region=region, state__in=[state_key(s) for s in states], metric=metric,
+        period=period, period_start__gte=start, period_start__lte=end,
+    ).order_by("period_start").values_list("period_start", "value")
+    # Aliases of one state ("Tamil Nadu" / "TN") map to the same dates; the last one wins.
+    return dict(rows)
+
+
+def _raw_daily_values(region, states, metric, start, end):
+    # One report_date-indexed range read of the 2(A) table; states are matched like state_key().
+    keys = {state_key(s) for s in states}
+    rows = (
+        SOURCES[region].objects
+        .filter(report_date__gte=start, report_date__lte=end)
+        .order_by("report_date", "id")
+        .values_list("report_date", "state", metric)
+    )
+    values = {}
+    for report_date, state, value in rows:
+        value = _number(value)
+        if state_key(state) in keys and value is not None:
+            values[report_date] = value
+    return values
+
+
+def daily_values(region, states, metric, start, end):
+    """
+    {report_date: value} for start..end (inclusive). states: names or aliases of one state.
+    Days without a day row (not aggregated yet) are read from the 2(A) table.
+    """
+    values = _series(region, states, metric, DAY, start, end)
+    missing = [
+        day for day in (start + datetime.timedelta(days=i) for i in range((end - start).days + 1))
+        if day not in values
+    ]
+    if missing:
+        raw = _raw_daily_values(region, states, metric, missing[0], missing[-1])
+        values.update((day, raw[day]) for day in missing if day in raw)
+    return dict(sorted(values.items()))
+
+
+def monthly_values(region, states, metric, start, end):
+    """{first day of month: monthly sum} for the months starting in start..end (inclusive)."""
+    return _series(region, states, metric, MONTH, start, end)
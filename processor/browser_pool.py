@@ -0,0 +1,120 @@
+"""
+Long-lived headless Chromium for the periodic capture tasks.
+
+capture_demand_data_task runs every 5 minutes; starting Playwright and
+launching Chromium for every run (and again on each retry) cost more than
+the page load itself. Each Celery worker process instead keeps one browser
+and one context alive between runs and only opens a fresh page per capture:
+
+    with browser_pool.page() as page:
+        page.goto(...)
+
+The browser is relaunched when it is found disconnected (health check
+before every use), after MAX_USES pages, and after a capture fails with
+anything other than a Playwright timeout, so a crashed or wedged browser
+never serves the next run. Playwright's sync API is bound to the thread
+that started it, so pools are per thread (one per prefork worker process),
+and a pool inherited across fork() is discarded, not reused.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from celery.signals import worker_process_shutdown
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError, sync_playwright
+
+# Pages served before the browser is relaunched, to bound its memory growth.
+MAX_USES = 50
+VIEWPORT = {"width": 1920, "height": 1080}
+
+
+class BrowserPool:
+    def __init__(self, max_uses=MAX_USES):
+        self.max_uses = max_uses
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._pid = None
+        self.uses = 0
+
+    def healthy(self):
+        return (
+            self._browser is not None
+            and self._pid == os.getpid()
+            and self._browser.is_connected()
+        )
+
+    def _launch(self):
+        self._pid = os.getpid()
+        try:
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=True)
+            self._context = self._browser.new_context(viewport=VIEWPORT)
+        except Exception:
+            self.close()
+            raise
+        self.uses = 0
+        print(f"Browser pool: launched Chromium in pid {self._pid}")
+
+    def close(self):
+        if self._pid != os.getpid():
+            # Inherited through fork(): the driver belongs to the parent process.
+            self._playwright = self._browser = self._context = None
+            return
+        for closer in (
+            self._context and self._context.close,
+            self._browser and self._browser.close,
+            self._playwright and self._playwright.stop,
+        ):
+            if closer:
+                try:
+                    closer()
+                except Exception as e:
+                    print("Browser pool: error while closing:", e)
+        self._playwright = self._browser = self._context = None
+
+    @contextmanager
+    def page(self):
+        """A new page in the pooled context, closed afterwards."""
+        if not self.healthy() or self.uses >= self.max_uses:
+            self.close()
+            self._launch()
+        self.uses += 1
+
+        page = self._context.new_page()
+        try:
+            yield page
+        except PlaywrightTimeoutError:
+            raise
+        except Exception:
+            # Crashed or in an unknown state: start the next capture from a fresh browser.
+            self.close()
+            raise
+        finally:
+            try:
+                if not page.is_closed():
+                    page.close()
+            except Exception:
+                pass
+
+
+_local = threading.local()
+
+
+def get_pool():
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = BrowserPool()
+    return pool
+
+
+def page():
+    """A page from this thread's BrowserPool (see the module docstring)."""
+    return get_pool().page()
+
+
+@worker_process_shutdown.connect
+def _close_on_shutdown(**kwargs):
+    pool = getattr(_local, "pool", None)
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,239 @@
+"""
+Reading the demand figures off a vidyutpravah.in state page.
+
+capture_http() fetches the page over the shared keep-alive HTTP session
+(processor.http) and reads the three values with lxml: one request of
+tens of kilobytes and a few milliseconds of parsing, against a headless
+Chromium loading, rendering and running the page's scripts. capture_page()
+reads the same values from a Playwright page and stays as the fallback for
+when the served HTML does not carry them (layout change, values filled in
+by script). settings.DEMAND_CAPTURE_BACKEND = "browser" skips the HTTP
+attempt altogether.
+
+Both return (current_text, yesterday_text, time_block_text).
+
+Every state page has the same layout and only differs in the id of its
+map element, so STATE_PAGES is built from the vidyutpravah slugs
+(tamil-nadu -> TamilNadu_map); a page that deviates gets its own entry.
+Only the VERIFIED_STATES selectors have been checked against the live
+site; the others are captured only when listed in
+settings.DEMAND_CAPTURE_STATES. capture_states() reads any number of them
+in one run: all HTTP fetches at once on a thread pool, then the browser,
+one page after another, for the states whose HTML did not carry the
+values, all within BROWSER_BUDGET_SECONDS.
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import lxml.html
+from django.conf import settings
+
+from . import browser_pool, http, screenshots
+
+BACKEND_HTTP = "http"
+BACKEND_BROWSER = "browser"
+
+STATE_URL = "https://vidyutpravah.in/state-data/{slug}"
+TIME_BLOCK_XPATH = '/html/body/table/tbody/tr[1]/td/table/tbody/tr[2]/td/table/tbody/tr/td[2]'
+
+
+def state_page(slug, map_id=None, **extra):
+    """Registry entry for a vidyutpravah state page; map_id defaults to the CamelCased slug plus "_map"."""
+    map_id = map_id or "".join(part.capitalize() for part in slug.split("-")) + "_map"
+    return {
+        "url": STATE_URL.format(slug=slug),
+        "current": f'//*[@id="{map_id}"]/div[6]/span/span',
+        "yesterday": f'//*[@id="{map_id}"]/div[4]/span/span',
+        "time_block": TIME_BLOCK_XPATH,
+        **extra,
+    }
+
+
+STATE_PAGES = {
+    slug: state_page(slug) for slug in (
+        "andhra-pradesh", "arunachal-pradesh", "assam", "bihar", "chhattisgarh", "delhi", "goa",
+        "gujarat", "haryana", "himachal-pradesh", "jammu-kashmir", "jharkhand", "karnataka", "kerala",
+        "madhya-pradesh", "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", "odisha",
+        "puducherry", "punjab", "rajasthan", "sikkim", "telangana", "tripura", "uttar-pradesh",
+        "uttarakhand", "west-bengal",
+    )
+}
+# Tamil Nadu's readings are also pushed to the internal demand API.
+STATE_PAGES["tamil-nadu"] = TAMIL_NADU = state_page(
+    "tamil-nadu", push_endpoint="http://172.16.7.118:8003/api/tamilnadu/demand/post.demand.php",
+)
+
+# States whose map ids and XPaths have been checked against the live site; the default capture.
+VERIFIED_STATES = ("tamil-nadu",)
+
+# The site's time blocks are Indian Standard Time.
+SITE_TZ = ZoneInfo("Asia/Kolkata")
+MW_RE = re.compile(r"^\s*([\d,]+(?:\.\d+)?)\s*(?:MW)?\s*$")
+
+TIME_BLOCK_RE = re.compile(r"TIME BLOCK (\d{2}:\d{2} - \d{2}:\d{2}) DATED (\d{2} [A-Z]{3} \d{4})")
+
+HTTP_TIMEOUT = (10, 30)
+# Concurrent page fetches; stays under processor.http.POOL_MAXSIZE connections to the host.
+HTTP_WORKERS = 8
+BROWSER_ATTEMPTS = 3
+# Browser fallbacks stop once a run has spent this long, so a run fits the 5-minute schedule.
+BROWSER_BUDGET_SECONDS = 240
+# Page load and selector waits; capped at the time left before the run's deadline.
+GOTO_TIMEOUT_MS = 90000
+SELECTOR_TIMEOUT_MS = 30000
+RETRY_DELAY_SECONDS = 3
+# An attempt is not started with less time than this left.
+MIN_ATTEMPT_SECONDS = 5
+
+
+class CaptureError(Exception):
+    pass
+
+
+def parse_time_block(text):
+    """(time_block, date) from the page's "TIME BLOCK hh:mm - hh:mm DATED dd MON yyyy" text, or None."""
+    match = TIME_BLOCK_RE.search(text or "")
+    if not match:
+        return None
+    return match.group(1), datetime.strptime(match.group(2), "%d %b %Y").date()
+
+
+def block_start(time_block, date):
+    """Aware start of a parse_time_block() block: ("10:15 - 10:30", 2026-10-16) -> 2026-10-16 10:15 IST."""
+    start = datetime.strptime(time_block.split("-")[0].strip(), "%H:%M").time()
+    return datetime.combine(date, start, SITE_TZ)
+
+
+def parse_mw(text):
+    """Whole MW from the page's "12,345 MW", or None."""
+    match = MW_RE.match(text or "")
+    if not match:
+        return None
+    return round(float(match.group(1).replace(",", "")))
+
+
+def _text(tree, xpath):
+    # Browsers insert <tbody>; the served HTML may not have it.
+    nodes = tree.xpath(xpath) or tree.xpath(xpath.replace("/tbody", ""))
+    text = " ".join(nodes[0].text_content().split()) if nodes else ""
+    if not text:
+        raise CaptureError(f"No text at {xpath}")
+    return text
+
+
+def capture_http(state_page):
+    """Values of state_page (e.g. TAMIL_NADU) from the raw HTML; CaptureError when they are not in it."""
+    response = http.get(state_page["url"], timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    tree = lxml.html.fromstring(response.content)
+
+    texts = tuple(_text(tree, state_page[key]) for key in ("current", "yesterday", "time_block"))
+    if parse_time_block(texts[2]) is None:
+        raise CaptureError(f"Unrecognized time block text: {texts[2]!r}")
+    return texts
+
+
+def _timeout_ms(limit_ms, deadline):
+    # Playwright reads a timeout of 0 as "no timeout", so never go below 1 ms.
+    if deadline is None:
+        return limit_ms
+    return max(min(limit_ms, int((deadline - time.monotonic()) * 1000)), 1)
+
+
+def capture_page(page, state_page, deadline=None):
+    """
+    Values of state_page read from a Playwright page (see processor.browser_pool).
+    Every wait is cut short at deadline (a time.monotonic() value) when given.
+    """
+    page.goto(state_page["url"], timeout=_timeout_ms(GOTO_TIMEOUT_MS, deadline), wait_until="domcontentloaded")
+    page.wait_for_selector(f'xpath={state_page["current"]}', timeout=_timeout_ms(SELECTOR_TIMEOUT_MS, deadline))
+
+    texts = [
+        page.locator(f'xpath={state_page[key]}').inner_text(timeout=_timeout_ms(SELECTOR_TIMEOUT_MS, deadline))
+        for key in ("current", "yesterday", "time_block")
+    ]
+    return texts[0], texts[1], " ".join(texts[2].split())
+
+
+def _reading(texts):
+    """capture_* texts -> the run's result for one state: status plus, when captured, its values."""
+    current_text, yesterday_text, full_text = texts
+    parsed = parse_time_block(full_text)
+    current, yesterday = parse_mw(current_text), parse_mw(yesterday_text)
+    if not parsed or current is None or yesterday is None:
+        print(f"Unparsable capture: {texts!r}")
+        return {"status": "ParsingFailed"}
+    time_block, date = parsed
+    return {
+        "status": "DataCaptured",
+        "current": current,
+        "yesterday": yesterday,
+        "time_block": time_block,
+        "date": date,
+        "block_start": block_start(time_block, date),
+    }
+
+
+def _capture_with_browser(slug, screenshot, run_started, deadline):
+    """
+    Up to BROWSER_ATTEMPTS pooled-browser captures of one state, none of them
+    running past deadline; screenshots the page when it parses.
+    """
+    for attempt in range(1, BROWSER_ATTEMPTS + 1):
+        if deadline - time.monotonic() < MIN_ATTEMPT_SECONDS:
+            print(f"{slug}: out of time after {attempt - 1} scraping attempt(s)")
+            return {"status": "ScrapingFailed"}
+        try:
+            # Reuses this worker's running Chromium; only the navigation is paid per state.
+            with browser_pool.page() as page:
+                texts = capture_page(page, STATE_PAGES[slug], deadline)
+                image = screenshots.grab(page) if screenshot and parse_time_block(texts[2]) else None
+            if image is not None:
+                # Compressed and written by the background writer; the run does not wait for it.
+                screenshots.save(image, f'{run_started.strftime("%Y-%m-%d_%H-%M-%S")}_{slug}')
+            return _reading(texts)
+        except Exception as e:
+            print(f"{slug}: scraping attempt {attempt} failed:", e)
+            if attempt < BROWSER_ATTEMPTS:
+                time.sleep(max(min(RETRY_DELAY_SECONDS, deadline - time.monotonic()), 0))
+    print(f"{slug}: all scraping retries failed.")
+    return {"status": "ScrapingFailed"}
+
+
+def capture_states(slugs, screenshot=True, run_started=None):
+    """
+    {slug: reading} for every slug in STATE_PAGES. A reading is
+    {"status": "DataCaptured", "current", "yesterday" (MW), "time_block", "date", "block_start"}
+    or {"status": "ParsingFailed" / "ScrapingFailed"}. Browser captures are
+    screenshotted (processor.screenshots) unless screenshot is False.
+    """
+    run_started = run_started or datetime.now()
+    deadline = time.monotonic() + BROWSER_BUDGET_SECONDS
+    results = {}
+
+    if settings.DEMAND_CAPTURE_BACKEND == BACKEND_HTTP and slugs:
+        with ThreadPoolExecutor(max_workers=min(HTTP_WORKERS, len(slugs))) as pool:
+            futures = {slug: pool.submit(capture_http, STATE_PAGES[slug]) for slug in slugs}
+        for slug, future in futures.items():
+            try:
+                reading = _reading(future.result())
+            except Exception as e:
+                print(f"{slug}: HTTP capture failed, falling back to the browser:", e)
+                continue
+            # Values the served HTML carries but that do not parse are retried in the browser too.
+            if reading["status"] == "DataCaptured":
+                results[slug] = reading
+            else:
+                print(f"{slug}: HTTP capture unparsable, falling back to the browser")
+        print(f"Captured {len(results)}/{len(slugs)} states over HTTP")
+
+    for slug in slugs:
+        if slug in results:
+            continue
+        results[slug] = _capture_with_browser(slug, screenshot, run_started, deadline)
+
+    return results
+
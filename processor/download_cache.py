@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from datetime import datetime
+
+from . import http
+
+CACHE_DIR = os.path.join("downloads", "cache")
+
+# path: local copy handed to the extractor
+# sha256: content hash of the PDF (compare against IngestionLedger.pdf_sha256)
+# not_modified: server answered 304 to our conditional GET
+CachedPdf = namedtuple("CachedPdf", "path url cache_key sha256 not_modified")
+
+
+def _index_path(cache_key):
+    return os.path.join(CACHE_DIR, "index", hashlib.sha256(cache_key.encode("utf-8")).hexdigest() + ".json")
+
+
+def _blob_path(sha256):
+    return os.path.join(CACHE_DIR, "blobs", sha256[:2], sha256 + ".pdf")
+
+
+def _read_entry(cache_key):
+    try:
+        with open(_index_path(cache_key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_entry(cache_key, entry):
+    path = _index_path(cache_key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def fetch_pdf(url, dest_path=None, cache_key=None, timeout=60, **request_kwargs):
+    """
+    Download url through the shared content-addressed cache.
+
+    PDFs are stored once under downloads/cache/blobs/<sha256>.pdf and each
+    source URL keeps its last ETag / Last-Modified, which are sent back as
+    If-None-Match / If-Modified-Since. On 304 (or a 200 with the same bytes)
+    the cached blob is reused without re-downloading it.
+
+    Without dest_path the returned path is the cached blob itself: callers
+    read it and must not modify or delete it. With dest_path the blob is
+    copied there first.
+
+    cache_key defaults to url; pass the URL without cache-busting query
+    parameters when the caller adds them. Extra keyword arguments (headers,
+    verify, ...) go to processor.http.get.
+
+    Raises requests.exceptions.HTTPError like response.raise_for_status(),
+    so callers keep their 404 handling.
+    """
+    cache_key = cache_key or url
+    entry = _read_entry(cache_key)
+
+    headers = dict(request_kwargs.pop("headers", None) or {})
+    if entry.get("sha256") and os.path.exists(_blob_path(entry["sha256"])):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    # Streamed: the connection goes back to the pool only once the response is closed.
+    with http.get(url, headers=headers, stream=True, timeout=timeout, **request_kwargs) as response:
+        if response.status_code == 304:
+            sha256 = entry["sha256"]
+            not_modified = True
+        else:
+            response.raise_for_status()
+            os.makedirs(os.path.join(CACHE_DIR, "blobs"), exist_ok=True)
+            digest = hashlib.sha256()
+            fd, tmp_path = tempfile.mkstemp(suffix=".pdf", dir=os.path.join(CACHE_DIR, "blobs"))
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        digest.update(chunk)
+                        fh.write(chunk)
+                sha256 = digest.hexdigest()
+                blob = _blob_path(sha256)
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(tmp_path, blob)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            not_modified = False
+
+            entry.update({
+                "url": url,
+                "sha256": sha256,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            })
+            _write_entry(cache_key, entry)
+
+    path = _blob_path(sha256)
+    if dest_path is not None:
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+        shutil.copyfile(path, dest_path)
+        path = dest_path
+
+    return CachedPdf(path, url, cache_key, sha256, not_modified)
@@ -0,0 +1,22 @@
+import django_filters
+
+
+class ReportDateFilter(django_filters.FilterSet):
+    """
+    ?date=YYYY-MM-DD, or the inclusive range ?from=YYYY-MM-DD&to=YYYY-MM-DD,
+    on report_date. Used by the region APIs for both tables of a response,
+    so it declares its filters instead of being bound to one model.
+    """
+    date = django_filters.DateFilter(field_name="report_date")
+    to = django_filters.DateFilter(field_name="report_date", lookup_expr="lte")
+
+
+# "from" is a Python keyword, so it cannot be declared in the class body.
+ReportDateFilter.declared_filters["from"] = ReportDateFilter.base_filters["from"] = django_filters.DateFilter(
+    field_name="report_date", lookup_expr="gte"
+)
+
+
+class StateReportFilter(ReportDateFilter):
+    """ReportDateFilter plus ?state= (case-insensitive) for the state-wise 2(A) / 2(C) tables."""
+    state = django_filters.CharFilter(field_name="state", lookup_expr="iexact")
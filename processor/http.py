@@ -0,0 +1,118 @@
+"""
+Shared HTTP client for the RLDC / grid-india scrapers.
+
+Every command used to build its own requests.Session() (or call bare
+requests.get) per file, paying a fresh TCP + TLS handshake to the same
+government hosts each time, with no retries and sometimes no timeout.
+This module keeps one pooled keep-alive session per (host, verify) for the
+whole process, mounted with LegacySSLAdapter and a retry/backoff policy:
+
+    from processor import http
+
+    resp = http.get(url, timeout=60)
+    resp = http.post(api_url, json=payload, verify=False)
+
+``verify=False`` selects a session whose TLS context skips certificate
+checks (grid-india / SRLDC backfill hosts); everything else verifies.
+"""
+import os
+import ssl
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.ssl_ import create_urllib3_context
+
+# (connect, read) seconds, used when the caller passes no timeout
+DEFAULT_TIMEOUT = (10, 60)
+POOL_MAXSIZE = 10
+
+# Retries connection errors for every method, and 429/5xx responses for
+# idempotent methods only (POSTs such as merge_reports are never replayed
+# after the server has seen them). Backoff: 1s, 2s, 4s.
+RETRY = Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=(429, 500, 502, 503, 504),
+    raise_on_status=False,
+    respect_retry_after_header=True,
+)
+
+
+class LegacySSLAdapter(HTTPAdapter):
+    """
+    HTTPAdapter for the government sites that still need legacy TLS:
+    unsafe renegotiation (OP_LEGACY_SERVER_CONNECT) and SECLEVEL=1 ciphers.
+    """
+
+    def __init__(self, verify_certs=True, **kwargs):
+        self.verify_certs = verify_certs
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        ctx = create_urllib3_context()
+        if self.verify_certs:
+            ctx.load_default_certs()
+        else:
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        # Enable "Legacy Server Connect" (0x4) to allow unsafe renegotiation
+        ctx.options |= 0x4
+        # Lower security level to allow older ciphers often used by gov sites
+        try:
+            ctx.set_ciphers('DEFAULT@SECLEVEL=1')
+        except Exception:
+            pass
+
+        pool_kwargs["ssl_context"] = ctx
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # A Celery prefork child must not share pooled sockets with its parent.
+    global _lock
+    _sessions.clear()
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _build_session(verify):
+    session = requests.Session()
+    session.verify = verify
+    session.mount("https://", LegacySSLAdapter(verify_certs=verify, max_retries=RETRY,
+                                               pool_connections=1, pool_maxsize=POOL_MAXSIZE))
+    session.mount("http://", HTTPAdapter(max_retries=RETRY, pool_connections=1, pool_maxsize=POOL_MAXSIZE))
+    return session
+
+
+def session_for(url, verify=True):
+    """The process-wide pooled session for url's host."""
+    key = (urlsplit(url).netloc.lower(), bool(verify))
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _sessions[key] = _build_session(bool(verify))
+    return session
+
+
+def request(method, url, verify=True, timeout=DEFAULT_TIMEOUT, **kwargs):
+    return session_for(url, verify).request(method, url, timeout=timeout, verify=verify, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,82 @@
+import hashlib
+
+from .models import IngestionLedger
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_unchanged(source, report_date, pdf_sha256, extractor_version):
+    """
+    True when this exact PDF was already ingested successfully for the date
+    by the current extractor version, i.e. re-running would be a no-op.
+    """
+    return IngestionLedger.objects.filter(
+        source=source,
+        report_date=report_date,
+        pdf_sha256=pdf_sha256,
+        extractor_version=extractor_version,
+        status=IngestionLedger.STATUS_SUCCESS,
+    ).exists()
+
+
+class LedgerRun:
+    """
+    Collects per-table outcomes while a command ingests one report, then
+    writes the (source, report_date) ledger row.
+
+        run = LedgerRun("SRLDC", report_date, sha, EXTRACTOR_VERSION, ["Srldc2AData", ...])
+        inserted, updated, unchanged = bulk_upsert(...)
+        run.saved("Srldc2AData", inserted, updated, unchanged)
+        ...
+        run.finish()
+
+    Status is success when every expected table was saved, partial when only
+    some were, failed when none were. Only a success row lets the next run
+    of the same PDF skip, so partial/failed reports are retried.
+    """
+
+    def __init__(self, source, report_date, pdf_sha256, extractor_version, expected_tables):
+        self.source = source
+        self.report_date = report_date
+        self.pdf_sha256 = pdf_sha256
+        self.extractor_version = extractor_version
+        self.expected_tables = list(expected_tables)
+        self.row_counts = {}
+        self.errors = {}
+
+    def saved(self, table, inserted, updated, unchanged):
+        self.row_counts[table] = {"inserted": inserted, "updated": updated, "unchanged": unchanged}
+
+    def failed(self, table, error):
+        self.errors[table] = str(error)
+
+    @property
+    def status(self):
+        saved = [t for t in self.expected_tables if t in self.row_counts]
+        if not saved:
+            return IngestionLedger.STATUS_FAILED
+        if len(saved) < len(self.expected_tables) or self.errors:
+            return IngestionLedger.STATUS_PARTIAL
+        return IngestionLedger.STATUS_SUCCESS
+
+    def finish(self):
+        counts = dict(self.row_counts)
+        if self.errors:
+            counts["errors"] = self.errors
+        entry, _ = IngestionLedger.objects.update_or_create(
+            source=self.source,
+            report_date=self.report_date,
+            defaults={
+                "pdf_sha256": self.pdf_sha256,
+                "extractor_version": self.extractor_version,
+                "row_counts": counts,
+                "status": self.status,
+            },
+        )
+        return entry
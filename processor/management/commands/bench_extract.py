@@ -0,0 +1,288 @@
+"""
+Benchmark of the PDF extractors over a local corpus (no network).
+
+The corpus is a directory of real PSP reports, one sub-directory per
+extractor (see EXTRACTORS), e.g.:
+
+    corpus/srldc/2025-01-10.pdf
+    corpus/nrldc/2025-01-10.pdf
+    corpus/posoco/2025-01-10.pdf
+
+The PDFs are not part of the repository. Copy a few days from the ingestion
+download folders and keep that set fixed. Record the baseline once, on the
+commit to compare against:
+
+    python manage.py bench_extract --corpus /data/bench_corpus --save-baseline
+
+Later runs compare against it and fail on a slowdown, RSS growth beyond
+--tolerance, or a change in row counts:
+
+    python manage.py bench_extract --corpus /data/bench_corpus
+
+The baseline defaults to baseline.json inside the corpus, so the two stay
+together.
+"""
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from statistics import median
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+BASELINE_NAME = "baseline.json"
+
+# Rows are written under this date inside a transaction that is always rolled back.
+BENCH_REPORT_DATE = datetime.date(2000, 1, 1)
+
+def _row_count(ledger):
+    return sum(
+        counts["inserted"] + counts["updated"] + counts["unchanged"]
+        for table, counts in ledger.row_counts.items()
+    )
+
+
+def _parse_seconds(timer):
+    from processor.timing import PARSE_STAGES
+
+    return sum(s["seconds"] for s in timer.stages if s["stage"].split(":", 1)[0] in PARSE_STAGES)
+
+
+def _bench_srldc(pdf_path, out_dir):
+    """SRLDC PSP, current layout: srldc_project's 2(A) / 2(C) / 3(B) extractors."""
+    from processor.ledger import LedgerRun
+    from processor.parsed_report import ParsedReport
+    from processor.timing import STAGE_PDF_OPEN, StageTimer
+    from .srldc_project import Command, LEDGER_SOURCE
+
+    command = Command(stdout=io.StringIO())
+    command.timer = StageTimer(LEDGER_SOURCE)
+    command.ledger = LedgerRun(LEDGER_SOURCE, BENCH_REPORT_DATE, "", "", [])
+    with command.timer.stage(STAGE_PDF_OPEN):
+        report = ParsedReport(pdf_path)
+    with report:
+        command.process_report(report, BENCH_REPORT_DATE, out_dir)
+    return _row_count(command.ledger), _parse_seconds(command.timer)
+
+
+def _bench_srldc_old(pdf_path, out_dir):
+    """SRLDC PSP, old layout: old_srldc_date_post's 3(B) parser (pure CPU, no DB)."""
+    from .old_srldc_date_post import parse_report_pdf
+
+    start = time.perf_counter()
+    parsed = parse_report_pdf(pdf_path)
+    return len(parsed["central"]) + len(parsed["joint_venture"]), time.perf_counter() - start
+
+
+def _bench_tabula_command(module_name):
+    def bench(pdf_path, out_dir):
+        from importlib import import_module
+        from processor.ledger import LedgerRun
+        from processor.timing import StageTimer
+
+        module = import_module(f"{__package__}.{module_name}")
+        command = module.Command(stdout=io.StringIO())
+        command.timer = StageTimer(module.LEDGER_SOURCE)
+        command.ledger = LedgerRun(module.LEDGER_SOURCE, BENCH_REPORT_DATE, "", "", [])
+        command.extract_tables_from_pdf(pdf_path, out_dir, BENCH_REPORT_DATE)
+        return _row_count(command.ledger), _parse_seconds(command.timer)
+
+    bench.__doc__ = f"{module_name}.extract_tables_from_pdf (tabula 2(A) / 2(C))."
+    return bench
+
+
+def _bench_posoco(pdf_path, out_dir):
+    """POSOCO PSP: posoco.extract_tables_from_pdf (tabula Table A / G, JSON only, no DB)."""
+    from processor.timing import StageTimer
+    from .posoco import LEDGER_SOURCE, extract_tables_from_pdf
+
+    timer = StageTimer(LEDGER_SOURCE)
+    final_json = extract_tables_from_pdf(pdf_path, out_dir, "bench", desired_date=BENCH_REPORT_DATE, timer=timer)
+    tables = final_json["POSOCO"]
+    # Empty-template keys have None values and do not count as rows.
+    rows = sum(1 for table in tables["posoco_table_a"] + tables["posoco_table_g"] for values in table.values() if values)
+    return rows, _parse_seconds(timer)
+
+
+# Corpus sub-directory name -> bench function(pdf_path, out_dir) -> (rows, parse_seconds)
+EXTRACTORS = {
+    "srldc": _bench_srldc,
+    "srldc_old": _bench_srldc_old,
+    "nrldc": _bench_tabula_command("nrldc_project"),
+    "wrldc": _bench_tabula_command("wrldc_project"),
+    "posoco": _bench_posoco,
+}
+# Extractors that read tables through tabula and so need the JVM.
+TABULA_EXTRACTORS = {"nrldc", "wrldc", "posoco"}
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _init_worker(warm_up_jvm):
+    django.setup()
+    if warm_up_jvm:
+        from processor import tabula_backend
+        # Start the JVM before timing anything, as a long-lived Celery worker would have.
+        # pdfplumber-only extractors skip it, so their peak RSS does not include a JVM.
+        tabula_backend.warm_up()
+
+
+def _run_one(extractor, pdf_path):
+    """
+    Run one extractor over one PDF inside a fresh worker process, so the
+    process's peak RSS belongs to this extraction alone. DB writes are rolled
+    back and JSON goes to a temporary directory.
+    """
+    with redirect_stdout(io.StringIO()), tempfile.TemporaryDirectory() as out_dir:
+        start = time.perf_counter()
+        with transaction.atomic():
+            rows, parse_seconds = EXTRACTORS[extractor](pdf_path, out_dir)
+            transaction.set_rollback(True)
+        wall = time.perf_counter() - start
+    return {"wall_seconds": wall, "parse_seconds": parse_seconds, "rows": rows, "peak_rss_mb": _peak_rss_mb()}
+
+
+class Command(BaseCommand):
+    help = ("Benchmark every PDF extractor on a local corpus (no network): wall time, peak RSS and rows "
+            "per extractor, compared against a stored baseline JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', required=True,
+                            help=f"Directory with one sub-directory of PDFs per extractor "
+                                 f"({', '.join(EXTRACTORS)})")
+        parser.add_argument('--baseline',
+                            help=f"Baseline JSON to compare against (default: <corpus>/{BASELINE_NAME})")
+        parser.add_argument('--save-baseline', action='store_true',
+                            help="Write this run's results to --baseline instead of comparing")
+        parser.add_argument('--extractor', action='append', choices=list(EXTRACTORS),
+                            help="Only benchmark this extractor (repeatable)")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per PDF; the median is reported (default 3)")
+        parser.add_argument('--tolerance', type=float, default=0.15,
+                            help="Allowed slowdown / RSS growth before a regression is reported (default 0.15 = 15%%)")
+
+    def handle(self, *args, **options):
+        corpus = options['corpus']
+        if not os.path.isdir(corpus):
+            raise CommandError(f"❌ Corpus directory not found: {corpus}")
+
+        baseline_path = options['baseline'] or os.path.join(corpus, BASELINE_NAME)
+        if not options['save_baseline'] and not os.path.exists(baseline_path):
+            raise CommandError(f"❌ No baseline at {baseline_path}; record one first with --save-baseline.")
+
+        repeat = max(options['repeat'], 1)
+        results = {}
+        for extractor in options['extractor'] or EXTRACTORS:
+            pdf_dir = os.path.join(corpus, extractor)
+            pdfs = sorted(
+                os.path.join(pdf_dir, f) for f in os.listdir(pdf_dir) if f.lower().endswith('.pdf')
+            ) if os.path.isdir(pdf_dir) else []
+            if not pdfs:
+                self.stdout.write(self.style.WARNING(f"⚠️ {extractor}: no PDFs in {pdf_dir}, skipping."))
+                continue
+            results[extractor] = self.bench_extractor(extractor, pdfs, repeat)
+
+        if not results:
+            raise CommandError("❌ No PDFs found for any extractor.")
+
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(baseline_path) or ".", exist_ok=True)
+            with open(baseline_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=4)
+            self.stdout.write(self.style.SUCCESS(f"✅ Baseline saved to {baseline_path}"))
+            return
+
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = self.compare(results, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError(f"❌ {len(regressions)} regression(s) against {baseline_path}: "
+                               + "; ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"✅ No regressions against {baseline_path}"))
+
+    def bench_extractor(self, extractor, pdfs, repeat):
+        files = {}
+        # One fresh spawned process per run: ru_maxrss only ever grows, so a
+        # shared process would report the largest PDF's peak for every file.
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(extractor in TABULA_EXTRACTORS,), max_tasks_per_child=1) as pool:
+            for pdf in pdfs:
+                name = os.path.basename(pdf)
+                try:
+                    runs = [pool.submit(_run_one, extractor, pdf).result() for _ in range(repeat)]
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ {extractor}/{name}: {e}"))
+                    files[name] = {"error": str(e)}
+                    continue
+                rss = [r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None]
+                files[name] = {
+                    "wall_seconds": round(median(r["wall_seconds"] for r in runs), 4),
+                    "parse_seconds": round(median(r["parse_seconds"] for r in runs), 4),
+                    "peak_rss_mb": max(rss) if rss else None,
+                    "rows": runs[-1]["rows"],
+                }
+                self.stdout.write(f"📄 {extractor}/{name}: {self.describe(files[name])}")
+
+        ok = [f for f in files.values() if "error" not in f]
+        rss = [f["peak_rss_mb"] for f in ok if f["peak_rss_mb"] is not None]
+        summary = {
+            "wall_seconds": round(sum(f["wall_seconds"] for f in ok), 4),
+            "parse_seconds": round(sum(f["parse_seconds"] for f in ok), 4),
+            "peak_rss_mb": max(rss) if rss else None,
+            "rows": sum(f["rows"] for f in ok),
+            "errors": len(files) - len(ok),
+            "files": files,
+        }
+        self.stdout.write(self.style.SUCCESS(f"✅ {extractor} ({len(pdfs)} PDFs): {self.describe(summary)}"))
+        return summary
+
+    @staticmethod
+    def describe(result):
+        rss = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] is not None else "n/a"
+        return (f"{result['wall_seconds']:.3f}s wall ({result['parse_seconds']:.3f}s parsing), "
+                f"peak RSS {rss}, {result['rows']} rows")
+
+    def compare(self, results, baseline, tolerance):
+        regressions = []
+        for extractor, current in results.items():
+            base = baseline.get(extractor)
+            if not base:
+                self.stdout.write(f"🆕 {extractor}: not in baseline")
+                continue
+
+            checks = [("wall_seconds", "wall time"), ("peak_rss_mb", "peak RSS")]
+            for key, label in checks:
+                if not base.get(key) or current.get(key) is None:
+                    continue
+                change = current[key] / base[key] - 1
+                line = f"{extractor} {label}: {base[key]} -> {current[key]} ({change:+.1%})"
+                if change > tolerance:
+                    regressions.append(line)
+                    self.stdout.write(self.style.ERROR(f"❌ {line}"))
+                else:
+                    self.stdout.write(f"📊 {line}")
+
+            if current["rows"] != base.get("rows"):
+                line = f"{extractor} rows: {base.get('rows')} -> {current['rows']}"
+                regressions.append(line)
+                self.stdout.write(self.style.ERROR(f"❌ {line}"))
+        return regressions
@@ -0,0 +1,74 @@
+import datetime
+import time
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api_app.serializers import (NrldcASerializer, NrldcCSerializer, PosocoASerializer, SrldcASerializer,
+                                 ValuesSerializer, WrldcASerializer)
+from processor.models import Nrldc2AData, Nrldc2CData, PosocoTableA, Srldc2AData, Wrldc2AData
+
+# The fixture is written under this date inside a transaction that is always rolled back.
+BENCH_REPORT_DATE = datetime.date(2000, 1, 1)
+
+
+def _fixture(model, rows):
+    """rows unsaved instances of model, 50 states (or categories) per report date, every other field filled in."""
+    instances = []
+    for i in range(rows):
+        values = {"report_date": BENCH_REPORT_DATE - datetime.timedelta(days=i // 50)}
+        for field in model._meta.concrete_fields:
+            if field.primary_key or field.name in values or field.name == "created_at":
+                continue
+            kind = field.get_internal_type()
+            if kind == "FloatField":
+                values[field.name] = i * 1.25
+            elif kind == "CharField":
+                values[field.name] = f"{field.name}-{i % 50}" if field.name in ("state", "category") else str(i)
+        instances.append(model(**values))
+    return instances
+
+
+class Command(BaseCommand):
+    help = ("Micro-benchmark of the region API serialization: DRF ModelSerializer(many=True).data against "
+            "api_app.serializers.ValuesSerializer on a generated fixture (rolled back afterwards)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Fixture rows per table (default 10000)")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per serializer; the median is reported (default 5)")
+
+    def handle(self, *args, **options):
+        cases = [
+            (Srldc2AData, SrldcASerializer),
+            (Nrldc2AData, NrldcASerializer),
+            (Nrldc2CData, NrldcCSerializer),
+            (Wrldc2AData, WrldcASerializer),
+            (PosocoTableA, PosocoASerializer),
+        ]
+        repeat = max(options['repeat'], 1)
+
+        with transaction.atomic():
+            for model, serializer_class in cases:
+                model.objects.bulk_create(_fixture(model, options['rows']), batch_size=2000)
+                queryset = model.objects.filter(report_date__lte=BENCH_REPORT_DATE).order_by("-report_date", "-id")
+
+                drf_runs, fast_runs = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    drf = serializer_class(queryset.all(), many=True).data
+                    drf_runs.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    fast = ValuesSerializer(serializer_class).serialize(queryset.all())
+                    fast_runs.append(time.perf_counter() - start)
+
+                if [dict(row) for row in drf] != fast:
+                    raise CommandError(f"❌ {model.__name__}: ValuesSerializer output differs from {serializer_class.__name__}")
+
+                drf_seconds, fast_seconds = median(drf_runs), median(fast_runs)
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {model.__name__} ({len(fast)} rows): ModelSerializer {drf_seconds:.3f}s, "
+                    f"ValuesSerializer {fast_seconds:.3f}s ({drf_seconds / fast_seconds:.1f}x faster, same output)"
+                ))
+            transaction.set_rollback(True)
@@ -0,0 +1,60 @@
+import os
+import time
+from statistics import mean
+
+from django.core.management.base import BaseCommand, CommandError
+
+from processor import tabula_backend
+
+TABULA_OPTIONS = dict(pages='all', multiple_tables=True, pandas_options={'header': None}, lattice=True)
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-PDF tabula latency: one JVM per call vs the shared in-process JVM"
+
+    def add_arguments(self, parser):
+        parser.add_argument('pdfs', nargs='+', help="PDF files or directories of PDFs (e.g. downloads/NRLDC)")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per PDF and mode (default 3)")
+
+    def handle(self, *args, **options):
+        pdfs = []
+        for path in options['pdfs']:
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    pdfs.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith('.pdf'))
+            elif os.path.isfile(path):
+                pdfs.append(path)
+        if not pdfs:
+            raise CommandError("❌ No PDF files found.")
+
+        repeat = max(options['repeat'], 1)
+
+        # JVM startup is paid once per worker process; report it separately.
+        start = time.perf_counter()
+        backend = tabula_backend.warm_up()
+        startup = time.perf_counter() - start
+        self.stdout.write(f"⚙️ Shared backend: {backend} (startup {startup:.2f}s)")
+        if backend != "jpype":
+            self.stdout.write(self.style.WARNING("⚠️ jpype not available; both modes will spawn a JVM per call."))
+
+        before, after = [], []
+        for pdf in pdfs:
+            sub_times = [self._time(pdf, force_subprocess=True) for _ in range(repeat)]
+            jvm_times = [self._time(pdf) for _ in range(repeat)]
+            before.append(mean(sub_times))
+            after.append(mean(jvm_times))
+            self.stdout.write(
+                f"📄 {os.path.basename(pdf)}: subprocess {mean(sub_times):.3f}s, "
+                f"shared JVM {mean(jvm_times):.3f}s"
+            )
+
+        speedup = mean(before) / mean(after) if mean(after) else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(pdfs)} PDF(s) x {repeat}: mean per-PDF latency "
+            f"before {mean(before):.3f}s, after {mean(after):.3f}s ({speedup:.1f}x)"
+        ))
+
+    def _time(self, pdf, **kwargs):
+        start = time.perf_counter()
+        tabula_backend.read_pdf(pdf, **TABULA_OPTIONS, **kwargs)
+        return time.perf_counter() - start
@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 
 from django.core.management.base import BaseCommand, CommandError
 
+from processor import http
+
 def extract_date_from_filename(filename):
     patterns = [
         (r'(\d{4})-(\d{2})-(\d{2})', (1, 2, 3)),
@@ -142,8 +144,14 @@ class Command(BaseCommand):
                 ]
                 
                 if subdirs_for_date:
-                    # Sort to get the latest directory (e.g., ..._09-31-20 is newer than ..._09-30-26)
-                    latest_subdir_name = sorted(subdirs_for_date)[-1]
+                    # Sort to get the latest directory (e.g., ..._09-31-20 is newer than ..._09-30-26).
+                    # A rerun that skipped an unchanged PDF leaves a newer folder without JSON,
+                    # so use the latest folder that actually has one.
+                    ordered = sorted(subdirs_for_date, reverse=True)
+                    latest_subdir_name = next(
+                        (d for d in ordered if glob(os.path.join(report_dir, d, '*.json'))),
+                        ordered[0],
+                    )
                     print(latest_subdir_name,"1234567")
                     full_subdir = os.path.join(report_dir, latest_subdir_name)
                     
@@ -211,7 +219,7 @@ class Command(BaseCommand):
             print("done")
             pass
             self.stdout.write(f"\nAttempting to push data to: {api_url_with_date}...")
-            response = requests.post(api_url_with_date, headers=headers, json=merged_data, timeout=30)
+            response = http.post(api_url_with_date, headers=headers, json=merged_data, timeout=30)
             if response.status_code in [200, 201]:
                 self.stdout.write(self.style.SUCCESS(f"✅ Successfully pushed data to API. Status Code: {response.status_code}"))
                 self.stdout.write(f"Response text: {response.text}")
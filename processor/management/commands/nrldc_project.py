@@ -3,34 +3,23 @@ import datetime
 import os
 import pandas as pd
 import json
+import time
 import logging
 from django.core.management.base import BaseCommand, CommandError
-from processor.models import Nrldc2AData, Nrldc2CData
-from tabula.io import read_pdf
-import ssl
-from requests.adapters import HTTPAdapter
-from urllib3.util.ssl_ import create_urllib3_context
-from urllib3.poolmanager import PoolManager
-
-
-class LegacySSLAdapter(HTTPAdapter):
-    def init_poolmanager(self, connections, maxsize, block=False):
-        ctx = create_urllib3_context()
-        ctx.load_default_certs()
-        # Enable "Legacy Server Connect" (0x4) to allow unsafe renegotiation
-        ctx.options |= 0x4
-        # (Optional) Lower security level to allow older ciphers often used by gov sites
-        try:
-            ctx.set_ciphers('DEFAULT@SECLEVEL=1')
-        except Exception:
-            pass
-
-        self.poolmanager = PoolManager(
-            num_pools=connections,
-            maxsize=maxsize,
-            block=block,
-            ssl_context=ctx
-        )
+from processor.models import IngestionLedger, Nrldc2AData, Nrldc2CData
+from processor.upsert import bulk_upsert
+from processor.download_cache import fetch_pdf
+from processor.ledger import LedgerRun, is_unchanged
+from processor.tabula_backend import read_pdf
+from processor.aggregates import refresh_aggregates
+from processor.timing import (StageTimer, STATUS_SKIPPED, STAGE_METADATA, STAGE_DOWNLOAD, STAGE_EXTRACT,
+                              STAGE_NORMALIZE, STAGE_DB_WRITE, STAGE_JSON_WRITE, STAGE_AGGREGATES)
+from processor import http
+
+
+LEDGER_SOURCE = "NRLDC"
+# Bump when the 2A/2C extraction logic changes so already-ingested PDFs are re-parsed.
+EXTRACTOR_VERSION = "1"
 
 
 class Command(BaseCommand):
@@ -51,6 +40,9 @@ class Command(BaseCommand):
             fh.setFormatter(formatter)
             self.logger.addHandler(fh)
 
+        self.ledger = None
+        self.timer = None
+
     def write(self, message, level='info'):
         self.stdout.write(message)
         if level == 'info':
@@ -68,6 +60,11 @@ class Command(BaseCommand):
             help='Target report date to download in YYYY-MM-DD or DD-MM-YYYY format. If omitted, today is used.',
             required=False
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Download, extract and save even if the report was already processed.'
+        )
 
     def parse_date_string(self, date_str):
         """Parse incoming date string in common formats to a datetime.date."""
@@ -213,13 +210,15 @@ class Command(BaseCommand):
         self.write("🔍 Extracting tables from PDF...")
 
         try:
-            tables = read_pdf(
-                pdf_path,
-                pages='all',
-                multiple_tables=True,
-                pandas_options={'header': None},
-                lattice=True
-            )
+            with self.timer.stage(f'{STAGE_EXTRACT}:tabula') as stage:
+                tables = read_pdf(
+                    pdf_path,
+                    pages='all',
+                    multiple_tables=True,
+                    pandas_options={'header': None},
+                    lattice=True
+                )
+                stage['tables'] = len(tables or [])
         except Exception as e:
             raise CommandError(f"❌ Tabula extraction failed: {e}")
 
@@ -237,14 +236,16 @@ class Command(BaseCommand):
         combined_json_data = {}
 
         # Extract Table 2(A)
-        sub_2A = self.extract_subtable_by_markers(
-            all_content_df_cleaned,
-            start_marker=r".*2\s*\(A\)\s*State's\s*Load\s*Deails.*",
-            end_marker=r"2\s*\(B\)\s*State\s*Demand\s*Met\s*\(Peak\s*and\s*off-Peak\s*Hrs\)",
-            header_row_count=2,
-            debug_table_name="Table 2(A)"
-        )
+        with self.timer.stage(f'{STAGE_EXTRACT}:2A'):
+            sub_2A = self.extract_subtable_by_markers(
+                all_content_df_cleaned,
+                start_marker=r".*2\s*\(A\)\s*State's\s*Load\s*Deails.*",
+                end_marker=r"2\s*\(B\)\s*State\s*Demand\s*Met\s*\(Peak\s*and\s*off-Peak\s*Hrs\)",
+                header_row_count=2,
+                debug_table_name="Table 2(A)"
+            )
         if sub_2A is not None:
+            normalize_started = time.perf_counter()
             column_mapping_2A = {
                 'State': 'state',
                 'Thermal': 'thermal',
@@ -267,46 +268,55 @@ class Command(BaseCommand):
             combined_json_data['nrldc_table_2A'] = sub_2A_filtered.to_dict(orient='records')
             self.write(self.style.SUCCESS(f"✅ Table 2(A) extracted for combined JSON."))
 
+            rows_2A = []
             for index, row_data in sub_2A_filtered.iterrows():
+                rows_2A.append({
+                    'report_date': report_date,
+                    'state': self._safe_string(row_data.get('state')),
+                    'thermal': self._safe_float(row_data.get('thermal')),
+                    'hydro': self._safe_float(row_data.get('hydro')),
+                    'gas_naptha_diesel': self._safe_float(row_data.get('gas_naptha_diesel')),
+                    'solar': self._safe_float(row_data.get('solar')),
+                    'wind': self._safe_float(row_data.get('wind')),
+                    'other_biomass': self._safe_float(row_data.get('other_biomass')),
+                    'total': self._safe_float(row_data.get('total')),
+                    'drawal_sch': self._safe_float(row_data.get('drawal_sch')),
+                    'act_drawal': self._safe_float(row_data.get('act_drawal')),
+                    'ui': self._safe_float(row_data.get('ui')),
+                    'requirement': self._safe_float(row_data.get('requirement')),
+                    'shortage': self._safe_float(row_data.get('shortage')),
+                    'consumption': self._safe_float(row_data.get('consumption')),
+                })
+            self.timer.record(f'{STAGE_NORMALIZE}:2A', time.perf_counter() - normalize_started, rows=len(rows_2A))
+            try:
+                with self.timer.stage(f'{STAGE_DB_WRITE}:Nrldc2AData', rows=len(rows_2A)):
+                    inserted, updated, unchanged = bulk_upsert(Nrldc2AData, rows_2A, ('report_date', 'state'))
+                self.ledger.saved('Nrldc2AData', inserted, updated, unchanged)
+                self.write(self.style.SUCCESS(f"✅ Table 2(A) data saved to database: {inserted} created, {updated} updated, {unchanged} unchanged for {report_date}."))
+            except Exception as e:
+                self.ledger.failed('Nrldc2AData', e)
+                self.write(self.style.ERROR(f"❌ Error saving Table 2A rows to DB: {e}"), level='error')
+            else:
                 try:
-                    obj, created = Nrldc2AData.objects.update_or_create(
-                        report_date=report_date,
-                        state=self._safe_string(row_data.get('state')),
-                        defaults={
-                            'thermal': self._safe_float(row_data.get('thermal')),
-                            'hydro': self._safe_float(row_data.get('hydro')),
-                            'gas_naptha_diesel': self._safe_float(row_data.get('gas_naptha_diesel')),
-                            'solar': self._safe_float(row_data.get('solar')),
-                            'wind': self._safe_float(row_data.get('wind')),
-                            'other_biomass': self._safe_float(row_data.get('other_biomass')),
-                            'total': self._safe_float(row_data.get('total')),
-                            'drawal_sch': self._safe_float(row_data.get('drawal_sch')),
-                            'act_drawal': self._safe_float(row_data.get('act_drawal')),
-                            'ui': self._safe_float(row_data.get('ui')),
-                            'requirement': self._safe_float(row_data.get('requirement')),
-                            'shortage': self._safe_float(row_data.get('shortage')),
-                            'consumption': self._safe_float(row_data.get('consumption')),
-                        }
-                    )
-                    if created:
-                        self.write(self.style.SUCCESS(f"➕ Created Table 2A entry for {report_date} - {row_data.get('state')}"))
-                    else:
-                        self.write(self.style.SUCCESS(f"🔄 Updated Table 2A entry for {report_date} - {row_data.get('state')}"))
+                    with self.timer.stage(STAGE_AGGREGATES):
+                        days, months = refresh_aggregates(LEDGER_SOURCE, report_date)
+                    self.write(f"📊 Aggregates refreshed: {days} daily, {months} monthly rows")
                 except Exception as e:
-                    self.write(self.style.ERROR(f"❌ Error saving Table 2A row to DB (State: {row_data.get('state')}): {e}"), level='error')
-            self.write(self.style.SUCCESS(f"✅ Table 2(A) data saved to database."))
+                    self.write(self.style.WARNING(f"⚠️ Could not refresh aggregates: {e}"), level='warning')
         else:
             self.write(self.style.WARNING("⚠️ Table 2(A) not found or extraction failed."), level='warning')
 
         # Extract Table 2(C)
-        sub_2C = self.extract_subtable_by_markers(
-            all_content_df_cleaned,
-            start_marker=r"2\s*\(C\)\s*State's\s*Demand\s*Met\s*in\s*MWs.*",
-            end_marker=r"3\s*\(A\)\s*StateEntities\s*Generation:",
-            header_row_count=2,
-            debug_table_name="Table 2(C)"
-        )
+        with self.timer.stage(f'{STAGE_EXTRACT}:2C'):
+            sub_2C = self.extract_subtable_by_markers(
+                all_content_df_cleaned,
+                start_marker=r"2\s*\(C\)\s*State's\s*Demand\s*Met\s*in\s*MWs.*",
+                end_marker=r"3\s*\(A\)\s*StateEntities\s*Generation:",
+                header_row_count=2,
+                debug_table_name="Table 2(C)"
+            )
         if sub_2C is not None:
+            normalize_started = time.perf_counter()
             column_mapping_2C = {
                 'State': 'state',
                 'Maximum Demand Met of the day': 'max_demand',
@@ -331,35 +341,35 @@ class Command(BaseCommand):
             combined_json_data['nrldc_table_2C'] = sub_2C_filtered.to_dict(orient='records')
             self.write(self.style.SUCCESS(f"✅ Table 2(C) extracted for combined JSON."))
 
+            rows_2C = []
             for index, row_data in sub_2C_filtered.iterrows():
-                try:
-                    obj, created = Nrldc2CData.objects.update_or_create(
-                        report_date=report_date,
-                        state=self._safe_string(row_data.get('state')),
-                        defaults={
-                            'max_demand': self._safe_float(row_data.get('max_demand')),
-                            'time_max': self._safe_string(row_data.get('time_max')),
-                            'shortage_during': self._safe_float(row_data.get('shortage_during')),
-                            'req_max_demand': self._safe_float(row_data.get('req_max_demand')),
-                            'max_req_day': self._safe_float(row_data.get('max_req_day')),
-                            'time_max_req': self._safe_string(row_data.get('time_max_req')),
-                            'shortage_max_req': self._safe_float(row_data.get('shortage_max_req')),
-                            'demand_met_max_req': self._safe_float(row_data.get('demand_met_max_req')),
-                            'min_demand_met': self._safe_float(row_data.get('min_demand_met')),
-                            'time_min_demand': self._safe_string(row_data.get('time_min_demand')),
-                            'ace_max': self._safe_float(row_data.get('ace_max')),
-                            'ace_min': self._safe_float(row_data.get('ace_min')),
-                            'time_ace_max': self._safe_string(row_data.get('time_ace_max')),
-                            'time_ace_min': self._safe_string(row_data.get('time_ace_min')),
-                        }
-                    )
-                    if created:
-                        self.write(self.style.SUCCESS(f"➕ Created Table 2C entry for {report_date} - {row_data.get('state')}"))
-                    else:
-                        self.write(self.style.SUCCESS(f"🔄 Updated Table 2C entry for {report_date} - {row_data.get('state')}"))
-                except Exception as e:
-                    self.write(self.style.ERROR(f"❌ Error saving Table 2C row to DB (State: {self._safe_string(row_data.get('state'))}): {e}"), level='error')
-            self.write(self.style.SUCCESS(f"✅ Table 2(C) data saved to database."))
+                rows_2C.append({
+                    'report_date': report_date,
+                    'state': self._safe_string(row_data.get('state')),
+                    'max_demand': self._safe_float(row_data.get('max_demand')),
+                    'time_max': self._safe_string(row_data.get('time_max')),
+                    'shortage_during': self._safe_float(row_data.get('shortage_during')),
+                    'req_max_demand': self._safe_float(row_data.get('req_max_demand')),
+                    'max_req_day': self._safe_float(row_data.get('max_req_day')),
+                    'time_max_req': self._safe_string(row_data.get('time_max_req')),
+                    'shortage_max_req': self._safe_float(row_data.get('shortage_max_req')),
+                    'demand_met_max_req': self._safe_float(row_data.get('demand_met_max_req')),
+                    'min_demand_met': self._safe_float(row_data.get('min_demand_met')),
+                    'time_min_demand': self._safe_string(row_data.get('time_min_demand')),
+                    'ace_max': self._safe_float(row_data.get('ace_max')),
+                    'ace_min': self._safe_float(row_data.get('ace_min')),
+                    'time_ace_max': self._safe_string(row_data.get('time_ace_max')),
+                    'time_ace_min': self._safe_string(row_data.get('time_ace_min')),
+                })
+            self.timer.record(f'{STAGE_NORMALIZE}:2C', time.perf_counter() - normalize_started, rows=len(rows_2C))
+            try:
+                with self.timer.stage(f'{STAGE_DB_WRITE}:Nrldc2CData', rows=len(rows_2C)):
+                    inserted, updated, unchanged = bulk_upsert(Nrldc2CData, rows_2C, ('report_date', 'state'))
+                self.ledger.saved('Nrldc2CData', inserted, updated, unchanged)
+                self.write(self.style.SUCCESS(f"✅ Table 2(C) data saved to database: {inserted} created, {updated} updated, {unchanged} unchanged for {report_date}."))
+            except Exception as e:
+                self.ledger.failed('Nrldc2CData', e)
+                self.write(self.style.ERROR(f"❌ Error saving Table 2C rows to DB: {e}"), level='error')
         else:
             self.write(self.style.WARNING("⚠️ Table 2(C) not found or extraction failed."), level='warning')
 
@@ -372,99 +382,116 @@ class Command(BaseCommand):
                 json_name = f"nrldc_{datetime.datetime.now().strftime('%d%m%Y')}.json"
 
             json_path = os.path.join(output_dir, json_name)
-            with open(json_path, 'w', encoding='utf-8') as f:
+            with self.timer.stage(STAGE_JSON_WRITE), open(json_path, 'w', encoding='utf-8') as f:
                 json.dump(combined_json_data, f, indent=4, ensure_ascii=False)
             self.stdout.write(self.style.SUCCESS(f"✅ Combined tables saved to: {json_path}"))
         else:
             self.write(self.style.WARNING("⚠️ No tables were successfully extracted to create a combined JSON file."), level='warning')
 
     def handle(self, *args, **options):
-        # If dashboard passes --date, parse and use it. Otherwise, use today.
-        raw_date = options.get('date')
-        try:
-            target_date = self.parse_date_string(raw_date) if raw_date else datetime.date.today()-datetime.timedelta(days=1)
-        except ValueError as e:
-            raise CommandError(str(e))
-
-        # Logging what date we will process
-        self.write(self.style.SUCCESS(f"🔔 Requested report date: {target_date}"), level='info')
-
-        project_name = "NRLDC"
-        today_str_for_query = target_date.strftime("%Y-%m-%d")
-
-        # If data already exists for requested date, skip.
-        if Nrldc2AData.objects.filter(report_date=target_date).exists() or \
-           Nrldc2CData.objects.filter(report_date=target_date).exists():
-            self.write(self.style.SUCCESS(f"✅ Pass: Report data for {today_str_for_query} already exists in the database. Skipping download and extraction."))
-            return
-
-        # Build the metadata URL using the target date
-        url = f"https://nrldc.in/get-documents-list/111?start_date={today_str_for_query}&end_date={today_str_for_query}"
-        headers = {
-            "User-Agent": "Mozilla/5.0",
-            "Accept": "application/json",
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": "https://nrldc.in/reports/daily-psp",
-        }
-
-        session = requests.Session()
-        session.mount('https://', LegacySSLAdapter())
-
-        self.write(f"🌐 Fetching NRDC report metadata for {today_str_for_query}...")
+        self.timer = StageTimer(LEDGER_SOURCE)
+        target_date = None
+        run_status = IngestionLedger.STATUS_FAILED
         try:
-            response = session.get(url, headers=headers)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            raise CommandError(f"❌ Error fetching NRDC metadata: {e}")
+            # If dashboard passes --date, parse and use it. Otherwise, use today.
+            raw_date = options.get('date')
+            try:
+                target_date = self.parse_date_string(raw_date) if raw_date else datetime.date.today()-datetime.timedelta(days=1)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            # Logging what date we will process
+            self.write(self.style.SUCCESS(f"🔔 Requested report date: {target_date}"), level='info')
+
+            project_name = "NRLDC"
+            today_str_for_query = target_date.strftime("%Y-%m-%d")
+
+            # Build the metadata URL using the target date
+            url = f"https://nrldc.in/get-documents-list/111?start_date={today_str_for_query}&end_date={today_str_for_query}"
+            headers = {
+                "User-Agent": "Mozilla/5.0",
+                "Accept": "application/json",
+                "X-Requested-With": "XMLHttpRequest",
+                "Referer": "https://nrldc.in/reports/daily-psp",
+            }
 
-        try:
-            data = response.json()
-        except Exception as e:
-            raise CommandError(f"❌ Failed to parse JSON response: {e}")
+            self.write(f"🌐 Fetching NRDC report metadata for {today_str_for_query}...")
+            try:
+                with self.timer.stage(STAGE_METADATA):
+                    response = http.get(url, headers=headers)
+                    response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                raise CommandError(f"❌ Error fetching NRDC metadata: {e}")
 
-        if data.get("recordsFiltered", 0) == 0:
-            self.write(self.style.WARNING(f"⚠️ No report available for {today_str_for_query}. This might be due to weekends, holidays, or late publishing."), level='warning')
-            return
+            try:
+                data = response.json()
+            except Exception as e:
+                raise CommandError(f"❌ Failed to parse JSON response: {e}")
 
-        file_info = data["data"][0]
-        file_name = file_info["file_name"]
-        title = file_info.get("title", file_name)
+            if data.get("recordsFiltered", 0) == 0:
+                self.write(self.style.WARNING(f"⚠️ No report available for {today_str_for_query}. This might be due to weekends, holidays, or late publishing."), level='warning')
+                run_status = STATUS_SKIPPED
+                return
 
-        # Compose download_url
-        download_url = f"https://nrldc.in/download-file?any=Reports%2FDaily%2FDaily%20PSP%20Report%2F{file_name}"
+            file_info = data["data"][0]
+            file_name = file_info["file_name"]
+            title = file_info.get("title", file_name)
 
-        # ------------------- CHANGE: Build output_dir using target_date -------------------
-        # Use the requested report date in the folder name, and keep a time suffix to avoid collisions.
-        date_part = target_date.strftime('%Y-%m-%d')
-        time_part = datetime.datetime.now().strftime('%H-%M-%S')
-        output_dir = os.path.join("downloads", project_name, f"report_{date_part}_{time_part}")
-        os.makedirs(output_dir, exist_ok=True)
-        self.write(f"📁 Created output directory: {output_dir}")
-        # -------------------------------------------------------------------------------
+            # Compose download_url
+            download_url = f"https://nrldc.in/download-file?any=Reports%2FDaily%2FDaily%20PSP%20Report%2F{file_name}"
 
-        # Save to a temporary name, then rename to match requested target_date
-        pdf_path = os.path.join(output_dir, f"{title}.pdf")
-        self.write(f"⬇️ Attempting to download PDF to: {pdf_path}")
+            # ------------------- CHANGE: Build output_dir using target_date -------------------
+            # Use the requested report date in the folder name, and keep a time suffix to avoid collisions.
+            date_part = target_date.strftime('%Y-%m-%d')
+            time_part = datetime.datetime.now().strftime('%H-%M-%S')
+            output_dir = os.path.join("downloads", project_name, f"report_{date_part}_{time_part}")
+            os.makedirs(output_dir, exist_ok=True)
+            self.write(f"📁 Created output directory: {output_dir}")
+            # -------------------------------------------------------------------------------
 
-        try:
-            pdf_response = session.get(download_url, headers=headers, timeout=60)
-            pdf_response.raise_for_status()
-            with open(pdf_path, "wb") as f:
-                f.write(pdf_response.content)
+            # Save to a temporary name, then rename to match requested target_date
+            pdf_path = os.path.join(output_dir, f"{title}.pdf")
+            self.write(f"⬇️ Attempting to download PDF to: {pdf_path}")
 
-            # Rename the downloaded PDF to match the target_date
             try:
-                new_pdf_name = f"nrldc_{target_date.strftime('%d%m%Y')}.pdf"
-                new_pdf_path = os.path.join(output_dir, new_pdf_name)
-                os.rename(pdf_path, new_pdf_path)
-                pdf_path = new_pdf_path  # keep using same variable name afterwards
+                with self.timer.stage(STAGE_DOWNLOAD) as stage:
+                    cached_pdf = fetch_pdf(download_url, pdf_path, headers=headers, timeout=60)
+                    stage['bytes'] = os.path.getsize(pdf_path)
+                    stage['not_modified'] = cached_pdf.not_modified
+
+                # Rename the downloaded PDF to match the target_date
+                try:
+                    new_pdf_name = f"nrldc_{target_date.strftime('%d%m%Y')}.pdf"
+                    new_pdf_path = os.path.join(output_dir, new_pdf_name)
+                    os.rename(pdf_path, new_pdf_path)
+                    pdf_path = new_pdf_path  # keep using same variable name afterwards
+                except Exception as e:
+                    # If rename fails, log a warning but continue (pdf_path remains original)
+                    self.write(self.style.WARNING(f"⚠️ Failed to rename PDF file: {e}"), level='warning')
+
+                self.write(self.style.SUCCESS(f"✅ Downloaded report to: {pdf_path}"))
             except Exception as e:
-                # If rename fails, log a warning but continue (pdf_path remains original)
-                self.write(self.style.WARNING(f"⚠️ Failed to rename PDF file: {e}"), level='warning')
+                raise CommandError(f"❌ Failed to download PDF: {e}")
 
-            self.write(self.style.SUCCESS(f"✅ Downloaded report to: {pdf_path}"))
-        except Exception as e:
-            raise CommandError(f"❌ Failed to download PDF: {e}")
+            # The ledger replaces the old "rows already exist" check, so a re-published
+            # report for the same date is picked up and diffed instead of ignored.
+            if not options.get('force') and is_unchanged(LEDGER_SOURCE, target_date, cached_pdf.sha256, EXTRACTOR_VERSION):
+                self.write(self.style.SUCCESS(f"✅ Pass: Report for {today_str_for_query} unchanged since last successful ingest (sha256 {cached_pdf.sha256[:12]}). Skipping extraction and DB writes."))
+                run_status = STATUS_SKIPPED
+                return
 
-        # Pass target_date (a datetime.date) to extract_tables_from_pdf so JSON/DB use same date
-        self.extract_tables_from_pdf(pdf_path, output_dir, target_date)
+            self.ledger = LedgerRun(LEDGER_SOURCE, target_date, cached_pdf.sha256, EXTRACTOR_VERSION,
+                                    ['Nrldc2AData', 'Nrldc2CData'])
+            try:
+                # Pass target_date (a datetime.date) to extract_tables_from_pdf so JSON/DB use same date
+                self.extract_tables_from_pdf(pdf_path, output_dir, target_date)
+            except CommandError as e:
+                self.ledger.failed('extraction', e)
+                raise
+            finally:
+                entry = self.ledger.finish()
+                run_status = entry.status
+                self.write(f"📒 Ledger: {entry} {entry.row_counts}")
+        finally:
+            self.timer.finish(target_date, run_status)
+            self.write(f"⏱️ Timings: {self.timer.summary()} (total {self.timer.total_seconds:.2f}s)")
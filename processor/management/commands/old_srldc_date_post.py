@@ -6,22 +6,30 @@ write JSON snapshot and save to DB (SRLDC3BData).
 
 Drop this file into your app's management/commands/ directory and run like:
 python manage.py srl_extract --date 2016-01-02 --debug
+
+Backfill a range in parallel (resumes from srl_on_json/backfill_checkpoint.json):
+python manage.py old_srldc_date_post --start 2016-01-01 --end 2025-12-31 --workers 4
 """
 import os
 import re
 import json
 import datetime
 import traceback
-import requests
-import pdfplumber
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime as _dt, timedelta
 from decimal import Decimal, InvalidOperation
 
+import django
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from django.db import transaction
+from django.db import connections, transaction
 
 from processor.models import SRLDC3BData  # adjust if model path differs
+from processor.download_cache import fetch_pdf
+from processor.ledger import LedgerRun, is_unchanged
+from processor.parsed_report import ParsedReport
+from processor.upsert import bulk_upsert
 
 
 # ----------------------------------------------------------------------
@@ -147,7 +155,7 @@ def _try_parse_datetime_tokens(date_tok, time_tok):
 # ----------------------------------------------------------------------
 # --- OLD-PATTERN date extraction (returns both left/right) - unchanged
 # ----------------------------------------------------------------------
-def extract_report_dates_old(pdf_path):
+def extract_report_dates_old(report):
     res = {
         "report_date_for": None,
         "report_date_of_reporting": None,
@@ -156,13 +164,8 @@ def extract_report_dates_old(pdf_path):
         "reporting_datetime": None
     }
 
-    with pdfplumber.open(pdf_path) as pdf:
-        first_page = pdf.pages[0]
-        page_text = first_page.extract_text() or ""
-        try:
-            page_words = first_page.extract_words(use_text_flow=True)
-        except Exception:
-            page_words = first_page.extract_words() if hasattr(first_page, "extract_words") else []
+    page_text = report.text(0)
+    page_words = report.words(0)
 
     txt = page_text
 
@@ -285,7 +288,7 @@ def extract_report_dates_old(pdf_path):
 # ----------------------------------------------------------------------
 # --- NEW-PATTERN date extraction (returns both left/right)
 # ----------------------------------------------------------------------
-def extract_report_dates_new(pdf_path):
+def extract_report_dates_new(report):
     res = {
         "report_date_for": None,
         "report_date_of_reporting": None,
@@ -294,13 +297,8 @@ def extract_report_dates_new(pdf_path):
         "reporting_datetime": None
     }
 
-    with pdfplumber.open(pdf_path) as pdf:
-        first_page = pdf.pages[0]
-        page_text = first_page.extract_text() or ""
-        try:
-            page_words = first_page.extract_words(use_text_flow=True)
-        except Exception:
-            page_words = first_page.extract_words() if hasattr(first_page, "extract_words") else []
+    page_text = report.text(0)
+    page_words = report.words(0)
 
     txt = page_text
 
@@ -394,115 +392,111 @@ def extract_report_dates_new(pdf_path):
 # ----------------------------------------------------------------------
 # Entrypoint wrapper: try OLD first, if it returns nothing then try NEW
 # ----------------------------------------------------------------------
-def extract_report_dates(pdf_path):
-    old_res = extract_report_dates_old(pdf_path)
+def extract_report_dates(report):
+    old_res = extract_report_dates_old(report)
     if old_res.get("report_date_for") or old_res.get("report_date_of_reporting"):
         return old_res
-    new_res = extract_report_dates_new(pdf_path)
+    new_res = extract_report_dates_new(report)
     return new_res
 
 
 # ----------------------------------------------------------------------
 # Logic for OLD PATTERN (Strict Regex Markers)
 # ----------------------------------------------------------------------
-def extract_two_tables(pdf_path, report_info):
+def extract_two_tables(report, report_info):
     tables_dict = {"report_date": report_info.get('report_date'),
                    "reporting_datetime": report_info.get('reporting_datetime'),
                    "central_sector": [], "joint_venture": []}
     current_table = None
     finished = False
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for pno, page in enumerate(pdf.pages, start=1):
-            tables = page.extract_tables() or []
-            for t_idx, table in enumerate(tables, start=1):
-                rows = [[clean_cell(c) for c in r] for r in table]
-                if not rows:
-                    continue
-                maxcols = max(len(r) for r in rows)
-                rows = [r + [""] * (maxcols - len(r)) for r in rows]
+    for pno in range(1, report.page_count + 1):
+        tables = report.extract_tables(pno - 1)
+        for t_idx, table in enumerate(tables, start=1):
+            rows = [[clean_cell(c) for c in r] for r in table]
+            if not rows:
+                continue
+            maxcols = max(len(r) for r in rows)
+            rows = [r + [""] * (maxcols - len(r)) for r in rows]
 
-                for r in rows:
-                    first = first_cell_text(r)
-                    if not current_table and is_start_row(first):
-                        current_table = "central_sector"
-                        continue
-                    if current_table != "joint_venture" and is_jv_row(first):
-                        current_table = "joint_venture"
-                        continue
-                    if not current_table:
-                        continue
-                    if is_end_row(first):
-                        tables_dict[current_table].append((pno, t_idx, r))
-                        finished = True
-                        break
+            for r in rows:
+                first = first_cell_text(r)
+                if not current_table and is_start_row(first):
+                    current_table = "central_sector"
+                    continue
+                if current_table != "joint_venture" and is_jv_row(first):
+                    current_table = "joint_venture"
+                    continue
+                if not current_table:
+                    continue
+                if is_end_row(first):
                     tables_dict[current_table].append((pno, t_idx, r))
-                if finished:
-                    return tables_dict
+                    finished = True
+                    break
+                tables_dict[current_table].append((pno, t_idx, r))
+            if finished:
+                return tables_dict
     return tables_dict
 
 
 # ----------------------------------------------------------------------
 # Logic for NEW PATTERN (Internal State Machine)
 # ----------------------------------------------------------------------
-def extract_tables_new_pattern(pdf_path):
+def extract_tables_new_pattern(report):
     tables_dict = {"central_sector": [], "joint_venture": []}
     is_capturing = False
     current_section = "central_sector"
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for pno, page in enumerate(pdf.pages, start=1):
-            if pno < 2:
+    for pno in range(2, report.page_count + 1):
+        tables = report.extract_tables(pno - 1)
+        for t_idx, table in enumerate(tables, start=1):
+            rows = [[clean_cell(c) for c in r] for r in table]
+            if not rows:
                 continue
-            tables = page.extract_tables() or []
-            for t_idx, table in enumerate(tables, start=1):
-                rows = [[clean_cell(c) for c in r] for r in table]
-                if not rows:
+            maxcols = max(len(r) for r in rows)
+            rows = [r + [""] * (maxcols - len(r)) for r in rows]
+            for r in rows:
+                row_text_full = " ".join(r).upper()
+                row_text_nospace_upper = row_text_full.replace(" ", "").upper()
+                first_col = clean_cell(r[0]).upper()
+                first_col_nospace = clean_cell(r[0]).replace(" ", "").upper()
+
+                # Start triggers
+                if "REGIONAL" in row_text_full and "ENTITIES" in row_text_full and "GENERATION" in row_text_full:
+                    is_capturing = True
+                    current_section = "central_sector"
                     continue
-                maxcols = max(len(r) for r in rows)
-                rows = [r + [""] * (maxcols - len(r)) for r in rows]
-                for r in rows:
-                    row_text_full = " ".join(r).upper()
-                    row_text_nospace_upper = row_text_full.replace(" ", "").upper()
-                    first_col = clean_cell(r[0]).upper()
-                    first_col_nospace = clean_cell(r[0]).replace(" ", "").upper()
-
-                    # Start triggers
-                    if "REGIONAL" in row_text_full and "ENTITIES" in row_text_full and "GENERATION" in row_text_full:
-                        is_capturing = True
-                        current_section = "central_sector"
-                        continue
-                    if first_col == "ISGS":
-                        is_capturing = True
-                        current_section = "central_sector"
+                if first_col == "ISGS":
+                    is_capturing = True
+                    current_section = "central_sector"
+                    continue
+
+                # Switch triggers
+                if "JOINT VENTURE" in row_text_full or "JOINT_VENTURE" in row_text_full or (
+                        "JOINT" in row_text_full and "VENTURE" in row_text_full):
+                    is_capturing = True
+                    current_section = "joint_venture"
+                    other_cells = [clean_cell(c).strip() for c in r[1:]]
+                    if all(not oc for oc in other_cells):
                         continue
 
-                    # Switch triggers
-                    if "JOINT VENTURE" in row_text_full or "JOINT_VENTURE" in row_text_full or (
-                            "JOINT" in row_text_full and "VENTURE" in row_text_full):
-                        is_capturing = True
-                        current_section = "joint_venture"
-                        other_cells = [clean_cell(c).strip() for c in r[1:]]
-                        if all(not oc for oc in other_cells):
-                            continue
+                # Stop
+                if "IPPUNDEROPENACCESS" in row_text_nospace_upper:
+                    is_capturing = False
+                    continue
 
-                    # Stop
-                    if "IPPUNDEROPENACCESS" in row_text_nospace_upper:
-                        is_capturing = False
+                # Data capture
+                if is_capturing:
+                    if "STATION" in row_text_full and "CAPACITY" in row_text_full:
                         continue
-
-                    # Data capture
-                    if is_capturing:
-                        if "STATION" in row_text_full and "CAPACITY" in row_text_full:
-                            continue
-                        if "INST." in row_text_full and "CAPACITY" in row_text_full:
+                    if "INST." in row_text_full and "CAPACITY" in row_text_full:
+                        continue
+                    if first_col_nospace in ("JOINTVENTURE", "JOINT_VENTURE", "JOINTVENTURE:"):
+                        other_cells = [clean_cell(c).strip() for c in r[1:]]
+                        if all(not oc for oc in other_cells):
                             continue
-                        if first_col_nospace in ("JOINTVENTURE", "JOINT_VENTURE", "JOINTVENTURE:"):
-                            other_cells = [clean_cell(c).strip() for c in r[1:]]
-                            if all(not oc for oc in other_cells):
-                                continue
-                        if looks_like_station_text(r[0]):
-                            tables_dict[current_section].append((pno, t_idx, r))
+                    if looks_like_station_text(r[0]):
+                        tables_dict[current_section].append((pno, t_idx, r))
 
     return tables_dict
 
@@ -558,18 +552,17 @@ def detect_table_pattern(tables_dict):
     return "UNKNOWN"
 
 
-def dump_raw_tables(pdf_path, out_folder):
+def dump_raw_tables(report, out_folder):
     os.makedirs(out_folder, exist_ok=True)
-    with pdfplumber.open(pdf_path) as pdf:
-        for pno, page in enumerate(pdf.pages, start=1):
-            tables = page.extract_tables() or []
-            js = []
-            for t in tables:
-                rows = [[clean_cell(c) for c in r] for r in t]
-                js.append(rows)
-            fname = os.path.join(out_folder, f"raw_page_{pno:03d}.json")
-            with open(fname, "w", encoding="utf-8") as f:
-                json.dump(js, f, indent=2, ensure_ascii=False)
+    for pno in range(1, report.page_count + 1):
+        tables = report.extract_tables(pno - 1)
+        js = []
+        for t in tables:
+            rows = [[clean_cell(c) for c in r] for r in t]
+            js.append(rows)
+        fname = os.path.join(out_folder, f"raw_page_{pno:03d}.json")
+        with open(fname, "w", encoding="utf-8") as f:
+            json.dump(js, f, indent=2, ensure_ascii=False)
 
 
 def null_if_empty(v):
@@ -790,6 +783,98 @@ def normalize_rows_for_table_old(rows_with_meta, report_info=None):
     return recs
 
 
+# ----------------------------------------------------------------------
+# ----------------------- DOWNLOAD / PARSE / RESUME --------------------
+# ----------------------------------------------------------------------
+MAX_DOWNLOAD_WORKERS = 8
+
+LEDGER_SOURCE = "SRLDC_3B"
+# Bump when the Central Sector / JV extraction logic changes so already-ingested PDFs are re-parsed.
+EXTRACTOR_VERSION = "1"
+
+
+def make_download_folder(out_dir, date_obj):
+    """The folder the JSON outputs for date_obj go to; one per report date, reused across runs."""
+    folder = os.path.join(out_dir, date_obj.strftime('%Y%m%d'))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def download_pdf(date_obj):
+    """
+    Fetch the PSP PDF for date_obj through processor.download_cache and
+    return its CachedPdf. The path is the shared cached copy: read it, do
+    not modify it. Download threads share processor.http's pooled session
+    for the host.
+    """
+    return fetch_pdf(build_srl_url(date_obj), verify=False, timeout=60)
+
+
+def parse_report_pdf(pdf_path):
+    """
+    Parse one PSP PDF into normalized Central Sector / JV rows.
+
+    Pure CPU work with no DB access, so it can run in a worker process.
+    Returns a picklable dict: report_info, pattern, central, joint_venture.
+    """
+    # One ParsedReport serves the date scan and both table scans,
+    # so each page is parsed once per PDF.
+    with ParsedReport(pdf_path) as report:
+        report_info = extract_report_dates(report)
+        # --- Extract both OLD and NEW candidates ---
+        old_tables = extract_two_tables(report, report_info)
+        new_tables = extract_tables_new_pattern(report)
+
+    # Detect pattern
+    detected_pattern = detect_table_pattern(old_tables)
+    if detected_pattern == "UNKNOWN":
+        detected_pattern = detect_table_pattern(new_tables)
+
+    # Default to finding tables in OLD logic first, then NEW logic
+    tables = old_tables
+    if not tables.get("central_sector") and new_tables.get("central_sector"):
+        tables = new_tables
+
+    if detected_pattern == "NEW":
+        # Make sure we are using the tables extracted via NEW logic if available
+        if new_tables.get("central_sector"):
+            tables = new_tables
+        central = normalize_rows_for_table_new(tables.get("central_sector", []), report_info)
+        jv = normalize_rows_for_table_new(tables.get("joint_venture", []), report_info)
+    else:
+        # Default to OLD pattern if detected is OLD or UNKNOWN (fallback)
+        central = normalize_rows_for_table_old(tables.get("central_sector", []), report_info)
+        jv = normalize_rows_for_table_old(tables.get("joint_venture", []), report_info)
+
+    return {
+        "report_info": report_info,
+        "pattern": detected_pattern,
+        "central": central or [],
+        "joint_venture": jv or [],
+    }
+
+
+def load_checkpoint(path):
+    """Return the set of ISO dates already saved by a previous run."""
+    if not os.path.exists(path):
+        return set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return set(json.load(f).get("completed", []))
+    except (OSError, ValueError):
+        return set()
+
+
+def save_checkpoint(path, done):
+    if not path:
+        return
+    # Write-then-rename so a crash mid-write never leaves a truncated checkpoint.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"completed": sorted(done)}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
 # ----------------------------------------------------------------------
 # ------------------------- MAIN COMMAND -------------------------------
 # ----------------------------------------------------------------------
@@ -801,6 +886,12 @@ class Command(BaseCommand):
         parser.add_argument("--start", help="Start date YYYY-MM-DD")
         parser.add_argument("--end", help="End date YYYY-MM-DD")
         parser.add_argument("--debug", action="store_true", help="Dump raw tables and extra debug files")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Parse worker processes; >1 enables parallel backfill")
+        parser.add_argument("--checkpoint", help="Checkpoint file (default srl_on_json/backfill_checkpoint.json)")
+        parser.add_argument("--no-resume", action="store_true", help="Ignore the checkpoint and redo every date")
+        parser.add_argument("--force", action="store_true",
+                            help="Re-extract and save even if the ledger shows the PDF was already ingested")
 
     def log(self, msg, level="info"):
         ts = _dt.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -837,159 +928,240 @@ class Command(BaseCommand):
         OUT_DIR = os.path.join(settings.BASE_DIR, "srl_on_json")
         os.makedirs(OUT_DIR, exist_ok=True)
 
-        for d in dates:
-            try:
-                timestamp = _dt.now().strftime("%Y%m%d_%H%M%S")
-                folder_name = f"{d.strftime('%Y%m%d')}_{timestamp}"
-                download_folder = os.path.join(OUT_DIR, folder_name)
-                os.makedirs(download_folder, exist_ok=True)
-
-                url = build_srl_url(d)
-                self.log("\n==============================", "info")
-                self.log(f"Processing Date: {d}", "info")
-                self.log("==============================", "info")
-
-                # ---------------- DOWNLOAD -----------------
-                self.log(f"[1] Downloading PDF from: {url}", "info")
-                pdf_filename = f"{d.strftime('%d-%m-%Y')}.pdf"
-                pdf_path = os.path.join(download_folder, pdf_filename)
-
+        workers = options.get("workers") or 1
+        if workers < 1:
+            raise CommandError("--workers must be >= 1")
+
+        # ---------------- CHECKPOINT ----------------
+        # Only range runs checkpoint; an explicit --date is always reprocessed.
+        checkpoint_path = None
+        if not options.get("date"):
+            checkpoint_path = options.get("checkpoint") or os.path.join(OUT_DIR, "backfill_checkpoint.json")
+        done = set()
+        if checkpoint_path and not options.get("no_resume"):
+            done = load_checkpoint(checkpoint_path)
+        pending = [d for d in dates if d.isoformat() not in done]
+        if len(pending) < len(dates):
+            self.log(f"Resuming from {checkpoint_path}: skipping {len(dates) - len(pending)} completed date(s)", "info")
+
+        self.force = options.get("force")
+
+        if workers == 1:
+            for d in pending:
                 try:
-                    resp = requests.get(url, verify=False, timeout=60)
-                except Exception as e:
-                    self.log(f"Download error for date {d}: {e}", "error")
-                    raise
-
-                if resp.status_code != 200:
-                    self.log(f"Failed download for date {d} (status {resp.status_code})", "error")
-                    raise Exception(f"HTTP {resp.status_code}")
-
-                with open(pdf_path, "wb") as f:
-                    f.write(resp.content)
-
-                self.log(f"PDF saved: {pdf_path}", "success")
-
-                # ---------------- EXTRACT ----------------
-                self.log("[2] Extracting report dates...", "info")
-                report_info = extract_report_dates(pdf_path)
-                self.log(f"Report DATE found: {report_info.get('report_date')}", "info")
-                self.log(f"Reporting DATETIME found: {report_info.get('reporting_datetime')}", "info")
-
-                # --- Extract both OLD and NEW candidates ---
-                self.log("[3] Extracting tables (OLD and NEW candidates)...", "info")
-                old_tables = extract_two_tables(pdf_path, report_info)
-                new_tables = extract_tables_new_pattern(pdf_path)
-
-                # Detect pattern
-                detected_pattern = detect_table_pattern(old_tables)
-                if detected_pattern == "UNKNOWN":
-                    detected_pattern = detect_table_pattern(new_tables)
-
-                # Default to finding tables in OLD logic first, then NEW logic
-                tables = old_tables
-                if not tables.get("central_sector") and new_tables.get("central_sector"):
-                    tables = new_tables
-
-                self.log(f"Detected Pattern: {detected_pattern}", "info")
-
-                central = []
-                jv = []
-
-                if detected_pattern == "NEW":
-                    self.log("Using NEW pattern normalizer.", "info")
-                    # Make sure we are using the tables extracted via NEW logic if available
-                    if new_tables.get("central_sector"):
-                        tables = new_tables
-
-                    central = normalize_rows_for_table_new(tables.get("central_sector", []), report_info)
-                    jv = normalize_rows_for_table_new(tables.get("joint_venture", []), report_info)
-
-                else:
-                    # Default to OLD pattern if detected is OLD or UNKNOWN (fallback)
-                    self.log("Using OLD pattern normalizer.", "info")
-                    central = normalize_rows_for_table_old(tables.get("central_sector", []), report_info)
-                    jv = normalize_rows_for_table_old(tables.get("joint_venture", []), report_info)
-
-                combined = (central or []) + (jv or [])
-
-                self.log(f"Central Sector Rows: {len(central)}", "info")
-                self.log(f"Joint Venture Rows: {len(jv)}", "info")
-                self.log(f"TOTAL Extracted Rows: {len(combined)}", "success")
-
-                # ---------------- JSON SNAPSHOT ----------------
-                fname = f"{d.strftime('%Y%m%d')}.json"
-                json_path = os.path.join(download_folder, fname)
-                try:
-                    snapshot = {
-                        "report_date": report_info.get("report_date"),
-                        "reporting_datetime": report_info.get("reporting_datetime"),
-                        "central_sector": central,
-                        "joint_venture": jv
-                    }
-                    with open(json_path, "w", encoding="utf-8") as jf:
-                        json.dump(snapshot, jf, indent=2, ensure_ascii=False)
-
-                    size = os.path.getsize(json_path)
-                    self.log(f"JSON saved: {json_path} ({size} bytes)", "success")
+                    self.log("\n==============================", "info")
+                    self.log(f"Processing Date: {d}", "info")
+                    self.log("==============================", "info")
+
+                    self.log(f"[1] Downloading PDF from: {build_srl_url(d)}", "info")
+                    cached_pdf = download_pdf(d)
+                    pdf_path, pdf_sha256 = cached_pdf.path, cached_pdf.sha256
+                    download_folder = make_download_folder(OUT_DIR, d)
+                    self.log(f"PDF saved: {pdf_path}", "success")
+
+                    if not self.already_ingested(d, pdf_sha256):
+                        self.log("[2] Extracting report dates and tables...", "info")
+                        parsed = parse_report_pdf(pdf_path)
+                        if not self.save_report(d, download_folder, parsed, pdf_sha256):
+                            continue
+                    done.add(d.isoformat())
+                    save_checkpoint(checkpoint_path, done)
 
                 except Exception as e:
-                    self.log(f"JSON write error for date {d}: {e}", "error")
-                    raise
+                    tb = traceback.format_exc()
+                    self.log(f"PROCESS FAILED for date {d}: {e}", "error")
+                    self.log(tb, "error")
+                    continue
+        else:
+            self.run_backfill(pending, workers, OUT_DIR, checkpoint_path, done)
+
+        self.log("All dates processed.", "success")
+
+    def run_backfill(self, dates, workers, out_dir, checkpoint_path, done):
+        """
+        Parallel date-range backfill.
+
+        Downloads run on a bounded thread pool (network bound), pdfplumber
+        parsing runs on a process pool of ``workers`` processes (CPU bound),
+        and every result is written to the DB from this thread only, so there
+        is a single DB writer. Each saved date is checkpointed immediately.
+        At most ``workers * 2`` dates are between download and save at any
+        time: the next download starts as a date leaves the window, so the
+        downloads never run ahead of parsing and saving.
+        """
+        download_workers = min(workers * 2, MAX_DOWNLOAD_WORKERS)
+        window = workers * 2
+        self.log(f"Backfill: {len(dates)} date(s), {workers} parse worker(s), "
+                 f"{download_workers} download worker(s)", "info")
+
+        # Parse workers never touch the DB; start them clean with "spawn" so
+        # they don't inherit this process's DB connection or download threads.
+        connections.close_all()
+        parse_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        )
+        download_pool = ThreadPoolExecutor(max_workers=download_workers)
 
-                # ---------------- SAVE TO DATABASE -------------
-                self.log("[4] Saving rows to Database...", "info")
-                saved = 0
+        try:
+            remaining = iter(dates)
+            downloads, parses = {}, {}
+            while True:
+                while len(downloads) + len(parses) < window:
+                    d = next(remaining, None)
+                    if d is None:
+                        break
+                    downloads[download_pool.submit(download_pdf, d)] = d
+                if not downloads and not parses:
+                    break
+
+                finished, _ = wait(set(downloads) | set(parses), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    if fut in downloads:
+                        d = downloads.pop(fut)
+                        try:
+                            cached_pdf = fut.result()
+                        except Exception as e:
+                            self.log(f"Download failed for date {d}: {e}", "error")
+                            continue
+                        pdf_path, pdf_sha256 = cached_pdf.path, cached_pdf.sha256
+                        self.log(f"PDF saved: {pdf_path}", "success")
+                        if self.already_ingested(d, pdf_sha256):
+                            done.add(d.isoformat())
+                            save_checkpoint(checkpoint_path, done)
+                            continue
+                        parse_fut = parse_pool.submit(parse_report_pdf, pdf_path)
+                        parses[parse_fut] = (d, make_download_folder(out_dir, d), pdf_sha256)
+                        continue
 
-                def to_dec(v):
-                    if v is None:
-                        return None
+                    d, folder, pdf_sha256 = parses.pop(fut)
                     try:
-                        return Decimal(str(v))
-                    except (InvalidOperation, ValueError, TypeError):
-                        return None
+                        self.log(f"Processing Date: {d}", "info")
+                        if not self.save_report(d, folder, fut.result(), pdf_sha256):
+                            continue
+                    except Exception as e:
+                        tb = traceback.format_exc()
+                        self.log(f"PROCESS FAILED for date {d}: {e}", "error")
+                        self.log(tb, "error")
+                        continue
+                    done.add(d.isoformat())
+                    save_checkpoint(checkpoint_path, done)
+        finally:
+            download_pool.shutdown(wait=True, cancel_futures=True)
+            parse_pool.shutdown(wait=True, cancel_futures=True)
+
+    def already_ingested(self, d, pdf_sha256):
+        """Consult the ingestion ledger; True (and logged) when this PDF was already saved for d."""
+        if self.force or not is_unchanged(LEDGER_SOURCE, d, pdf_sha256, EXTRACTOR_VERSION):
+            return False
+        self.log(f"PDF for {d} unchanged since last successful ingest (sha256 {pdf_sha256[:12]}). Skipping.", "success")
+        return True
+
+    def save_report(self, d, download_folder, parsed, pdf_sha256):
+        """
+        Log a parsed report, write its JSON snapshot, upsert its rows and record the ledger entry.
+
+        Rows, ledger entry and checkpoint are all keyed by d, the date the PDF
+        was requested for (like srldc_project, which forces the URL date: the
+        PSP PDFs often carry the next day's date), so --force and resume
+        always see the same reports that were written. A differing PDF date
+        is only logged. Returns False when nothing was saved, so the date is
+        not checkpointed and a resume retries it.
+        """
+        report_info = parsed["report_info"]
+        central = parsed["central"]
+        jv = parsed["joint_venture"]
+        combined = central + jv
+
+        report_date_parsed = None
+        if report_info.get("report_date"):
+            report_date_parsed = _try_parse_date_token(report_info.get("report_date"))
+        if report_date_parsed != d:
+            self.log(f"PDF internal date: {report_info.get('report_date')} | Forced report date: {d}", "warning")
+
+        self.log(f"Report DATE found: {report_info.get('report_date')}", "info")
+        self.log(f"Reporting DATETIME found: {report_info.get('reporting_datetime')}", "info")
+        self.log(f"Detected Pattern: {parsed['pattern']}", "info")
+        self.log(f"Central Sector Rows: {len(central)}", "info")
+        self.log(f"Joint Venture Rows: {len(jv)}", "info")
+        self.log(f"TOTAL Extracted Rows: {len(combined)}", "success")
+
+        # ---------------- JSON SNAPSHOT ----------------
+        fname = f"{d.strftime('%Y%m%d')}.json"
+        json_path = os.path.join(download_folder, fname)
+        try:
+            snapshot = {
+                "report_date": report_info.get("report_date"),
+                "reporting_datetime": report_info.get("reporting_datetime"),
+                "central_sector": central,
+                "joint_venture": jv
+            }
+            with open(json_path, "w", encoding="utf-8") as jf:
+                json.dump(snapshot, jf, indent=2, ensure_ascii=False)
+
+            size = os.path.getsize(json_path)
+            self.log(f"JSON saved: {json_path} ({size} bytes)", "success")
+
+        except Exception as e:
+            self.log(f"JSON write error for date {d}: {e}", "error")
+            raise
+
+        # ---------------- SAVE TO DATABASE -------------
+        self.log("[4] Saving rows to Database...", "info")
+
+        def to_dec(v):
+            if v is None:
+                return None
+            try:
+                return Decimal(str(v))
+            except (InvalidOperation, ValueError, TypeError):
+                return None
 
-                report_date_parsed = None
-                if report_info.get("report_date"):
-                    report_date_parsed = _try_parse_date_token(report_info.get("report_date"))
+        reporting_dt_parsed = None
+        if report_info.get("reporting_datetime"):
+            try:
+                reporting_dt_parsed = _dt.strptime(report_info.get("reporting_datetime"), "%Y-%m-%d %H:%M")
+            except Exception:
                 reporting_dt_parsed = None
-                if report_info.get("reporting_datetime"):
-                    try:
-                        reporting_dt_parsed = _dt.strptime(report_info.get("reporting_datetime"), "%Y-%m-%d %H:%M")
-                    except Exception:
-                        reporting_dt_parsed = None
-
-                with transaction.atomic():
-                    for rec in combined:
-                        report_date = report_date_parsed
-                        obj, created = SRLDC3BData.objects.update_or_create(
-                            station=rec.get("station"),
-                            report_date=report_date,
-                            defaults={
-                                "reporting_datetime": reporting_dt_parsed,
-                                "installed_capacity_mw": rec.get("installed_capacity_mw"),
-                                "peak_1900_mw": rec.get("peak_1900_mw"),
-                                "offpeak_0300_mw": rec.get("offpeak_0300_mw"),
-                                "day_peak_mw": rec.get("day_peak_mw"),
-                                "day_peak_hrs": rec.get("day_peak_hrs"),
-                                "min_generation_mw": to_dec(rec.get("min_generation_mw")),
-                                "min_generation_hrs": rec.get("min_generation_hrs"),
-                                "gross_energy_mu": to_dec(rec.get("gross_energy_mu")),
-                                "net_energy_mu": to_dec(rec.get("net_energy_mu")),
-                                "day_energy_mu": to_dec(rec.get("day_energy_mu")),
-                                "avg_mw": to_dec(rec.get("avg_mw")),
-                                "row_type": rec.get("row_type"),
-                                "source_page": rec.get("source_page"),
-                                "source_table_index": rec.get("source_table_index"),
-                            }
-                        )
-                        saved += 1
-
-                self.log(f"Saved {saved} rows to DB for {d}", "success")
-
-            except Exception as e:
-                tb = traceback.format_exc()
-                self.log(f"PROCESS FAILED for date {d}: {e}", "error")
-                self.log(tb, "error")
-                continue
 
-        self.log("All dates processed.", "success")
\ No newline at end of file
+        rows = []
+        for rec in combined:
+            rows.append({
+                "station": rec.get("station"),
+                "report_date": d,
+                "reporting_datetime": reporting_dt_parsed,
+                "installed_capacity_mw": rec.get("installed_capacity_mw"),
+                "peak_1900_mw": rec.get("peak_1900_mw"),
+                "offpeak_0300_mw": rec.get("offpeak_0300_mw"),
+                "day_peak_mw": rec.get("day_peak_mw"),
+                "day_peak_hrs": rec.get("day_peak_hrs"),
+                "min_generation_mw": to_dec(rec.get("min_generation_mw")),
+                "min_generation_hrs": rec.get("min_generation_hrs"),
+                "gross_energy_mu": to_dec(rec.get("gross_energy_mu")),
+                "net_energy_mu": to_dec(rec.get("net_energy_mu")),
+                "day_energy_mu": to_dec(rec.get("day_energy_mu")),
+                "avg_mw": to_dec(rec.get("avg_mw")),
+                "row_type": rec.get("row_type"),
+                "source_page": rec.get("source_page"),
+                "source_table_index": rec.get("source_table_index"),
+            })
+
+        ledger = LedgerRun(LEDGER_SOURCE, d, pdf_sha256, EXTRACTOR_VERSION, ["SRLDC3BData"])
+        try:
+            inserted, updated, unchanged = bulk_upsert(SRLDC3BData, rows, ("report_date", "station"))
+            if rows:
+                ledger.saved("SRLDC3BData", inserted, updated, unchanged)
+        except Exception as e:
+            ledger.failed("SRLDC3BData", e)
+            raise
+        finally:
+            ledger.finish()
+
+        if not rows:
+            self.log(f"No rows extracted for {d}; leaving it pending.", "warning")
+            return False
+
+        self.log(f"Saved {inserted + updated} rows to DB for {d} "
+                 f"({inserted} inserted, {updated} updated, {unchanged} unchanged)", "success")
+        return True
@@ -1,45 +1,23 @@
 from django.core.management.base import BaseCommand
 import os
 import requests
-from tabula.io import read_pdf
+from processor.tabula_backend import read_pdf
 import json
 import re
+import time
 import tempfile
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from ...models import PosocoTableA, PosocoTableG
+from ...models import IngestionLedger, PosocoTableA, PosocoTableG
+from ...upsert import bulk_upsert
+from ...download_cache import fetch_pdf
+from ...ledger import LedgerRun, file_sha256, is_unchanged
+from ...timing import (StageTimer, STATUS_SKIPPED, STAGE_METADATA, STAGE_DOWNLOAD, STAGE_EXTRACT, STAGE_NORMALIZE,
+                       STAGE_DB_WRITE, STAGE_JSON_WRITE)
 from PyPDF2 import PdfReader
 import shutil
 
-import ssl
-from requests.adapters import HTTPAdapter
-from urllib3.util.ssl_ import create_urllib3_context
-from urllib3.poolmanager import PoolManager
-
-
-
-class LegacySSLAdapter(HTTPAdapter):
-    def init_poolmanager(self, connections, maxsize, block=False):
-        ctx = create_urllib3_context()
-
-        # 🔥 CRITICAL FIX
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-
-        # Allow legacy renegotiation
-        ctx.options |= 0x4
-
-        # Allow weak ciphers (gov sites)
-        try:
-            ctx.set_ciphers('DEFAULT@SECLEVEL=1')
-        except Exception:
-            pass
-
-        self.poolmanager = PoolManager(
-            num_pools=connections,
-            maxsize=maxsize,
-            block=block,
-            ssl_context=ctx
-        )
+from ... import http
 
 
 # --- Constants ---
@@ -56,6 +34,11 @@ payload = {
 }
 
 # --- Helper Functions ---
+def _timed(timer, name, **info):
+    """timer.stage(name) when a StageTimer was passed in, else a no-op block (still yields a dict)."""
+    return timer.stage(name, **info) if timer else nullcontext({})
+
+
 def make_report_dir(base_dir, desired_date=None):
     """Create a timestamped subfolder inside POSOCO/. 
        If desired_date is provided, include that date in the folder name so past-date runs are kept distinct.
@@ -107,9 +90,7 @@ def _parse_date_from_string(s):
 def _post_and_get_retdata(api_url, payload, timeout=30):
     """POST and return parsed JSON (or None on failure)."""
     try:
-        session = requests.Session()
-        session.mount('https://', LegacySSLAdapter())
-        resp = session.post(
+        resp = http.post(
             api_url,
             json=payload,
             timeout=timeout,
@@ -125,23 +106,19 @@ def _post_and_get_retdata(api_url, payload, timeout=30):
         return None
 
 
-def _download_to_temp(url, timeout=60):
-    """Download URL to a temporary file and return its path (or None)."""
+def _download_to_temp(url, timeout=60, cache_key=None, timer=None):
+    """
+    Download URL (through the shared PDF cache) to a temporary file.
+    Returns a CachedPdf whose .path is the temp file, or None.
+    """
     try:
-        session = requests.Session()
-        session.mount('https://', LegacySSLAdapter())
-        r = session.get(
-            url,
-            stream=True,
-            timeout=timeout,
-            verify=False
-        )
-        r.raise_for_status()
         tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        with open(tmp.name, "wb") as fh:
-            for chunk in r.iter_content(1024):
-                fh.write(chunk)
-        return tmp.name
+        tmp.close()
+        with _timed(timer, STAGE_DOWNLOAD) as stage:
+            cached = fetch_pdf(url, tmp.name, cache_key=cache_key, timeout=timeout, verify=False)
+            stage['bytes'] = os.path.getsize(cached.path)
+            stage['not_modified'] = cached.not_modified
+        return cached
     except Exception as e:
         print(f"❌ Error downloading temp PDF {url}: {e}")
         return None
@@ -191,7 +168,7 @@ def _extract_report_date_from_pdf(pdf_path):
 
 
 # ---------- New: fetch_report_for_target_date_with_fill ----------
-def fetch_report_for_target_date_with_fill(api_url, base_url, payload, report_dir, target_date, lookback_days=7):
+def fetch_report_for_target_date_with_fill(api_url, base_url, payload, report_dir, target_date, lookback_days=7, timer=None):
     """
     Policy:
       - If a PDF for report_date == target_date exists and is valid, download and save as posoco_<target_date>.pdf
@@ -199,10 +176,13 @@ def fetch_report_for_target_date_with_fill(api_url, base_url, payload, report_di
         Download that PDF (even if its report_date < target_date) and SAVE the file named as posoco_<target_date>.pdf.
       - Else look back by report_date up to lookback_days and pick the latest previous report; save it named as posoco_<target_date>.pdf.
     Returns: (local_pdf_path_or_None, metadata_or_None)
-    metadata = { 'selected_report_date': date, 'selected_posting_date': date, 'title': str, 'filepath': str, 'mime': str }
+    metadata = { 'selected_report_date': date, 'selected_posting_date': date, 'title': str, 'filepath': str, 'mime': str,
+                 'cached_pdf': CachedPdf }
+    timer, if given, is a StageTimer that gets the metadata and download stages.
     """
     try:
-        resp = _post_and_get_retdata(api_url, {"_source": payload.get("_source", "GRDW"), "_type": payload.get("_type", "DAILY_PSP_REPORT")})
+        with _timed(timer, STAGE_METADATA):
+            resp = _post_and_get_retdata(api_url, {"_source": payload.get("_source", "GRDW"), "_type": payload.get("_type", "DAILY_PSP_REPORT")})
         if not resp or not resp.get("retData"):
             print("❌ No retData from API.")
             return None, None
@@ -269,18 +249,20 @@ def fetch_report_for_target_date_with_fill(api_url, base_url, payload, report_di
         if exacts:
             for r in sorted(exacts, key=lambda x: (x["posting_date"] or datetime(1970,1,1).date()), reverse=True):
                 fp = r["filepath"]
-                download_url = base_url.rstrip("/") + "/" + fp.lstrip("/")
+                plain_url = base_url.rstrip("/") + "/" + fp.lstrip("/")
+                download_url = plain_url
                 if "?" not in download_url:
                     download_url = download_url + f"?cachebust={int(datetime.now().timestamp())}"
-                tmp = _download_to_temp(download_url)
-                if not tmp:
+                cached = _download_to_temp(download_url, cache_key=plain_url, timer=timer)
+                if not cached:
                     continue
+                tmp = cached.path
                 printed = _extract_report_date_from_pdf(tmp)
                 if printed:
                     if printed == r["report_date"]:
                         dest = os.path.join(report_dir, f"posoco_{target_date.strftime('%d%m%Y')}.pdf")
                         shutil.move(tmp, dest)
-                        meta = {"selected_report_date": r["report_date"], "selected_posting_date": r["posting_date"], "title": r["title"], "filepath": fp, "mime": r["mime"]}
+                        meta = {"selected_report_date": r["report_date"], "selected_posting_date": r["posting_date"], "title": r["title"], "filepath": fp, "mime": r["mime"], "cached_pdf": cached}
                         print(f"✅ Exact match downloaded and saved as {dest}")
                         return dest, meta
                     else:
@@ -294,7 +276,7 @@ def fetch_report_for_target_date_with_fill(api_url, base_url, payload, report_di
                     # accept exact-match even if printed date couldn't be extracted
                     dest = os.path.join(report_dir, f"posoco_{target_date.strftime('%d%m%Y')}.pdf")
                     shutil.move(tmp, dest)
-                    meta = {"selected_report_date": r["report_date"], "selected_posting_date": r["posting_date"], "title": r["title"], "filepath": fp, "mime": r["mime"]}
+                    meta = {"selected_report_date": r["report_date"], "selected_posting_date": r["posting_date"], "title": r["title"], "filepath": fp, "mime": r["mime"], "cached_pdf": cached}
                     print(f"⚠️ Exact match PDF lacked printed date but Title matches — saved as {dest}")
                     return dest, meta
 
@@ -303,17 +285,19 @@ def fetch_report_for_target_date_with_fill(api_url, base_url, payload, report_di
         if posted_before:
             chosen = sorted(posted_before, key=lambda x: (x["posting_date"], x["report_date"] or datetime(1970,1,1).date()), reverse=True)[0]
             fp = chosen["filepath"]
-            download_url = base_url.rstrip("/") + "/" + fp.lstrip("/")
+            plain_url = base_url.rstrip("/") + "/" + fp.lstrip("/")
+            download_url = plain_url
             if "?" not in download_url:
                 download_url = download_url + f"?cachebust={int(datetime.now().timestamp())}"
-            tmp = _download_to_temp(download_url)
-            if not tmp:
+            cached = _download_to_temp(download_url, cache_key=plain_url, timer=timer)
+            if not cached:
                 print("❌ Failed to download chosen posted candidate.")
                 return None, None
+            tmp = cached.path
             # IMPORTANT: save file named by target_date as user asked
             dest = os.path.join(report_dir, f"posoco_{target_date.strftime('%d%m%Y')}.pdf")
             shutil.move(tmp, dest)
-            meta = {"selected_report_date": chosen["report_date"], "selected_posting_date": chosen["posting_date"], "title": chosen["title"], "filepath": fp, "mime": chosen["mime"]}
+            meta = {"selected_report_date": chosen["report_date"], "selected_posting_date": chosen["posting_date"], "title": chosen["title"], "filepath": fp, "mime": chosen["mime"], "cached_pdf": cached}
             print(f"✅ Selected most-recent posted-by-{target_date} report (actual report_date={chosen['report_date']}, posting_date={chosen['posting_date']}) and saved as {dest}")
             return dest, meta
 
@@ -324,16 +308,18 @@ def fetch_report_for_target_date_with_fill(api_url, base_url, payload, report_di
             if candidates_prev:
                 chosen = sorted(candidates_prev, key=lambda x: (x["posting_date"] or datetime(1970,1,1).date()), reverse=True)[0]
                 fp = chosen["filepath"]
-                download_url = base_url.rstrip("/") + "/" + fp.lstrip("/")
+                plain_url = base_url.rstrip("/") + "/" + fp.lstrip("/")
+                download_url = plain_url
                 if "?" not in download_url:
                     download_url = download_url + f"?cachebust={int(datetime.now().timestamp())}"
-                tmp = _download_to_temp(download_url)
-                if not tmp:
+                cached = _download_to_temp(download_url, cache_key=plain_url, timer=timer)
+                if not cached:
                     continue
+                tmp = cached.path
                 # Save using requested target_date filename (user requested)
                 dest = os.path.join(report_dir, f"posoco_{target_date.strftime('%d%m%Y')}.pdf")
                 shutil.move(tmp, dest)
-                meta = {"selected_report_date": chosen["report_date"], "selected_posting_date": chosen["posting_date"], "title": chosen["title"], "filepath": fp, "mime": chosen["mime"]}
+                meta = {"selected_report_date": chosen["report_date"], "selected_posting_date": chosen["posting_date"], "title": chosen["title"], "filepath": fp, "mime": chosen["mime"], "cached_pdf": cached}
                 print(f"ℹ️ No report posted by {target_date}; fetched previous report {chosen['report_date']} and saved AS {dest}")
                 return dest, meta
 
@@ -346,10 +332,11 @@ def fetch_report_for_target_date_with_fill(api_url, base_url, payload, report_di
         return None, None
 
 
-def extract_tables_from_pdf(pdf_file, report_dir, timestamp, desired_date=None):
+def extract_tables_from_pdf(pdf_file, report_dir, timestamp, desired_date=None, timer=None):
     """
     Extracts tables, renames headings, and saves as JSON.
     This version uses flexible matching to handle unpredictable keys.
+    timer, if given, is a StageTimer that gets the extract/normalize/json_write stages.
     """
     def get_short_key_simple(long_key):
         key = long_key.strip()
@@ -391,7 +378,9 @@ def extract_tables_from_pdf(pdf_file, report_dir, timestamp, desired_date=None):
         return key # Fallback to the original key if no match is found
 
     try:
-        tables = read_pdf(pdf_file, pages="all", multiple_tables=True, lattice=True)
+        with _timed(timer, f'{STAGE_EXTRACT}:tabula') as stage:
+            tables = read_pdf(pdf_file, pages="all", multiple_tables=True, lattice=True)
+            stage['tables'] = len(tables or [])
     except Exception as e:
         print(f"❌ Error reading PDF with Tabula: {e}")
         tables = []
@@ -425,6 +414,8 @@ def extract_tables_from_pdf(pdf_file, report_dir, timestamp, desired_date=None):
         if table_a_df is not None and table_g_df is not None:
             break
 
+    normalize_started = time.perf_counter()
+
     # Process Table A if it was found
     if table_a_df is not None:
         table_a_df = table_a_df.set_index(table_a_df.columns[0]).dropna(how='all')
@@ -455,6 +446,9 @@ def extract_tables_from_pdf(pdf_file, report_dir, timestamp, desired_date=None):
         }
         print("⚠️ No valid tables found in PDF. Using empty template.")
 
+    if timer:
+        timer.record(f'{STAGE_NORMALIZE}:AG', time.perf_counter() - normalize_started)
+
     # Prefer the requested desired_date for JSON filename; fallback to now()
     if desired_date:
         if isinstance(desired_date, datetime):
@@ -468,7 +462,7 @@ def extract_tables_from_pdf(pdf_file, report_dir, timestamp, desired_date=None):
     json_name = f"posoco_{date_compact}.json"
     output_json = os.path.join(report_dir, json_name)
 
-    with open(output_json, "w", encoding="utf-8") as f:
+    with _timed(timer, STAGE_JSON_WRITE), open(output_json, "w", encoding="utf-8") as f:
         json.dump(final_json, f, indent=4, ensure_ascii=False)
 
     print(f"✅ JSON with shortened keys saved successfully at: {output_json}")
@@ -476,13 +470,16 @@ def extract_tables_from_pdf(pdf_file, report_dir, timestamp, desired_date=None):
     return final_json
 
 
-def save_to_db(final_json, report_date=None):
-    """Saves the processed JSON data to the Django database."""
+def save_to_db(final_json, report_date=None, ledger=None, timer=None):
+    """Saves the processed JSON data to the Django database (recording counts on ledger, a LedgerRun, and db_write timings on timer)."""
     # If report_date is provided, use that; otherwise use today
     today = report_date or datetime.now().date()
+    # extract_tables_from_pdf nests both tables under a "POSOCO" key
+    final_json = final_json.get("POSOCO", final_json)
 
     try:
         # Save data from Table A
+        rows_a = []
         table_a_data = final_json.get("posoco_table_a", [])
         if table_a_data and table_a_data[0]:
             for category, values in table_a_data[0].items():
@@ -490,20 +487,19 @@ def save_to_db(final_json, report_date=None):
                     continue
                 if all(v is None for v in values.values()):
                     continue
-                PosocoTableA.objects.update_or_create(
-                    category=category,
-                    report_date=today,
-                    defaults={
-                        'nr': values.get("NR"),
-                        'wr': values.get("WR"),
-                        'sr': values.get("SR"),
-                        'er': values.get("ER"),
-                        'ner': values.get("NER"),
-                        'total': values.get("TOTAL"),
-                    }
-                )
+                rows_a.append({
+                    'category': category,
+                    'report_date': today,
+                    'nr': values.get("NR"),
+                    'wr': values.get("WR"),
+                    'sr': values.get("SR"),
+                    'er': values.get("ER"),
+                    'ner': values.get("NER"),
+                    'total': values.get("TOTAL"),
+                })
 
         # Save data from Table G
+        rows_g = []
         table_g_data = final_json.get("posoco_table_g", [])
         if table_g_data and table_g_data[0]:
             for fuel, values in table_g_data[0].items():
@@ -511,24 +507,41 @@ def save_to_db(final_json, report_date=None):
                     continue
                 if all(v is None for v in values.values()):
                     continue
-                PosocoTableG.objects.update_or_create(
-                    fuel_type=fuel,
-                    report_date=today,
-                    defaults={
-                        'nr': values.get("NR"),
-                        'wr': values.get("WR"),
-                        'sr': values.get("SR"),
-                        'er': values.get("ER"),
-                        'ner': values.get("NER"),
-                        'all_india': values.get("All India"),
-                        'share_percent': values.get("% Share"),
-                    }
-                )
-        print("✅ Data saved to database successfully")
+                rows_g.append({
+                    'fuel_type': fuel,
+                    'report_date': today,
+                    'nr': values.get("NR"),
+                    'wr': values.get("WR"),
+                    'sr': values.get("SR"),
+                    'er': values.get("ER"),
+                    'ner': values.get("NER"),
+                    'all_india': values.get("All India"),
+                    'share_percent': values.get("% Share"),
+                })
+
+        with _timed(timer, f'{STAGE_DB_WRITE}:PosocoTableA', rows=len(rows_a)):
+            a_inserted, a_updated, a_unchanged = bulk_upsert(PosocoTableA, rows_a, ('category', 'report_date'))
+        with _timed(timer, f'{STAGE_DB_WRITE}:PosocoTableG', rows=len(rows_g)):
+            g_inserted, g_updated, g_unchanged = bulk_upsert(PosocoTableG, rows_g, ('fuel_type', 'report_date'))
+        if ledger:
+            if rows_a:
+                ledger.saved('PosocoTableA', a_inserted, a_updated, a_unchanged)
+            if rows_g:
+                ledger.saved('PosocoTableG', g_inserted, g_updated, g_unchanged)
+        print(f"✅ Data saved to database successfully "
+              f"(Table A: {a_inserted} inserted, {a_updated} updated, {a_unchanged} unchanged; "
+              f"Table G: {g_inserted} inserted, {g_updated} updated, {g_unchanged} unchanged)")
     except Exception as e:
+        if ledger:
+            ledger.failed('database', e)
         print(f"❌ An error occurred while saving to the database: {e}")
 
 # --- Django Management Command ---
+LEDGER_SOURCE = "POSOCO"
+# Bump when the Table A/G extraction logic changes so already-ingested PDFs are re-parsed.
+EXTRACTOR_VERSION = "1"
+
+
 class Command(BaseCommand):
     help = "Downloads the latest NLDC PSP PDF, extracts key tables with shortened headings, and saves them to a file and the database."
 
@@ -543,39 +556,64 @@ class Command(BaseCommand):
             required=False,
             help='Target report date to fetch (formats: YYYY-MM-DD, DD-MM-YYYY, DDMMYYYY, etc.). If omitted, uses today.'
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-extract and save even if the PDF is unchanged since the last run.'
+        )
 
     def handle(self, *args, **options):
-        self.stdout.write("🚀 Starting POSOCO report download and processing...")
-        # Parse target date from --date if passed
-        raw_date = options.get('date')
-        if raw_date:
-            parsed_dt = _parse_date_from_string(raw_date)
-            if parsed_dt is None:
-                self.stdout.write(self.style.ERROR(f"❌ Could not parse date passed: {raw_date}"))
-                return
-            target_date = parsed_dt.date() if isinstance(parsed_dt, datetime) else parsed_dt
-        else:
-            target_date = datetime.now().date()
-
-        # Make report_dir including target_date so folder names reflect requested date
-        report_dir, timestamp = make_report_dir(SAVE_DIR, desired_date=target_date)
-
-        # Use the new fetch logic that fills with most-recent available by the requested day
-        pdf_path, meta = fetch_report_for_target_date_with_fill(API_URL, BASE_URL, payload, report_dir, target_date, lookback_days=7)
-
-        if pdf_path:
-            # pass desired_date to extract_tables_from_pdf so JSON filename uses target_date
-            final_json = extract_tables_from_pdf(pdf_path, report_dir, timestamp, desired_date=target_date)
-            if final_json and (final_json["POSOCO"]["posoco_table_a"] or final_json["POSOCO"]["posoco_table_g"]):
-                # Save to DB using the actual selected_report_date (meta) so database rows reflect the real report date
-                selected_report_date = meta.get('selected_report_date') if meta else target_date
-                save_to_db(final_json, report_date=selected_report_date)
-                # Also print/save posting_date for auditing
-                if meta and meta.get('selected_posting_date'):
-                    print(f"ℹ️ Report posting date (when file was uploaded): {meta.get('selected_posting_date')}")
+        timer = StageTimer(LEDGER_SOURCE)
+        ledger_date = None
+        run_status = IngestionLedger.STATUS_FAILED
+        try:
+            self.stdout.write("🚀 Starting POSOCO report download and processing...")
+            # Parse target date from --date if passed
+            raw_date = options.get('date')
+            if raw_date:
+                parsed_dt = _parse_date_from_string(raw_date)
+                if parsed_dt is None:
+                    self.stdout.write(self.style.ERROR(f"❌ Could not parse date passed: {raw_date}"))
+                    return
+                target_date = parsed_dt.date() if isinstance(parsed_dt, datetime) else parsed_dt
             else:
-                self.stdout.write(self.style.WARNING("Could not extract any data from the PDF to save."))
-        else:
-            self.stdout.write(self.style.ERROR("Failed to download PDF. Aborting process."))
+                target_date = datetime.now().date()
+
+            # Make report_dir including target_date so folder names reflect requested date
+            report_dir, timestamp = make_report_dir(SAVE_DIR, desired_date=target_date)
+
+            # Use the new fetch logic that fills with most-recent available by the requested day
+            pdf_path, meta = fetch_report_for_target_date_with_fill(API_URL, BASE_URL, payload, report_dir, target_date, lookback_days=7, timer=timer)
+
+            cached_pdf = meta.get('cached_pdf') if meta else None
+            # Save to DB using the actual selected_report_date (meta) so database rows reflect the real report date
+            selected_report_date = meta.get('selected_report_date') if meta else target_date
+            pdf_sha256 = None
+            if pdf_path:
+                pdf_sha256 = cached_pdf.sha256 if cached_pdf else file_sha256(pdf_path)
+            ledger_date = selected_report_date or target_date
+
+            if pdf_path and not options.get('force') and is_unchanged(LEDGER_SOURCE, ledger_date, pdf_sha256, EXTRACTOR_VERSION):
+                self.stdout.write(self.style.SUCCESS(f"⏭️ PDF unchanged since last successful ingest (sha256 {pdf_sha256[:12]}). Skipping extraction and DB writes."))
+                run_status = STATUS_SKIPPED
+            elif pdf_path:
+                ledger = LedgerRun(LEDGER_SOURCE, ledger_date, pdf_sha256, EXTRACTOR_VERSION, ['PosocoTableA', 'PosocoTableG'])
+                # pass desired_date to extract_tables_from_pdf so JSON filename uses target_date
+                final_json = extract_tables_from_pdf(pdf_path, report_dir, timestamp, desired_date=target_date, timer=timer)
+                if final_json and (final_json["POSOCO"]["posoco_table_a"] or final_json["POSOCO"]["posoco_table_g"]):
+                    save_to_db(final_json, report_date=selected_report_date, ledger=ledger, timer=timer)
+                    # Also print/save posting_date for auditing
+                    if meta and meta.get('selected_posting_date'):
+                        print(f"ℹ️ Report posting date (when file was uploaded): {meta.get('selected_posting_date')}")
+                else:
+                    self.stdout.write(self.style.WARNING("Could not extract any data from the PDF to save."))
+                entry = ledger.finish()
+                run_status = entry.status
+                self.stdout.write(f"📒 Ledger: {entry} {entry.row_counts}")
+            else:
+                self.stdout.write(self.style.ERROR("Failed to download PDF. Aborting process."))
 
-        self.stdout.write(self.style.SUCCESS("✅ Process finished."))
\ No newline at end of file
+            self.stdout.write(self.style.SUCCESS("✅ Process finished."))
+        finally:
+            timer.finish(ledger_date, run_status)
+            self.stdout.write(f"⏱️ Timings: {timer.summary()} (total {timer.total_seconds:.2f}s)")
@@ -0,0 +1,44 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from processor.aggregates import SOURCES, refresh_day, refresh_month
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the MetricAggregate daily / monthly rollups from the 2(A) tables "
+            "(the ingestion commands keep them current; run this once for existing history)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region', action='append', choices=list(SOURCES),
+                            help="Only rebuild this region (repeatable). Default: all")
+        parser.add_argument('--from', dest='date_from', help="First report date, YYYY-MM-DD")
+        parser.add_argument('--to', dest='date_to', help="Last report date, YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        try:
+            date_from, date_to = (
+                datetime.datetime.strptime(options[key], "%Y-%m-%d").date() if options[key] else None
+                for key in ('date_from', 'date_to')
+            )
+        except ValueError:
+            raise CommandError("❌ Invalid date format. Use YYYY-MM-DD")
+
+        for region in options['region'] or SOURCES:
+            dates = SOURCES[region].objects.values_list('report_date', flat=True).distinct().order_by('report_date')
+            if date_from:
+                dates = dates.filter(report_date__gte=date_from)
+            if date_to:
+                dates = dates.filter(report_date__lte=date_to)
+
+            day_rows, months = 0, set()
+            dates = list(dates)
+            for report_date in dates:
+                day_rows += refresh_day(region, report_date)
+                months.add(report_date.replace(day=1))
+            month_rows = sum(refresh_month(region, month) for month in sorted(months))
+
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {region}: {day_rows} daily and {month_rows} monthly aggregates over "
+                f"{len(dates)} report dates"
+            ))
@@ -3,15 +3,14 @@ import logging
 import os
 import re
 import json
+import time
 import datetime
 import traceback
 import requests
-import pdfplumber
 from datetime import datetime as _dt, timedelta
 from decimal import Decimal, InvalidOperation
 
 import pandas as pd
-from tabula.io import read_pdf
 
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
@@ -19,32 +18,14 @@ from django.db import transaction
 from django.utils import timezone
 
 # ---- Models: ensure these names match your app models ----
-from processor.models import Srldc2AData, Srldc2CData, SRLDC3BData
-# ---- SSL adapter used by your tabula downloader session (keeps legacy support) ----
-import ssl
-from requests.adapters import HTTPAdapter
-from urllib3.util.ssl_ import create_urllib3_context
-from urllib3.poolmanager import PoolManager
-
-
-class LegacySSLAdapter(HTTPAdapter):
-    def init_poolmanager(self, connections, maxsize, block=False):
-        ctx = create_urllib3_context()
-        ctx.load_default_certs()
-        # Enable "Legacy Server Connect" (0x4) to allow unsafe renegotiation
-        ctx.options |= 0x4
-        # (Optional) Lower security level to allow older ciphers often used by gov sites
-        try:
-            ctx.set_ciphers('DEFAULT@SECLEVEL=1')
-        except Exception:
-            pass
-
-        self.poolmanager = PoolManager(
-            num_pools=connections,
-            maxsize=maxsize,
-            block=block,
-            ssl_context=ctx
-        )
+from processor.models import IngestionLedger, Srldc2AData, Srldc2CData, SRLDC3BData
+from processor.download_cache import fetch_pdf
+from processor.ledger import LedgerRun, file_sha256, is_unchanged
+from processor.parsed_report import ParsedReport
+from processor.aggregates import refresh_aggregates
+from processor.timing import (StageTimer, STATUS_SKIPPED, STAGE_DOWNLOAD, STAGE_PDF_OPEN, STAGE_EXTRACT,
+                              STAGE_NORMALIZE, STAGE_DB_WRITE, STAGE_JSON_WRITE, STAGE_AGGREGATES)
+from processor.upsert import bulk_upsert
 
 
 # ----------------- Shared helpers -----------------
@@ -298,7 +279,7 @@ def is_end_row_3b(text): return bool(re.search(END_MARKER_3B, text, flags=re.IGN
 
 
 # Date extraction helpers (both old/new pattern) - copied from your 3B script
-def extract_report_dates_old(pdf_path):
+def extract_report_dates_old(report):
     res = {
         "report_date_for": None,
         "report_date_of_reporting": None,
@@ -307,13 +288,8 @@ def extract_report_dates_old(pdf_path):
         "reporting_datetime": None
     }
 
-    with pdfplumber.open(pdf_path) as pdf:
-        first_page = pdf.pages[0]
-        page_text = first_page.extract_text() or ""
-        try:
-            page_words = first_page.extract_words(use_text_flow=True)
-        except Exception:
-            page_words = first_page.extract_words() if hasattr(first_page, "extract_words") else []
+    page_text = report.text(0)
+    page_words = report.words(0)
 
     txt = page_text
 
@@ -419,7 +395,7 @@ def extract_report_dates_old(pdf_path):
     return res
 
 
-def extract_report_dates_new(pdf_path):
+def extract_report_dates_new(report):
     res = {
         "report_date_for": None,
         "report_date_of_reporting": None,
@@ -428,13 +404,8 @@ def extract_report_dates_new(pdf_path):
         "reporting_datetime": None
     }
 
-    with pdfplumber.open(pdf_path) as pdf:
-        first_page = pdf.pages[0]
-        page_text = first_page.extract_text() or ""
-        try:
-            page_words = first_page.extract_words(use_text_flow=True)
-        except Exception:
-            page_words = first_page.extract_words() if hasattr(first_page, "extract_words") else []
+    page_text = report.text(0)
+    page_words = report.words(0)
 
     txt = page_text
 
@@ -528,103 +499,99 @@ def extract_report_dates_new(pdf_path):
     return res
 
 
-def extract_report_dates(pdf_path):
-    old_res = extract_report_dates_old(pdf_path)
+def extract_report_dates(report):
+    old_res = extract_report_dates_old(report)
     if old_res.get("report_date_for") or old_res.get("report_date_of_reporting"):
         return old_res
-    new_res = extract_report_dates_new(pdf_path)
+    new_res = extract_report_dates_new(report)
     return new_res
 
 
 # 3B row extraction (OLD/NEW pattern scanning)
-def extract_two_tables_3b(pdf_path, report_info):
+def extract_two_tables_3b(report, report_info):
     tables_dict = {"report_date": report_info.get('report_date'),
                    "reporting_datetime": report_info.get('reporting_datetime'), "central_sector": [],
                    "joint_venture": []}
     current_table = None
     finished = False
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for pno, page in enumerate(pdf.pages, start=1):
-            tables = page.extract_tables() or []
-            for t_idx, table in enumerate(tables, start=1):
-                rows = [[clean_cell(c) for c in r] for r in table]
-                if not rows:
-                    continue
-                maxcols = max(len(r) for r in rows)
-                rows = [r + [""] * (maxcols - len(r)) for r in rows]
+    for pno in range(1, report.page_count + 1):
+        tables = report.extract_tables(pno - 1)
+        for t_idx, table in enumerate(tables, start=1):
+            rows = [[clean_cell(c) for c in r] for r in table]
+            if not rows:
+                continue
+            maxcols = max(len(r) for r in rows)
+            rows = [r + [""] * (maxcols - len(r)) for r in rows]
 
-                for r in rows:
-                    first = first_cell_text(r)
-                    if not current_table and is_start_row_3b(first):
-                        current_table = "central_sector"
-                        continue
-                    if current_table != "joint_venture" and is_jv_row_3b(first):
-                        current_table = "joint_venture"
-                        continue
-                    if not current_table:
-                        continue
-                    if is_end_row_3b(first):
-                        tables_dict[current_table].append((pno, t_idx, r))
-                        finished = True
-                        break
+            for r in rows:
+                first = first_cell_text(r)
+                if not current_table and is_start_row_3b(first):
+                    current_table = "central_sector"
+                    continue
+                if current_table != "joint_venture" and is_jv_row_3b(first):
+                    current_table = "joint_venture"
+                    continue
+                if not current_table:
+                    continue
+                if is_end_row_3b(first):
                     tables_dict[current_table].append((pno, t_idx, r))
-                if finished:
-                    return tables_dict
+                    finished = True
+                    break
+                tables_dict[current_table].append((pno, t_idx, r))
+            if finished:
+                return tables_dict
     return tables_dict
 
 
-def extract_tables_new_pattern_3b(pdf_path):
+def extract_tables_new_pattern_3b(report):
     tables_dict = {"central_sector": [], "joint_venture": []}
     is_capturing = False
     current_section = "central_sector"
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for pno, page in enumerate(pdf.pages, start=1):
-            if pno < 2:
+    for pno in range(2, report.page_count + 1):
+        tables = report.extract_tables(pno - 1)
+        for t_idx, table in enumerate(tables, start=1):
+            rows = [[clean_cell(c) for c in r] for r in table]
+            if not rows:
                 continue
-            tables = page.extract_tables() or []
-            for t_idx, table in enumerate(tables, start=1):
-                rows = [[clean_cell(c) for c in r] for r in table]
-                if not rows:
+            maxcols = max(len(r) for r in rows)
+            rows = [r + [""] * (maxcols - len(r)) for r in rows]
+            for r in rows:
+                row_text_full = " ".join(r).upper()
+                row_text_nospace_upper = row_text_full.replace(" ", "").upper()
+                first_col = clean_cell(r[0]).upper()
+                first_col_nospace = clean_cell(r[0]).replace(" ", "").upper()
+
+                if "REGIONAL" in row_text_full and "ENTITIES" in row_text_full and "GENERATION" in row_text_full:
+                    is_capturing = True
+                    current_section = "central_sector"
                     continue
-                maxcols = max(len(r) for r in rows)
-                rows = [r + [""] * (maxcols - len(r)) for r in rows]
-                for r in rows:
-                    row_text_full = " ".join(r).upper()
-                    row_text_nospace_upper = row_text_full.replace(" ", "").upper()
-                    first_col = clean_cell(r[0]).upper()
-                    first_col_nospace = clean_cell(r[0]).replace(" ", "").upper()
-
-                    if "REGIONAL" in row_text_full and "ENTITIES" in row_text_full and "GENERATION" in row_text_full:
-                        is_capturing = True
-                        current_section = "central_sector"
+                if first_col == "ISGS":
+                    is_capturing = True
+                    current_section = "central_sector"
+                    continue
+                if "JOINT VENTURE" in row_text_full or "JOINT_VENTURE" in row_text_full or (
+                        "JOINT" in row_text_full and "VENTURE" in row_text_full):
+                    is_capturing = True
+                    current_section = "joint_venture"
+                    other_cells = [clean_cell(c).strip() for c in r[1:]]
+                    if all(not oc for oc in other_cells):
                         continue
-                    if first_col == "ISGS":
-                        is_capturing = True
-                        current_section = "central_sector"
+                if "IPPUNDEROPENACCESS" in row_text_nospace_upper:
+                    is_capturing = False
+                    continue
+                if is_capturing:
+                    if "STATION" in row_text_full and "CAPACITY" in row_text_full:
+                        continue
+                    if "INST." in row_text_full and "CAPACITY" in row_text_full:
                         continue
-                    if "JOINT VENTURE" in row_text_full or "JOINT_VENTURE" in row_text_full or (
-                            "JOINT" in row_text_full and "VENTURE" in row_text_full):
-                        is_capturing = True
-                        current_section = "joint_venture"
+                    if first_col_nospace in ("JOINTVENTURE", "JOINT_VENTURE", "JOINTVENTURE:"):
                         other_cells = [clean_cell(c).strip() for c in r[1:]]
                         if all(not oc for oc in other_cells):
                             continue
-                    if "IPPUNDEROPENACCESS" in row_text_nospace_upper:
-                        is_capturing = False
-                        continue
-                    if is_capturing:
-                        if "STATION" in row_text_full and "CAPACITY" in row_text_full:
-                            continue
-                        if "INST." in row_text_full and "CAPACITY" in row_text_full:
-                            continue
-                        if first_col_nospace in ("JOINTVENTURE", "JOINT_VENTURE", "JOINTVENTURE:"):
-                            other_cells = [clean_cell(c).strip() for c in r[1:]]
-                            if all(not oc for oc in other_cells):
-                                continue
-                        if looks_like_station_text(r[0]):
-                            tables_dict[current_section].append((pno, t_idx, r))
+                    if looks_like_station_text(r[0]):
+                        tables_dict[current_section].append((pno, t_idx, r))
 
     return tables_dict
 
@@ -773,303 +740,301 @@ def normalize_rows_for_table_3b(rows_with_meta, report_info=None):
 # ======================================================
 # TABLE 2(A) EXTRACTION USING HEADING ANCHOR (WORKING)
 # ======================================================
-def extract_table_2A_using_heading(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[0]
-        words = page.extract_words(use_text_flow=True)
+def extract_table_2A_using_heading(report):
+    words = report.words(0)
 
-        # Log words for debugging
+    # Log words for debugging
+    try:
+         with open("d:\\dlc_project\\debug_extraction.log", "a", encoding="utf-8") as dbg:
+             dbg.write(f"\n--- Checking 2A in {report.pdf_path} ---\n")
+             dbg.write(f"First 50 words: {[w['text'] for w in words[:50]]}\n")
+    except: pass
+
+    # ---- FIND HEADING POSITION ----
+    heading_top = None
+    for w in words:
+        txt = w.get("text", "").replace(" ", "").upper()
+        if "2(A)" in txt or "2A" in txt:
+            heading_top = w["top"]
+            break
+        
+    if heading_top is None:
         try:
-             with open("d:\\dlc_project\\debug_extraction.log", "a", encoding="utf-8") as dbg:
-                 dbg.write(f"\n--- Checking 2A in {pdf_path} ---\n")
-                 dbg.write(f"First 50 words: {[w['text'] for w in words[:50]]}\n")
+            with open("d:\\dlc_project\\debug_extraction.log", "a", encoding="utf-8") as dbg:
+                dbg.write(f"FAIL 2A. Heading not found.\n")
         except: pass
+        print(f"DEBUG: 2(A) Heading not found. First 20 words: {[w['text'] for w in words[:20]]}")
+        return None
 
-        # ---- FIND HEADING POSITION ----
-        heading_top = None
-        for w in words:
-            txt = w.get("text", "").replace(" ", "").upper()
-            if "2(A)" in txt or "2A" in txt:
-                heading_top = w["top"]
-                break
-        
-        if heading_top is None:
-            try:
-                with open("d:\\dlc_project\\debug_extraction.log", "a", encoding="utf-8") as dbg:
-                    dbg.write(f"FAIL 2A. Heading not found.\n")
-            except: pass
-            print(f"DEBUG: 2(A) Heading not found. First 20 words: {[w['text'] for w in words[:20]]}")
-            return None
+    print(f"📍 Table 2(A) heading TOP position: {heading_top}")
 
-        print(f"📍 Table 2(A) heading TOP position: {heading_top}")
-
-        # ---- GET RELEVANT TABLE BY CONTENT SCAN ----
-        for table in page.find_tables():
-            # Table must end below the heading
-            if table.bbox[3] > heading_top:
-                df = pd.DataFrame(table.extract())
-                # Scan for 2(A) headers: THERMAL, HYDRO, SOLAR
-                header_idx = -1
-                for idx, row in df.iterrows():
-                    row_str = " ".join([str(x).upper() for x in row if x])
-                    if "THERMAL" in row_str and "HYDRO" in row_str and "SOLAR" in row_str:
-                        header_idx = idx
-                        break
+    # ---- GET RELEVANT TABLE BY CONTENT SCAN ----
+    for t_idx, table in enumerate(report.find_tables(0)):
+        # Table must end below the heading
+        if table.bbox[3] > heading_top:
+            df = pd.DataFrame(report.table_rows(0, t_idx))
+            # Scan for 2(A) headers: THERMAL, HYDRO, SOLAR
+            header_idx = -1
+            for idx, row in df.iterrows():
+                row_str = " ".join([str(x).upper() for x in row if x])
+                if "THERMAL" in row_str and "HYDRO" in row_str and "SOLAR" in row_str:
+                    header_idx = idx
+                    break
                 
-                if header_idx != -1:
-                    # Found header. Try to include the row above if it has 'STATE'
-                    start_slice = header_idx
-                    if header_idx > 0:
-                        prev_row = df.iloc[header_idx - 1].fillna("").astype(str).str.upper()
-                        prev_str = " ".join(prev_row)
-                        if "STATE" in prev_str:
-                            start_slice = header_idx - 1
+            if header_idx != -1:
+                # Found header. Try to include the row above if it has 'STATE'
+                start_slice = header_idx
+                if header_idx > 0:
+                    prev_row = df.iloc[header_idx - 1].fillna("").astype(str).str.upper()
+                    prev_str = " ".join(prev_row)
+                    if "STATE" in prev_str:
+                        start_slice = header_idx - 1
                     
-                    return df.iloc[start_slice:].reset_index(drop=True)
-        return None
-
+                return df.iloc[start_slice:].reset_index(drop=True)
     return None
 
 # ======================================================
 # TABLE 2(C) EXTRACTION USING HEADING ANCHOR (NEW)
 # ======================================================
-def extract_table_2C_using_heading(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[0]
-
-        # ---- FIND HEADING POSITION ----
-        heading_top = None
-        words = page.extract_words(use_text_flow=True)
-        for w in words:
-            txt = w.get("text", "").replace(" ", "").upper()
-            if "2(C)" in txt or "2C" in txt:
-                heading_top = w["top"]
-                break
-
-        if heading_top is None:
-            print(f"DEBUG: 2(C) Heading not found. First 20 words: {[w['text'] for w in words[:20]]}")
-            return None
+def extract_table_2C_using_heading(report):
+    # ---- FIND HEADING POSITION ----
+    heading_top = None
+    words = report.words(0)
+    for w in words:
+        txt = w.get("text", "").replace(" ", "").upper()
+        if "2(C)" in txt or "2C" in txt:
+            heading_top = w["top"]
+            break
+
+    if heading_top is None:
+        print(f"DEBUG: 2(C) Heading not found. First 20 words: {[w['text'] for w in words[:20]]}")
+        return None
 
-        print(f"📍 Table 2(C) heading TOP position: {heading_top}")
+    print(f"📍 Table 2(C) heading TOP position: {heading_top}")
 
-        # ---- GET RELEVANT TABLE BY CONTENT SCAN ----
-        # ---- GET RELEVANT TABLE BY CONTENT SCAN ----
-        for table in page.find_tables():
-            # If table *ends* above heading, skip it completely
-            if table.bbox[3] < heading_top:
-                continue
+    # ---- GET RELEVANT TABLE BY CONTENT SCAN ----
+    # ---- GET RELEVANT TABLE BY CONTENT SCAN ----
+    for t_idx, table in enumerate(report.find_tables(0)):
+        # If table *ends* above heading, skip it completely
+        if table.bbox[3] < heading_top:
+            continue
 
-            # Check if table *starts* significantly below heading (Standard case)
-            # OR if it's a giant table overlapping the heading.
-            # We will iterate ROWS to filter valid ones.
+        # Check if table *starts* significantly below heading (Standard case)
+        # OR if it's a giant table overlapping the heading.
+        # We will iterate ROWS to filter valid ones.
             
-            # SIMPLER APPROACH for 2(C):
-            # Extract distinct rows from the table object and filter by BBOX
+        # SIMPLER APPROACH for 2(C):
+        # Extract distinct rows from the table object and filter by BBOX
             
-            valid_rows_data = []
-            for row in table.rows:
-                # Check if row is strictly below heading
-                # ROW bbox: (x0, top, x1, bottom)
-                if row.bbox[1] > (heading_top + 2): # Small buffer
-                    # Extract text from cells
-                    row_data = [cell if cell else "" for cell in row.cells]
-                    # Note: row.cells returns list of strings/None usually? 
-                    # Actually pdfplumber Table.rows yields Row objects, and row.cells yields Cell objects (Rects)?
-                    # No, table.extract() gives strings. table.rows gives Row objects.
-                    # We might need to map index or re-extract?
-                    # Let's rely on content filtering if we are in the same giant table since 2(A) is ABOVE 2(C).
-                    pass
-
-            # FALLBACK to content filtering on the whole extracted table, knowing 2(A) is atop 2(C)
-            df = pd.DataFrame(table.extract())
+        valid_rows_data = []
+        for row in table.rows:
+            # Check if row is strictly below heading
+            # ROW bbox: (x0, top, x1, bottom)
+            if row.bbox[1] > (heading_top + 2): # Small buffer
+                # Extract text from cells
+                row_data = [cell if cell else "" for cell in row.cells]
+                # Note: row.cells returns list of strings/None usually? 
+                # Actually pdfplumber Table.rows yields Row objects, and row.cells yields Cell objects (Rects)?
+                # No, table.extract() gives strings. table.rows gives Row objects.
+                # We might need to map index or re-extract?
+                # Let's rely on content filtering if we are in the same giant table since 2(A) is ABOVE 2(C).
+                pass
+
+        # FALLBACK to content filtering on the whole extracted table, knowing 2(A) is atop 2(C)
+        df = pd.DataFrame(report.table_rows(0, t_idx))
             
-            # Scan for 2(C) Header
-            # We know 2(C) header has "MAXIMUM DEMAND MET" and "STATE"
-            # 2(A) header has "STATE", "THERMAL", "HYDRO"
+        # Scan for 2(C) Header
+        # We know 2(C) header has "MAXIMUM DEMAND MET" and "STATE"
+        # 2(A) header has "STATE", "THERMAL", "HYDRO"
             
-            header_idx = -1
+        header_idx = -1
             
-            for idx, row in df.iterrows():
-                row_str = " ".join([str(x).upper() for x in row if x])
+        for idx, row in df.iterrows():
+            row_str = " ".join([str(x).upper() for x in row if x])
                 
-                # Check for 2(A) signatures to skip
-                if "THERMAL" in row_str and "HYDRO" in row_str and "NET SCH" in row_str:
-                    continue
-                if "THERMAL" in row_str and "HYDRO" in row_str:
-                    continue    
+            # Check for 2(A) signatures to skip
+            if "THERMAL" in row_str and "HYDRO" in row_str and "NET SCH" in row_str:
+                continue
+            if "THERMAL" in row_str and "HYDRO" in row_str:
+                continue    
                 
-                # Check for 2(C) signatures
-                # Must NOT contain THERMAL, HYDRO (signatures of 2A)
-                if "THERMAL" in row_str or "HYDRO" in row_str:
-                    continue
+            # Check for 2(C) signatures
+            # Must NOT contain THERMAL, HYDRO (signatures of 2A)
+            if "THERMAL" in row_str or "HYDRO" in row_str:
+                continue
 
-                if ("MAXIMUM" in row_str and "DEMAND" in row_str and "MET" in row_str) or \
-                   ("DEMAND" in row_str and "MET" in row_str and "ACE" in row_str) or \
-                   ("ACE" in row_str and "MAX" in row_str and "MIN" in row_str):
-                     # Found it!
-                     header_idx = idx
-                     print(f"DEBUG: Found 2(C) header at index {idx}: {row_str[:50]}...")
-                     break
+            if ("MAXIMUM" in row_str and "DEMAND" in row_str and "MET" in row_str) or \
+               ("DEMAND" in row_str and "MET" in row_str and "ACE" in row_str) or \
+               ("ACE" in row_str and "MAX" in row_str and "MIN" in row_str):
+                 # Found it!
+                 header_idx = idx
+                 print(f"DEBUG: Found 2(C) header at index {idx}: {row_str[:50]}...")
+                 break
             
-            if header_idx != -1:
-                # Found header. Try to include the row above if it has 'STATE'
-                start_slice = header_idx
-                if header_idx > 0:
-                    prev_row = df.iloc[header_idx - 1].fillna("").astype(str).str.upper()
-                    prev_str = " ".join(prev_row)
-                    # If prev row has "STATE", include it
-                    if "STATE" in prev_str and "THERMAL" not in prev_str:
-                        start_slice = header_idx - 1
+        if header_idx != -1:
+            # Found header. Try to include the row above if it has 'STATE'
+            start_slice = header_idx
+            if header_idx > 0:
+                prev_row = df.iloc[header_idx - 1].fillna("").astype(str).str.upper()
+                prev_str = " ".join(prev_row)
+                # If prev row has "STATE", include it
+                if "STATE" in prev_str and "THERMAL" not in prev_str:
+                    start_slice = header_idx - 1
                 
-                return df.iloc[start_slice:].reset_index(drop=True)
+            return df.iloc[start_slice:].reset_index(drop=True)
 
-        return None
+    return None
 
 
 # ======================================================
 # TABLE 3(B) EXTRACTION USING HEADING ANCHOR (NEW)
 # ======================================================
-def extract_table_3B_using_heading(pdf_path):
+def extract_table_3B_using_heading(report):
     tables_dict = {"central_sector": [], "joint_venture": []}
     
     current_section = None 
     start_collecting = False
 
-    with pdfplumber.open(pdf_path) as pdf:
-        # 1. FIND HEADING "3(B)"
-        heading_page_idx = -1
-        heading_top = -1
+    # 1. FIND HEADING "3(B)"
+    heading_page_idx = -1
+    heading_top = -1
         
-        for p_idx, page in enumerate(pdf.pages):
-            for w in page.extract_words(use_text_flow=True):
-                if "3(B)" in w.get("text", "").upper():
-                    heading_page_idx = p_idx
-                    heading_top = w["top"]
-                    break
-            if heading_page_idx != -1: break
+    for p_idx in range(report.page_count):
+        for w in report.words(p_idx):
+            if "3(B)" in w.get("text", "").upper():
+                heading_page_idx = p_idx
+                heading_top = w["top"]
+                break
+        if heading_page_idx != -1: break
             
-        if heading_page_idx == -1:
-            print("❌ Table 3(B) heading NOT FOUND.")
-            return tables_dict
+    if heading_page_idx == -1:
+        print("❌ Table 3(B) heading NOT FOUND.")
+        return tables_dict
 
-        print(f"📍 Table 3(B) heading FOUND on Page {heading_page_idx+1} at top={heading_top}")
+    print(f"📍 Table 3(B) heading FOUND on Page {heading_page_idx+1} at top={heading_top}")
 
-        # 2. EXTRACT TABLES
-        for p_idx in range(heading_page_idx, len(pdf.pages)):
-            page = pdf.pages[p_idx]
-            found_tables = page.find_tables()
+    # 2. EXTRACT TABLES
+    for p_idx in range(heading_page_idx, report.page_count):
+        found_tables = report.find_tables(p_idx)
             
-            for t_obj in found_tables:
-                # FIX: Check if table *ends* above heading. If so, skip.
-                # Do NOT skip if table starts above (bbox[1]) but ends below (overlapping/giant table)
-                if p_idx == heading_page_idx and t_obj.bbox[3] < heading_top:
-                    continue 
-
-                rows = t_obj.extract()
-                if not rows: continue
+        for t_idx, t_obj in enumerate(found_tables):
+            # FIX: Check if table *ends* above heading. If so, skip.
+            # Do NOT skip if table starts above (bbox[1]) but ends below (overlapping/giant table)
+            if p_idx == heading_page_idx and t_obj.bbox[3] < heading_top:
+                continue 
+
+            rows = report.table_rows(p_idx, t_idx)
+            if not rows: continue
                 
-                # Check rows geometry if on the starting page to filter out header/above-text rows
-                # This is crucial for Giant Tables
-                if p_idx == heading_page_idx:
-                     # Filter rows that are physically above the heading
-                     # We can't use t_obj.rows directly with extracted text easily without mapping
-                     # BUT we can check if the *first* extracted row looks like data we want?
-                     # A safer way: iterate t_obj.rows and only keep those with bbox[1] > heading_top
+            # Check rows geometry if on the starting page to filter out header/above-text rows
+            # This is crucial for Giant Tables
+            if p_idx == heading_page_idx:
+                 # Filter rows that are physically above the heading
+                 # We can't use t_obj.rows directly with extracted text easily without mapping
+                 # BUT we can check if the *first* extracted row looks like data we want?
+                 # A safer way: iterate t_obj.rows and only keep those with bbox[1] > heading_top
                      
-                     valid_indices = []
-                     for r_idx, row_obj in enumerate(t_obj.rows):
-                         if row_obj.bbox[1] > (heading_top + 2):
-                             valid_indices.append(r_idx)
+                 valid_indices = []
+                 for r_idx, row_obj in enumerate(t_obj.rows):
+                     if row_obj.bbox[1] > (heading_top + 2):
+                         valid_indices.append(r_idx)
                      
-                     if not valid_indices:
-                         continue
+                 if not valid_indices:
+                     continue
                          
-                     # Now subset the extracted rows
-                     # rows is a list of lists.
-                     rows = [rows[i] for i in valid_indices]
-
-                cleaned_rows = []
-                for r in rows:
-                     if r: cleaned_rows.append([clean_cell(c) for c in r])
-                if not cleaned_rows: continue
-
-                maxcols = max(len(r) for r in cleaned_rows)
-                cleaned_rows = [r + [""] * (maxcols - len(r)) for r in cleaned_rows]
-
-                for r in cleaned_rows:
-                    row_text = " ".join(r).upper()
-                    row_text_clean = row_text.replace(" ", "")
-                    first_col = r[0].upper().strip()
-                    first_col_clean = first_col.replace(" ", "")
+                 # Now subset the extracted rows
+                 # rows is a list of lists.
+                 rows = [rows[i] for i in valid_indices]
+
+            cleaned_rows = []
+            for r in rows:
+                 if r: cleaned_rows.append([clean_cell(c) for c in r])
+            if not cleaned_rows: continue
+
+            maxcols = max(len(r) for r in cleaned_rows)
+            cleaned_rows = [r + [""] * (maxcols - len(r)) for r in cleaned_rows]
+
+            for r in cleaned_rows:
+                row_text = " ".join(r).upper()
+                row_text_clean = row_text.replace(" ", "")
+                first_col = r[0].upper().strip()
+                first_col_clean = first_col.replace(" ", "")
                     
-                    # 1. Detect start of ISGS section
-                    if "STATION" in row_text and "CONSTITUENTS" in row_text:
-                        continue 
-
-                    if "ISGS" == first_col or ("ISGS" in row_text and "TOTAL" not in row_text):
-                         current_section = "central_sector"
-                         start_collecting = True
-                         continue
-
-                    # Improved JV Detection
-                    if ("JOINT" in row_text and "VENTURE" in row_text and "TOTAL" not in row_text) or "JOINTVENTURE" in row_text.replace(" ", ""):
-                        current_section = "joint_venture"
-                        start_collecting = True
-                        print("DEBUG: Switch to Joint Venture section")
-                        continue
+                # 1. Detect start of ISGS section
+                if "STATION" in row_text and "CONSTITUENTS" in row_text:
+                    continue 
+
+                if "ISGS" == first_col or ("ISGS" in row_text and "TOTAL" not in row_text):
+                     current_section = "central_sector"
+                     start_collecting = True
+                     continue
+
+                # Improved JV Detection
+                if ("JOINT" in row_text and "VENTURE" in row_text and "TOTAL" not in row_text) or "JOINTVENTURE" in row_text.replace(" ", ""):
+                    current_section = "joint_venture"
+                    start_collecting = True
+                    print("DEBUG: Switch to Joint Venture section")
+                    continue
 
-                    # STOP CONDITIONS / SWITCH
-                    if "TOTAL" in row_text and "ISGS" in row_text:
-                        # Append total row
-                        if "central_sector" in tables_dict: tables_dict["central_sector"].append((p_idx+1, 0, r))
-                        # Switch to JV implicitly if not already
-                        current_section = "joint_venture" 
-                        continue 
-
-                    if "TOTAL" in row_text and ("JOINT" in row_text and "VENTURE" in row_text):
-                         if "joint_venture" in tables_dict: tables_dict["joint_venture"].append((p_idx+1, 0, r))
-                         # Strict stop here? Yes, usually JV is last for 3(B)
-                         return tables_dict
-
-                    # STRICT STOP for Renewable/State Sector/IPP
-                    # Matches "4. State Sector", "IPP", "Renewable", "Solar"
-                    if (first_col_clean.startswith("4(") or 
-                        ("STATE" in first_col and "SECTOR" in row_text) or 
-                        "RENEWABLE" in row_text or
-                        "SOLAR" in row_text or
-                        "WIND" in row_text or
-                        "NBUN" in row_text or 
-                        "BUN" in row_text or
-                        "IPP" in row_text or
-                        "INTER-REGIONAL" in row_text or 
-                        "VOLTAGEPROFILE" in row_text_clean):
-                        return tables_dict
-
-                    # COLLECT DATA
-                    if start_collecting and current_section:
-                        if "INST." in row_text and "CAPACITY" in row_text: continue
-                        if "MW" in row_text and "PEAK" in row_text: continue
+                # STOP CONDITIONS / SWITCH
+                if "TOTAL" in row_text and "ISGS" in row_text:
+                    # Append total row
+                    if "central_sector" in tables_dict: tables_dict["central_sector"].append((p_idx+1, 0, r))
+                    # Switch to JV implicitly if not already
+                    current_section = "joint_venture" 
+                    continue 
+
+                if "TOTAL" in row_text and ("JOINT" in row_text and "VENTURE" in row_text):
+                     if "joint_venture" in tables_dict: tables_dict["joint_venture"].append((p_idx+1, 0, r))
+                     # Strict stop here? Yes, usually JV is last for 3(B)
+                     return tables_dict
+
+                # STRICT STOP for Renewable/State Sector/IPP
+                # Matches "4. State Sector", "IPP", "Renewable", "Solar"
+                if (first_col_clean.startswith("4(") or 
+                    ("STATE" in first_col and "SECTOR" in row_text) or 
+                    "RENEWABLE" in row_text or
+                    "SOLAR" in row_text or
+                    "WIND" in row_text or
+                    "NBUN" in row_text or 
+                    "BUN" in row_text or
+                    "IPP" in row_text or
+                    "INTER-REGIONAL" in row_text or 
+                    "VOLTAGEPROFILE" in row_text_clean):
+                    return tables_dict
+
+                # COLLECT DATA
+                if start_collecting and current_section:
+                    if "INST." in row_text and "CAPACITY" in row_text: continue
+                    if "MW" in row_text and "PEAK" in row_text: continue
                         
-                        tables_dict[current_section].append((p_idx + 1, 0, r))
+                    tables_dict[current_section].append((p_idx + 1, 0, r))
                         
-                    # FALLBACK Central Sector
-                    # RESTRICT fallback: Only if we see "NTPC" or "NEYVELI" AND we haven't hit STOP conditions
-                    # And ensure we are not in Renewable section (checked above)
-                    if not start_collecting:
-                        if ("KUDGI" in first_col or "NEYVELI" in first_col or "NTPC" in first_col) and "SOLAR" not in row_text:
-                            current_section = "central_sector"
-                            start_collecting = True
-                            tables_dict[current_section].append((p_idx + 1, 0, r))
+                # FALLBACK Central Sector
+                # RESTRICT fallback: Only if we see "NTPC" or "NEYVELI" AND we haven't hit STOP conditions
+                # And ensure we are not in Renewable section (checked above)
+                if not start_collecting:
+                    if ("KUDGI" in first_col or "NEYVELI" in first_col or "NTPC" in first_col) and "SOLAR" not in row_text:
+                        current_section = "central_sector"
+                        start_collecting = True
+                        tables_dict[current_section].append((p_idx + 1, 0, r))
 
     return tables_dict
 
 # ---------------- Combined Command ----------------
+LEDGER_SOURCE = "SRLDC"
+# Bump when the 2A/2C/3B extraction logic changes so already-ingested PDFs are re-parsed.
+EXTRACTOR_VERSION = "1"
+
+
 class Command(BaseCommand):
     help = "Download SRLDC PSP PDF, extract tables 2(A), 2(C) (tabula) and 3(B) (pdfplumber), save JSON & DB"
 
     def add_arguments(self, parser):
         parser.add_argument('--date', type=str, help='Date for which to run the report, format: YYYY-MM-DD',
                             required=False)
+        parser.add_argument('--force', action='store_true',
+                            help='Re-extract and save even if the PDF is unchanged since the last run')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -1087,6 +1052,9 @@ class Command(BaseCommand):
 
         # helpers
         self.tabula_extractor = TabulaExtractor(self.write, self.logger)
+        self.cached_pdf = None
+        self.ledger = None
+        self.timer = None
 
     def write(self, message, level='info'):
         try:
@@ -1103,6 +1071,8 @@ class Command(BaseCommand):
     # Reuse the download_latest_srldc_pdf from your tabula script (keeps same naming)
     def download_latest_srldc_pdf(self, base_url="https://www.srldc.in/var/ftp/reports/psp/",
                                   base_download_dir="downloads", given_date=None):
+        # Describes this download only; never a previous call's PDF.
+        self.cached_pdf = None
         project_name = "SRLDC"
         base_download_dir = os.path.join(base_download_dir, project_name)
         os.makedirs(base_download_dir, exist_ok=True)
@@ -1128,45 +1098,21 @@ class Command(BaseCommand):
 
         full_url = f"{base_url}{directory_path_on_server}{file_name_on_server}"
 
-        if given_date:
-            now_str = f"{given_date}_{datetime.datetime.now().strftime('%H-%M-%S')}"
-        else:
-            now_str = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-
-        report_dir = os.path.join(base_download_dir, f"report_{now_str}")
+        # One folder per report date for the JSON outputs (merge_reports picks the newest report_<date>*).
+        # The PDF itself is read from the download cache, which keeps each version once.
+        folder_date = given_date or datetime.datetime.now().strftime('%Y-%m-%d')
+        report_dir = os.path.join(base_download_dir, f"report_{folder_date}")
         os.makedirs(report_dir, exist_ok=True)
-        self.write(f"📁 Checking/Created report directory: {report_dir}")
-
-        folder_date_part = now_str.split('_')[0] if now_str else None
-        try:
-            if folder_date_part:
-                file_date_str = datetime.datetime.strptime(folder_date_part, '%Y-%m-%d').strftime('%d%m%Y')
-            else:
-                file_date_str = current_date.strftime('%d%m%Y')
-        except Exception:
-            file_date_str = current_date.strftime('%d%m%Y')
-
-        local_pdf_filename = f"srldc_{file_date_str}.pdf"
-        local_file_path = os.path.join(report_dir, local_pdf_filename)
-
-        if os.path.exists(local_file_path):
-            self.write(self.style.NOTICE(
-                f"📄 PDF already exists locally for {current_date.strftime('%d-%m-%Y')} at {local_file_path}. Skipping download."))
-            pdf_path = local_file_path
-            report_date = current_date.date()
-            return pdf_path, report_date, report_dir
+        self.write(f"📁 Report directory: {report_dir}")
 
         self.write(f"🌐 Attempting to download from: {full_url}")
         try:
-            session = requests.Session()
-            session.mount('https://', LegacySSLAdapter())
-            response = session.get(full_url, stream=True, timeout=60)
-            response.raise_for_status()
-            with open(local_file_path, 'wb') as pdf_file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    pdf_file.write(chunk)
-            self.write(self.style.SUCCESS(f"✅ Successfully downloaded: {local_pdf_filename} to {report_dir}"))
-            pdf_path = local_file_path
+            self.cached_pdf = fetch_pdf(full_url, timeout=60)
+            if self.cached_pdf.not_modified:
+                self.write(f"📦 Not modified since last download, using cached copy: {file_name_on_server}")
+            else:
+                self.write(self.style.SUCCESS(f"✅ Successfully downloaded: {file_name_on_server}"))
+            pdf_path = self.cached_pdf.path
             report_date = current_date.date()
             return pdf_path, report_date, report_dir
         except requests.exceptions.HTTPError as e:
@@ -1201,14 +1147,45 @@ class Command(BaseCommand):
         return msg
 
     def handle(self, *args, **options):
-        # download pdf (same logic as your tabula script)
-        pdf_path, report_date, report_output_dir = self.download_latest_srldc_pdf(given_date=options.get('date'))
-
-        if pdf_path is None:
-            self.write(self.style.ERROR("No PDF report was successfully downloaded or found locally. Exiting."),
-                       level='error')
-            return
-
+        self.timer = StageTimer(LEDGER_SOURCE)
+        report_date = None
+        run_status = IngestionLedger.STATUS_FAILED
+        try:
+            # download pdf (same logic as your tabula script)
+            with self.timer.stage(STAGE_DOWNLOAD) as stage:
+                pdf_path, report_date, report_output_dir = self.download_latest_srldc_pdf(given_date=options.get('date'))
+                if pdf_path:
+                    stage['bytes'] = os.path.getsize(pdf_path)
+                    stage['not_modified'] = bool(self.cached_pdf and self.cached_pdf.not_modified)
+
+            if pdf_path is None:
+                self.write(self.style.ERROR("No PDF report was successfully downloaded or found locally. Exiting."),
+                           level='error')
+                return
+
+            pdf_sha256 = self.cached_pdf.sha256 if self.cached_pdf else file_sha256(pdf_path)
+            if not options.get('force') and is_unchanged(LEDGER_SOURCE, report_date, pdf_sha256, EXTRACTOR_VERSION):
+                self.write(f"⏭️ PDF unchanged since last successful ingest (sha256 {pdf_sha256[:12]}). "
+                           f"Skipping extraction and DB writes.", level='success')
+                run_status = STATUS_SKIPPED
+                return
+
+            self.ledger = LedgerRun(LEDGER_SOURCE, report_date, pdf_sha256, EXTRACTOR_VERSION,
+                                    ['Srldc2AData', 'Srldc2CData', 'SRLDC3BData'])
+            with self.timer.stage(STAGE_PDF_OPEN):
+                report = ParsedReport(pdf_path)
+            with report:
+                self.process_report(report, report_date, report_output_dir)
+
+            entry = self.ledger.finish()
+            run_status = entry.status
+            self.write(f"📒 Ledger: {entry} {entry.row_counts}", level='info')
+        finally:
+            self.timer.finish(report_date, run_status)
+            self.write(f"⏱️ Timings: {self.timer.summary()} (total {self.timer.total_seconds:.2f}s)", level='info')
+
+    def process_report(self, report, report_date, report_output_dir):
+        """Run the 2(A), 2(C) and 3(B) extractors over one opened report."""
         # 1. Initialize result container
         combined_json_data = {}
 
@@ -1218,7 +1195,8 @@ class Command(BaseCommand):
             
              # ------------------ NEW Table 2(A) Logic (pdfplumber) ------------------
                 self.write("🔍 Extracting Table 2(A) using pdfplumber heading anchor...", level='info')
-                df_2A = extract_table_2A_using_heading(pdf_path)
+                with self.timer.stage(f'{STAGE_EXTRACT}:2A'):
+                    df_2A = extract_table_2A_using_heading(report)
 
                 if df_2A is None:
                     self.write("❌ Table 2(A) NOT FOUND via heading anchor.", level='warning')
@@ -1226,6 +1204,7 @@ class Command(BaseCommand):
                     self.write("✅ Table 2(A) FOUND via heading anchor.", level='success')
 
                     try:
+                        normalize_started = time.perf_counter()
                         # ---- FIX HEADER (Handle 2-row header) ----
                         # Row 0 and Row 1 are headers. We consolidate them to identify columns correctly.
                         # This prevents "State's Control Area..." from being confused with "State".
@@ -1318,30 +1297,42 @@ class Command(BaseCommand):
                             # ================= SAVE TO DB =================
                             # ================= SAVE TO DB ================= 
                             # Updated column mapping to include net_sch, demand_met as requested
+                            rows_2A = []
                             for _, row in df_2A.iterrows():
+                                rows_2A.append({
+                                    "report_date": report_date,
+                                    "state": row["state"],
+                                    "thermal": self.tabula_extractor._safe_float(row.get("thermal")),
+                                    "hydro": self.tabula_extractor._safe_float(row.get("hydro")),
+                                    "gas_naptha_diesel": self.tabula_extractor._safe_float(row.get("gas_naptha_diesel")),
+                                    "solar": self.tabula_extractor._safe_float(row.get("solar")),
+                                    "wind": self.tabula_extractor._safe_float(row.get("wind")),
+                                    "others": self.tabula_extractor._safe_float(row.get("others")),
+                                    "net_sch": self.tabula_extractor._safe_float(row.get("net_sch")),
+                                    "drawal": self.tabula_extractor._safe_float(row.get("drawal")),
+                                    "ui": self.tabula_extractor._safe_float(row.get("ui")),
+                                    "availability": self.tabula_extractor._safe_float(row.get("availability")),
+                                    "demand_met": self.tabula_extractor._safe_float(row.get("demand_met")),
+                                    "shortage": self.tabula_extractor._safe_float(row.get("shortage")),
+                                })
+
+                            self.timer.record(f'{STAGE_NORMALIZE}:2A', time.perf_counter() - normalize_started, rows=len(rows_2A))
+
+                            try:
+                                with self.timer.stage(f'{STAGE_DB_WRITE}:Srldc2AData', rows=len(rows_2A)):
+                                    inserted, updated, unchanged = bulk_upsert(Srldc2AData, rows_2A, ('report_date', 'state'))
+                                self.ledger.saved('Srldc2AData', inserted, updated, unchanged)
+                                self.write(f"✅ Srldc2AData: {inserted} inserted, {updated} updated, {unchanged} unchanged", level='success')
+                            except Exception as e:
+                                self.ledger.failed('Srldc2AData', e)
+                                self.write(f"❌ Error saving Table 2A rows to DB: {e}", level='error')
+                            else:
                                 try:
-                                    Srldc2AData.objects.update_or_create(
-                                        report_date=report_date,
-                                        state=row["state"],
-                                        defaults={
-                                            "thermal": self.tabula_extractor._safe_float(row.get("thermal")),
-                                            "hydro": self.tabula_extractor._safe_float(row.get("hydro")),
-                                            "gas_naptha_diesel": self.tabula_extractor._safe_float(row.get("gas_naptha_diesel")),
-                                            "solar": self.tabula_extractor._safe_float(row.get("solar")),
-                                            "wind": self.tabula_extractor._safe_float(row.get("wind")),
-                                            "others": self.tabula_extractor._safe_float(row.get("others")),
-                                            "net_sch": self.tabula_extractor._safe_float(row.get("net_sch")),
-                                            "drawal": self.tabula_extractor._safe_float(row.get("drawal")),
-                                            "ui": self.tabula_extractor._safe_float(row.get("ui")),
-                                            "availability": self.tabula_extractor._safe_float(row.get("availability")),
-                                            "demand_met": self.tabula_extractor._safe_float(row.get("demand_met")),
-                                            "shortage": self.tabula_extractor._safe_float(row.get("shortage")),
-                                        }
-                                    )
+                                    with self.timer.stage(STAGE_AGGREGATES):
+                                        days, months = refresh_aggregates(LEDGER_SOURCE, report_date)
+                                    self.write(f"📊 Aggregates refreshed: {days} daily, {months} monthly rows", level='info')
                                 except Exception as e:
-                                    self.write(f"❌ Error saving Table 2A row (State: {row.get('state')}): {e}", level='error')
-                            
-                            self.write(f"✅ Saved/Updated rows to Srldc2AData DB", level='success')
+                                    self.write(f"⚠️ Could not refresh aggregates: {e}", level='warning')
                         else:
                              self.write("⚠️ 'state' column missing in 2(A) dataframe after mapping.", level='warning')
 
@@ -1351,7 +1342,8 @@ class Command(BaseCommand):
 
                 # ------------------ NEW Table 2(C) Logic (pdfplumber) ------------------
                 self.write("🔍 Extracting Table 2(C) using pdfplumber heading anchor...", level='info')
-                df_2C = extract_table_2C_using_heading(pdf_path)
+                with self.timer.stage(f'{STAGE_EXTRACT}:2C'):
+                    df_2C = extract_table_2C_using_heading(report)
 
                 if df_2C is None:
                     self.write("❌ Table 2(C) NOT FOUND via heading anchor.", level='warning')
@@ -1377,6 +1369,7 @@ class Command(BaseCommand):
                         # 11: Min ACE (ACE(MW))
                         # 12: Time
                         
+                        normalize_started = time.perf_counter()
                         states_found = []
                         processed_2c = []
                         
@@ -1437,19 +1430,25 @@ class Command(BaseCommand):
                                 
                                 processed_2c.append(rec)
 
-                                # DB Save
-                                try:
-                                     Srldc2CData.objects.update_or_create(
-                                         report_date=report_date,
-                                         state=state_norm,
-                                         defaults={k:v for k,v in rec.items() if k!='state'}
-                                     )
-                                except Exception as e:
-                                     self.write(f"❌ Error saving Table 2C row to DB: {e}", level='error')
-
                             except Exception as e:
                                 self.write(f"❌ Error row 2(C): {row} -> {e}", level='error')
 
+                        self.timer.record(f'{STAGE_NORMALIZE}:2C', time.perf_counter() - normalize_started, rows=len(processed_2c))
+
+                        # DB Save
+                        try:
+                            with self.timer.stage(f'{STAGE_DB_WRITE}:Srldc2CData', rows=len(processed_2c)):
+                                inserted, updated, unchanged = bulk_upsert(
+                                    Srldc2CData,
+                                    [{"report_date": report_date, **rec} for rec in processed_2c],
+                                    ('report_date', 'state'),
+                                )
+                            self.ledger.saved('Srldc2CData', inserted, updated, unchanged)
+                            self.write(f"✅ Srldc2CData: {inserted} inserted, {updated} updated, {unchanged} unchanged", level='success')
+                        except Exception as e:
+                            self.ledger.failed('Srldc2CData', e)
+                            self.write(f"❌ Error saving Table 2C rows to DB: {e}", level='error')
+
                         combined_json_data['srldc_table_2C'] = processed_2c
                         self.write(f"✅ Table 2(C) processed. {len(processed_2c)} rows. States: {states_found}", level='info')
 
@@ -1467,7 +1466,7 @@ class Command(BaseCommand):
         try:
             self.write("🔍 Extracting Table 3(B) using pdfplumber heading anchor...", level='info')
             
-            report_info = extract_report_dates(pdf_path)
+            report_info = extract_report_dates(report)
             # 🔎 DEBUG: compare PDF internal date vs forced date
             self.write(
                 f"PDF internal date: {report_info.get('report_date')} | "
@@ -1485,7 +1484,8 @@ class Command(BaseCommand):
             self.write(f"Reporting DATETIME (3B extraction): {report_info.get('reporting_datetime')}", level='info')
 
             # Using the new layout-based extractor
-            tables_3b = extract_table_3B_using_heading(pdf_path)
+            with self.timer.stage(f'{STAGE_EXTRACT}:3B'):
+                tables_3b = extract_table_3B_using_heading(report)
             
             central_cnt = len(tables_3b["central_sector"])
             jv_cnt = len(tables_3b["joint_venture"])
@@ -1496,9 +1496,11 @@ class Command(BaseCommand):
                 self.write(f"✅ Table 3(B) FOUND via heading anchor. Central: {central_cnt}, JV: {jv_cnt}", level='success')
 
             # Normalize (parsing numbers)
-            central_3b = normalize_rows_for_table_3b(tables_3b.get("central_sector", []), report_info)
-            jv_3b = normalize_rows_for_table_3b(tables_3b.get("joint_venture", []), report_info)
-            combined_3b = central_3b + jv_3b
+            with self.timer.stage(f'{STAGE_NORMALIZE}:3B') as stage:
+                central_3b = normalize_rows_for_table_3b(tables_3b.get("central_sector", []), report_info)
+                jv_3b = normalize_rows_for_table_3b(tables_3b.get("joint_venture", []), report_info)
+                combined_3b = central_3b + jv_3b
+                stage['rows'] = len(combined_3b)
 
             # JSON snapshot
             snapshot_3b = {
@@ -1520,74 +1522,76 @@ class Command(BaseCommand):
 
             combined_master_path = os.path.join(report_output_dir, f"srldc_combined_{report_date}.json")
             try:
-                with open(combined_master_path, 'w', encoding='utf-8') as mf:
+                with self.timer.stage(STAGE_JSON_WRITE), open(combined_master_path, 'w', encoding='utf-8') as mf:
                     json.dump(final_payload, mf, indent=4, ensure_ascii=False, default=str)
                 self.write(f"✅ Final combined JSON saved: {combined_master_path}", level='success')
             except Exception as e:
                 self.write(f"❌ Failed to write final combined JSON: {e}", level='error')
 
             # Save 3B to DB
-            saved = 0
-            with transaction.atomic():
-                for rec in combined_3b:
-                    # parse report_date for DB
-                    if isinstance(report_info.get("report_date"), str):
-                        report_date_parsed = _try_parse_date_token(report_info.get("report_date"))
-                    else:
-                        report_date_parsed = report_info.get("report_date")
+            # parse report_date for DB
+            if isinstance(report_info.get("report_date"), str):
+                report_date_parsed = _try_parse_date_token(report_info.get("report_date"))
+            else:
+                report_date_parsed = report_info.get("report_date")
 
-                    # parse reporting datetime
+            # parse reporting datetime
+            reporting_dt = None
+            if report_info.get("reporting_datetime"):
+                try:
+                    naive = _dt.strptime(report_info.get("reporting_datetime"), "%Y-%m-%d %H:%M")
+                    if settings.USE_TZ:
+                        reporting_dt = timezone.make_aware(naive)
+                    else:
+                        reporting_dt = naive
+                except Exception:
                     reporting_dt = None
-                    if report_info.get("reporting_datetime"):
-                        try:
-                            naive = _dt.strptime(report_info.get("reporting_datetime"), "%Y-%m-%d %H:%M")
-                            if settings.USE_TZ:
-                                reporting_dt = timezone.make_aware(naive)
-                            else:
-                                reporting_dt = naive
-                        except Exception:
-                            reporting_dt = None
-
-                    # 🔒 FIX: reporting_datetime must never be NULL
-                    # Frontend/API treats NULL as "no data"
-                    if reporting_dt is None and report_date_parsed:
-                        naive_dt = _dt.combine(report_date_parsed, _dt.min.time())
-                        if settings.USE_TZ:
-                            reporting_dt = timezone.make_aware(naive_dt)
-                        else:
-                            reporting_dt = naive_dt
 
-                    def to_dec(v):
-                        if v is None: return None
-                        try: return Decimal(str(v))
-                        except: return None
-                    try:
-                        obj, created = SRLDC3BData.objects.update_or_create(
-                            station=rec.get("station"),
-                            report_date=report_date_parsed,
-                            defaults={
-                                "reporting_datetime": reporting_dt,
-                                "installed_capacity_mw": rec.get("installed_capacity_mw"),
-                                "peak_1900_mw": rec.get("peak_1900_mw"),
-                                "offpeak_0300_mw": rec.get("offpeak_0300_mw"),
-                                "day_peak_mw": rec.get("day_peak_mw"),
-                                "day_peak_hrs": rec.get("day_peak_hrs"),
-                                "min_generation_mw": to_dec(rec.get("min_generation_mw")),
-                                "min_generation_hrs": rec.get("min_generation_hrs"),
-                                "gross_energy_mu": to_dec(rec.get("gross_energy_mu")),
-                                "net_energy_mu": to_dec(rec.get("net_energy_mu")),
-                                "avg_mw": to_dec(rec.get("avg_mw")),
-                                "row_type": rec.get("row_type"),
-                                "source_page": rec.get("source_page"),
-                                "source_table_index": rec.get("source_table_index"),
-                            }
-                        )
-                        saved += 1
-                    except Exception as e:
-                        self.write(f"❌ DB save error for station '{rec.get('station')}' : {e}", level='error')
-                        self.write(traceback.format_exc(), level='error')
+            # 🔒 FIX: reporting_datetime must never be NULL
+            # Frontend/API treats NULL as "no data"
+            if reporting_dt is None and report_date_parsed:
+                naive_dt = _dt.combine(report_date_parsed, _dt.min.time())
+                if settings.USE_TZ:
+                    reporting_dt = timezone.make_aware(naive_dt)
+                else:
+                    reporting_dt = naive_dt
+
+            def to_dec(v):
+                if v is None: return None
+                try: return Decimal(str(v))
+                except: return None
+
+            rows_3b = []
+            for rec in combined_3b:
+                rows_3b.append({
+                    "station": rec.get("station"),
+                    "report_date": report_date_parsed,
+                    "reporting_datetime": reporting_dt,
+                    "installed_capacity_mw": rec.get("installed_capacity_mw"),
+                    "peak_1900_mw": rec.get("peak_1900_mw"),
+                    "offpeak_0300_mw": rec.get("offpeak_0300_mw"),
+                    "day_peak_mw": rec.get("day_peak_mw"),
+                    "day_peak_hrs": rec.get("day_peak_hrs"),
+                    "min_generation_mw": to_dec(rec.get("min_generation_mw")),
+                    "min_generation_hrs": rec.get("min_generation_hrs"),
+                    "gross_energy_mu": to_dec(rec.get("gross_energy_mu")),
+                    "net_energy_mu": to_dec(rec.get("net_energy_mu")),
+                    "avg_mw": to_dec(rec.get("avg_mw")),
+                    "row_type": rec.get("row_type"),
+                    "source_page": rec.get("source_page"),
+                    "source_table_index": rec.get("source_table_index"),
+                })
 
-            self.write(f"Saved {saved} rows to SRLDC3BData for {report_date}", level='success')
+            try:
+                with self.timer.stage(f'{STAGE_DB_WRITE}:SRLDC3BData', rows=len(rows_3b)):
+                    inserted, updated, unchanged = bulk_upsert(SRLDC3BData, rows_3b, ('report_date', 'station'))
+                self.ledger.saved('SRLDC3BData', inserted, updated, unchanged)
+                self.write(f"Saved {inserted + updated} rows to SRLDC3BData for {report_date} "
+                           f"({inserted} inserted, {updated} updated, {unchanged} unchanged)", level='success')
+            except Exception as e:
+                self.ledger.failed('SRLDC3BData', e)
+                self.write(f"❌ DB save error for SRLDC3BData: {e}", level='error')
+                self.write(traceback.format_exc(), level='error')
 
         except Exception as e:
             self.write(f"❌ 3B extraction failed: {e}", level='error')
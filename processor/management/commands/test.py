@@ -19,31 +19,7 @@ from django.db import transaction
 
 # ---- Models: ensure these names match your app models ----
 from processor.models import Srldc2AData, Srldc2CData, SRLDC3BData
-# ---- SSL adapter used by your tabula downloader session (keeps legacy support) ----
-import ssl
-from requests.adapters import HTTPAdapter
-from urllib3.util.ssl_ import create_urllib3_context
-from urllib3.poolmanager import PoolManager
-
-
-class LegacySSLAdapter(HTTPAdapter):
-    def init_poolmanager(self, connections, maxsize, block=False):
-        ctx = create_urllib3_context()
-        ctx.load_default_certs()
-        # Enable "Legacy Server Connect" (0x4) to allow unsafe renegotiation
-        ctx.options |= 0x4
-        # (Optional) Lower security level to allow older ciphers often used by gov sites
-        try:
-            ctx.set_ciphers('DEFAULT@SECLEVEL=1')
-        except Exception:
-            pass
-
-        self.poolmanager = PoolManager(
-            num_pools=connections,
-            maxsize=maxsize,
-            block=block,
-            ssl_context=ctx
-        )
+from processor import http
 
 
 # ----------------- Shared helpers -----------------
@@ -1330,9 +1306,7 @@ class Command(BaseCommand):
 
         self.write(f"🌐 Attempting to download from: {full_url}")
         try:
-            session = requests.Session()
-            session.mount('https://', LegacySSLAdapter())
-            response = session.get(full_url, stream=True, timeout=60)
+            response = http.get(full_url, stream=True, timeout=60)
             response.raise_for_status()
             with open(local_file_path, 'wb') as pdf_file:
                 for chunk in response.iter_content(chunk_size=8192):
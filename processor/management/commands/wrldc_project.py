@@ -1,16 +1,27 @@
 import requests
 import datetime
 import os
-from tabula.io import read_pdf
+from processor.tabula_backend import read_pdf
 import pandas as pd
 import json
+import time
 import logging
 from django.core.management.base import BaseCommand, CommandError
-from ...models import Wrldc2AData, Wrldc2CData
+from ...models import IngestionLedger, Wrldc2AData, Wrldc2CData
+from ...upsert import bulk_upsert
+from ...download_cache import fetch_pdf
+from ...ledger import LedgerRun, file_sha256, is_unchanged
+from ...aggregates import refresh_aggregates
+from ...timing import (StageTimer, STATUS_SKIPPED, STAGE_DOWNLOAD, STAGE_EXTRACT, STAGE_NORMALIZE, STAGE_DB_WRITE,
+                       STAGE_JSON_WRITE, STAGE_AGGREGATES)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+LEDGER_SOURCE = "WRLDC"
+# Bump when the 2A/2C extraction logic changes so already-ingested PDFs are re-parsed.
+EXTRACTOR_VERSION = "1"
+
 
 class Command(BaseCommand):
     help = 'Download the new report and extract tables 2(A) and 2(C) to a single JSON file and save to DB'
@@ -32,6 +43,11 @@ class Command(BaseCommand):
             help='Date for which to run the report, format: DD-MM-YYYY',
             required=False
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-extract and save even if the PDF is unchanged since the last run'
+        )
     def _safe_value(self, value, is_numeric=False):
         """
         Keeps dash '-' as-is, returns None for real empty values,
@@ -127,13 +143,15 @@ class Command(BaseCommand):
         self.stdout.write("🔍 Extracting tables from PDF...")
 
         try:
-            tables = read_pdf(
-                pdf_path,
-                pages='all',
-                multiple_tables=True,
-                pandas_options={'header': None},
-                lattice=True
-            )
+            with self.timer.stage(f'{STAGE_EXTRACT}:tabula') as stage:
+                tables = read_pdf(
+                    pdf_path,
+                    pages='all',
+                    multiple_tables=True,
+                    pandas_options={'header': None},
+                    lattice=True
+                )
+                stage['tables'] = len(tables or [])
         except Exception as e:
             raise CommandError(f"❌ Tabula extraction failed: {e}")
 
@@ -158,16 +176,18 @@ class Command(BaseCommand):
             'Total', 'Net SCH', 'Drawal', 'UI', 'Availability', 'Requirement', 'Shortage', 'Consumption'
         ]
 
-        sub_2A_raw, _ = self.extract_subtable_by_markers(
-            all_content_df_cleaned,
-            start_marker=start_marker_2A,
-            end_marker=end_marker_2A,
-            header_row_count=2, # Header is typically 2 rows
-            debug_table_name="Table 2(A)"
-        )
+        with self.timer.stage(f'{STAGE_EXTRACT}:2A'):
+            sub_2A_raw, _ = self.extract_subtable_by_markers(
+                all_content_df_cleaned,
+                start_marker=start_marker_2A,
+                end_marker=end_marker_2A,
+                header_row_count=2, # Header is typically 2 rows
+                debug_table_name="Table 2(A)"
+            )
 
 
         if not sub_2A_raw.empty:
+            normalize_started = time.perf_counter()
             self.stdout.write(self.style.NOTICE("\n--- RAW DataFrame for Table 2(A) (before processing) ---"))
             self.stdout.write(str(sub_2A_raw))
             self.stdout.write(self.style.NOTICE("---------------------------------------------------------"))
@@ -219,46 +239,59 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f"✅ Table 2(A) extracted for combined JSON."))
 
 
+            rows_2A = []
             for index, row_data in sub_2A_final.iterrows():
+                rows_2A.append({
+                    'report_date': report_date,
+                    'state': row_data['state'],
+                    'thermal': row_data.get('thermal'),
+                    'hydro': row_data.get('hydro'),
+                    'gas': row_data.get('gas'),
+                    'solar': row_data.get('solar'),
+                    'wind': row_data.get('wind'),
+                    'others': row_data.get('others'),
+                    'total': row_data.get('total'),
+                    'net_sch': row_data.get('net_sch'),
+                    'drawal': row_data.get('drawal'),
+                    'ui': row_data.get('ui'),
+                    'availability': row_data.get('availability'),
+                    'requirement': row_data.get('requirement'),
+                    'shortage': row_data.get('shortage'),
+                    'consumption': row_data.get('consumption'),
+                })
+            self.timer.record(f'{STAGE_NORMALIZE}:2A', time.perf_counter() - normalize_started, rows=len(rows_2A))
+            try:
+                with self.timer.stage(f'{STAGE_DB_WRITE}:Wrldc2AData', rows=len(rows_2A)):
+                    inserted, updated, unchanged = bulk_upsert(Wrldc2AData, rows_2A, ('report_date', 'state'))
+                self.ledger.saved('Wrldc2AData', inserted, updated, unchanged)
+                self.stdout.write(self.style.SUCCESS(f"✅ Table 2(A) data saved to database: {inserted} created, {updated} updated, {unchanged} unchanged."))
+            except Exception as e:
+                self.ledger.failed('Wrldc2AData', e)
+                self.stdout.write(self.style.ERROR(f"❌ Error saving Table 2A rows to DB: {e}"))
+            else:
                 try:
-                    Wrldc2AData.objects.update_or_create(
-                        report_date=report_date,
-                        state=row_data['state'],
-                        defaults={
-                            'thermal': row_data.get('thermal'),
-                            'hydro': row_data.get('hydro'),
-                            'gas': row_data.get('gas'),
-                            'solar': row_data.get('solar'),
-                            'wind': row_data.get('wind'),
-                            'others': row_data.get('others'),
-                            'total': row_data.get('total'),
-                            'net_sch': row_data.get('net_sch'),
-                            'drawal': row_data.get('drawal'),
-                            'ui': row_data.get('ui'),
-                            'availability': row_data.get('availability'),
-                            'requirement': row_data.get('requirement'),
-                            'shortage': row_data.get('shortage'),
-                            'consumption': row_data.get('consumption'),
-                        }
-                    )
+                    with self.timer.stage(STAGE_AGGREGATES):
+                        days, months = refresh_aggregates(LEDGER_SOURCE, report_date)
+                    self.stdout.write(f"📊 Aggregates refreshed: {days} daily, {months} monthly rows")
                 except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"❌ Error saving Table 2A row to DB (State: {row_data.get('state')}): {e}"))
-            self.stdout.write(self.style.SUCCESS(f"✅ Table 2(A) data saved to database."))
+                    self.stdout.write(self.style.WARNING(f"⚠️ Could not refresh aggregates: {e}"))
         else:
             self.stdout.write(self.style.WARNING("⚠️ Table 2(A) not found or extraction failed."))
 
 
         # --- Extract Table 2(C) with a more robust, manual column assignment approach ---
-        sub_2C_raw, _ = self.extract_subtable_by_markers(
-            all_content_df_cleaned,
-            start_marker=r"2\(C\)\s*/\s*State's Demand Met in MW.*",
-            end_marker=r"3\(A\)\s*StateEntities\s*Generation:",
-            header_row_count=2,
-            debug_table_name="Table 2(C)"
-        )
+        with self.timer.stage(f'{STAGE_EXTRACT}:2C'):
+            sub_2C_raw, _ = self.extract_subtable_by_markers(
+                all_content_df_cleaned,
+                start_marker=r"2\(C\)\s*/\s*State's Demand Met in MW.*",
+                end_marker=r"3\(A\)\s*StateEntities\s*Generation:",
+                header_row_count=2,
+                debug_table_name="Table 2(C)"
+            )
 
 
         if not sub_2C_raw.empty:
+            normalize_started = time.perf_counter()
             self.stdout.write(self.style.NOTICE("\n--- RAW DataFrame for Table 2(C) (before processing) ---"))
             self.stdout.write(str(sub_2C_raw))
             self.stdout.write(self.style.NOTICE("---------------------------------------------------------"))
@@ -326,24 +359,29 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f"✅ Table 2(C) extracted for combined JSON."))
 
 
+            rows_2C = []
             for index, row_data in sub_2C_final.iterrows():
-                try:
-                    Wrldc2CData.objects.update_or_create(
-                        report_date=report_date, state=row_data['state'],
-                        defaults={
-                            'max_demand_day': row_data.get('max_demand_day'),
-                            'time': row_data.get('time'),
-                            'shortage_max_demand': row_data.get('shortage_max_demand'),
-                            'req_max_demand': row_data.get('req_max_demand'),
-                            'ace_max': row_data.get('ace_max'),
-                            'time_ace_max': row_data.get('time_ace_max'),
-                            'ace_min': row_data.get('ace_min'),
-                            'time_ace_min': row_data.get('time_ace_min'),
-                        }
-                    )
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"❌ Error saving Table 2C row to DB (State: {row_data.get('state')}): {e}"))
-            self.stdout.write(self.style.SUCCESS(f"✅ Table 2(C) data saved to database."))
+                rows_2C.append({
+                    'report_date': report_date,
+                    'state': row_data['state'],
+                    'max_demand_day': row_data.get('max_demand_day'),
+                    'time': row_data.get('time'),
+                    'shortage_max_demand': row_data.get('shortage_max_demand'),
+                    'req_max_demand': row_data.get('req_max_demand'),
+                    'ace_max': row_data.get('ace_max'),
+                    'time_ace_max': row_data.get('time_ace_max'),
+                    'ace_min': row_data.get('ace_min'),
+                    'time_ace_min': row_data.get('time_ace_min'),
+                })
+            self.timer.record(f'{STAGE_NORMALIZE}:2C', time.perf_counter() - normalize_started, rows=len(rows_2C))
+            try:
+                with self.timer.stage(f'{STAGE_DB_WRITE}:Wrldc2CData', rows=len(rows_2C)):
+                    inserted, updated, unchanged = bulk_upsert(Wrldc2CData, rows_2C, ('report_date', 'state'))
+                self.ledger.saved('Wrldc2CData', inserted, updated, unchanged)
+                self.stdout.write(self.style.SUCCESS(f"✅ Table 2(C) data saved to database: {inserted} created, {updated} updated, {unchanged} unchanged."))
+            except Exception as e:
+                self.ledger.failed('Wrldc2CData', e)
+                self.stdout.write(self.style.ERROR(f"❌ Error saving Table 2C rows to DB: {e}"))
         else:
             self.stdout.write(self.style.WARNING("⚠️ Table 2(C) not found or extraction failed."))
 
@@ -365,13 +403,15 @@ class Command(BaseCommand):
                     json_date_str = datetime.datetime.now().strftime('%d%m%Y')
 
             combined_json_path = os.path.join(output_dir, f'wrldc_{json_date_str}.json')
-            with open(combined_json_path, 'w', encoding='utf-8') as f:
+            with self.timer.stage(STAGE_JSON_WRITE), open(combined_json_path, 'w', encoding='utf-8') as f:
                 json.dump(combined_json_data, f, indent=4, ensure_ascii=False)
             self.stdout.write(self.style.SUCCESS(f"✅ Combined tables saved to: {combined_json_path}"))
         else:
             self.stdout.write(self.style.WARNING("⚠️ No tables were successfully extracted to create a combined JSON file."))
 
     def download_latest_pdf(self, new_base_url, base_download_dir="downloads",given_date = None):
+        # Describes this download only; never a previous call's PDF.
+        self.cached_pdf = None
         project_name = "WRLDC"
         base_download_dir = os.path.join(base_download_dir, project_name)
         os.makedirs(base_download_dir, exist_ok=True)
@@ -391,52 +431,15 @@ class Command(BaseCommand):
         # We'll still try today then yesterday on the server to download
         # dates_to_try = [today, today - datetime.timedelta(days=1)]
 
-        # Create report_dir using current_date when given_date specified, else use now (timestamp)
-        # This preserves original logic for selecting which date to download, but makes folder/file names consistent.
         current_date = today
-        if given_date:
-            # Use the original given_date string for naming (so folder & filenames match what user passed)
-            # while keeping the original subtraction logic used for deciding which PDF to download.
-            try:
-                # ensure given_date is in YYYY-MM-DD format (user supplied)
-                folder_date_part = datetime.datetime.strptime(given_date, "%Y-%m-%d").strftime('%Y-%m-%d')
-            except Exception:
-                # fallback to current_date if given_date parsing fails (keeps original logic intact)
-                folder_date_part = current_date.strftime('%Y-%m-%d')
-            now_time_part = datetime.datetime.now().strftime('%H-%M-%S')
-            now_str = f"{folder_date_part}_{now_time_part}"
-        else:
-            # keep original behavior: folder name is current timestamp
-            now_str = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
 
-        report_dir = os.path.join(base_download_dir, f"report_{now_str}")
-        # create once here; we'll also ensure it exists in each loop iteration before writing
+        # One folder per report date for the JSON outputs (merge_reports picks the newest report_<date>*).
+        # The PDF itself is read from the download cache, which keeps each version once.
+        folder_date = given_date or datetime.datetime.now().strftime('%Y-%m-%d')
+        report_dir = os.path.join(base_download_dir, f"report_{folder_date}")
         os.makedirs(report_dir, exist_ok=True)
-        self.stdout.write(f"📁 Checking/Created report directory: {report_dir}")
-
-        # --- Use the consistent local filename based on the folder date (pattern requested: wrldc_DDMMYYYY.pdf) ---
-        # Convert folder date part (YYYY-MM-DD) to DDMMYYYY for filenames
-        folder_date_candidate = now_str.split('_')[0] if now_str else None
-        try:
-            if folder_date_candidate:
-                file_date_str = datetime.datetime.strptime(folder_date_candidate, '%Y-%m-%d').strftime('%d%m%Y')
-            else:
-                file_date_str = current_date.strftime('%d%m%Y')
-        except Exception:
-            file_date_str = current_date.strftime('%d%m%Y')
-
-        forced_local_pdf_filename = f"wrldc_{file_date_str}.pdf"
-        local_file_path = os.path.join(report_dir, forced_local_pdf_filename)
+        self.stdout.write(f"📁 Report directory: {report_dir}")
 
-        # If a file for today already exists locally, return it immediately (report_date will be today)
-        if os.path.exists(local_file_path):
-            self.stdout.write(self.style.NOTICE(f"📄 PDF already exists locally for {current_date.strftime('%d-%m-%Y')} at {local_file_path}. Skipping download."))
-            pdf_path = local_file_path
-            report_date = current_date.date()
-            return pdf_path, report_date, report_dir
-
-        # Attempt downloads (try today then yesterday) but always save using folder-date-based filename
-        # for current_date in dates_to_try:
         year = current_date.year
         month_name = current_date.strftime('%B')
         day = current_date.day
@@ -449,17 +452,13 @@ class Command(BaseCommand):
         logging.info(f"Attempting to download from: {full_url}")
 
         try:
-            # ensure the directory exists right before writing (handles case where it was removed on prior 404)
-            os.makedirs(report_dir, exist_ok=True)
-
-            response = requests.get(full_url, stream=True, timeout=30)
-            response.raise_for_status()
-            with open(local_file_path, 'wb') as pdf_file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    pdf_file.write(chunk)
-            self.stdout.write(self.style.SUCCESS(f"✅ Successfully downloaded: {forced_local_pdf_filename} to {report_dir}"))
-            logging.info(f"Successfully downloaded: {local_file_path} to {report_dir}")
-            pdf_path = local_file_path
+            self.cached_pdf = fetch_pdf(full_url, timeout=30)
+            if self.cached_pdf.not_modified:
+                self.stdout.write(f"📦 Not modified since last download, using cached copy: {file_name_on_server}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✅ Successfully downloaded: {file_name_on_server}"))
+            logging.info(f"Successfully downloaded: {full_url} to {self.cached_pdf.path}")
+            pdf_path = self.cached_pdf.path
             # Force report_date to current_date (so DB and JSON filenames reflect this date)
             report_date = current_date.date()
             return pdf_path, report_date, report_dir
@@ -499,21 +498,51 @@ class Command(BaseCommand):
         return None, None, None
     
     def handle(self, *args, **options):
-        if "JAVA_HOME" not in os.environ:
-            self.stdout.write(self.style.WARNING("JAVA_HOME environment variable not set. tabula-py may fail."))
-
-        new_url = "https://reporting.wrldc.in:8081/PSP/"
-
-        # The download function will try today then yesterday but will save the file named for today.
-        pdf_path, report_content_date, report_output_dir = self.download_latest_pdf(new_url, given_date=options.get('date'))
-
-        if pdf_path is None:
-            ...
-        # Use the actual date returned by downloader (date of the PDF we downloaded)
-        report_date = report_content_date
-
-
-        # Pass the new date to extraction/saving routine
-        self.extract_tables_from_pdf(pdf_path, report_output_dir, report_date)
+        self.timer = StageTimer(LEDGER_SOURCE)
+        report_date = None
+        run_status = IngestionLedger.STATUS_FAILED
+        try:
+            if "JAVA_HOME" not in os.environ:
+                self.stdout.write(self.style.WARNING("JAVA_HOME environment variable not set. tabula-py may fail."))
+
+            new_url = "https://reporting.wrldc.in:8081/PSP/"
+
+            # The download function will try today then yesterday but will save the file named for today.
+            with self.timer.stage(STAGE_DOWNLOAD) as stage:
+                pdf_path, report_content_date, report_output_dir = self.download_latest_pdf(new_url, given_date=options.get('date'))
+                if pdf_path:
+                    stage['bytes'] = os.path.getsize(pdf_path)
+                    stage['not_modified'] = bool(self.cached_pdf and self.cached_pdf.not_modified)
+
+            if pdf_path is None:
+                # Not published yet (404) or the download failed: nothing to ingest this run.
+                self.stdout.write(self.style.WARNING("⚠️ No WRLDC PDF available. Skipping extraction and DB writes."))
+                run_status = STATUS_SKIPPED
+                return
+            # Use the actual date returned by downloader (date of the PDF we downloaded)
+            report_date = report_content_date
+
+
+            pdf_sha256 = self.cached_pdf.sha256 if self.cached_pdf else file_sha256(pdf_path)
+            if not options.get('force') and is_unchanged(LEDGER_SOURCE, report_date, pdf_sha256, EXTRACTOR_VERSION):
+                self.stdout.write(self.style.SUCCESS(f"⏭️ PDF unchanged since last successful ingest (sha256 {pdf_sha256[:12]}). Skipping extraction and DB writes."))
+                run_status = STATUS_SKIPPED
+                return
+
+            self.ledger = LedgerRun(LEDGER_SOURCE, report_date, pdf_sha256, EXTRACTOR_VERSION,
+                                    ['Wrldc2AData', 'Wrldc2CData'])
+            try:
+                # Pass the new date to extraction/saving routine
+                self.extract_tables_from_pdf(pdf_path, report_output_dir, report_date)
+            except CommandError as e:
+                self.ledger.failed('extraction', e)
+                raise
+            finally:
+                entry = self.ledger.finish()
+                run_status = entry.status
+                self.stdout.write(f"📒 Ledger: {entry} {entry.row_counts}")
         
-        self.stdout.write(self.style.SUCCESS(f"Finished processing. Files saved in: {report_output_dir}"))
+            self.stdout.write(self.style.SUCCESS(f"Finished processing. Files saved in: {report_output_dir}"))
+        finally:
+            self.timer.finish(report_date, run_status)
+            self.stdout.write(f"⏱️ Timings: {self.timer.summary()} (total {self.timer.total_seconds:.2f}s)")
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:41
+
+from django.db import migrations
+from django.db.models import Max
+
+
+def remove_duplicates(apps, schema_editor):
+    # The unique constraints below cannot be added while duplicates exist:
+    # keep the newest row (highest id) of each (key, report_date).
+    for model_name, key in (("PosocoTableA", "category"), ("PosocoTableG", "fuel_type")):
+        model = apps.get_model("processor", model_name)
+        newest = model.objects.values(key, "report_date").annotate(newest_id=Max("id")).values("newest_id")
+        deleted, _ = model.objects.exclude(id__in=newest).delete()
+        if deleted:
+            print(f"\n  {model_name}: removed {deleted} duplicate row(s)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processor', '0007_srldc3bdata_day_energy_mu'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='posocotablea',
+            unique_together={('category', 'report_date')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='posocotableg',
+            unique_together={('fuel_type', 'report_date')},
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processor', '0008_posoco_unique_report_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20)),
+                ('report_date', models.DateField()),
+                ('pdf_sha256', models.CharField(max_length=64)),
+                ('extractor_version', models.CharField(max_length=20)),
+                ('row_counts', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('success', 'Success'), ('partial', 'Partial'), ('failed', 'Failed')], default='failed', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-report_date', 'source'],
+                'unique_together': {('source', 'report_date')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processor', '0009_ingestion_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionTiming',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20)),
+                ('report_date', models.DateField(blank=True, null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('started_at', models.DateTimeField()),
+                ('total_seconds', models.FloatField()),
+                ('stages', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['source', '-started_at'], name='processor_i_source_447db0_idx')],
+            },
+        ),
+    ]
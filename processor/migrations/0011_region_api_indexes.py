@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:01
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processor', '0010_ingestion_timing'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nrldc2adata',
+            index=models.Index(django.db.models.functions.text.Upper('state'), models.F('report_date'), name='nrldc2a_state_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nrldc2cdata',
+            index=models.Index(django.db.models.functions.text.Upper('state'), models.F('report_date'), name='nrldc2c_state_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posocotablea',
+            index=models.Index(fields=['report_date'], name='posoco_a_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posocotableg',
+            index=models.Index(fields=['report_date'], name='posoco_g_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wrldc2adata',
+            index=models.Index(django.db.models.functions.text.Upper('state'), models.F('report_date'), name='wrldc2a_state_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wrldc2cdata',
+            index=models.Index(django.db.models.functions.text.Upper('state'), models.F('report_date'), name='wrldc2c_state_date_idx'),
+        ),
+    ]
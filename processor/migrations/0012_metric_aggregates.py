@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processor', '0011_region_api_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=20)),
+                ('state', models.CharField(max_length=100)),
+                ('metric', models.CharField(max_length=50)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('value', models.FloatField()),
+                ('days', models.PositiveSmallIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('region', 'state', 'metric', 'period', 'period_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processor', '0012_metric_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='demanddata',
+            name='state',
+            field=models.CharField(default='tamil-nadu', help_text='vidyutpravah state slug, e.g. tamil-nadu', max_length=50),
+        ),
+    ]
@@ -0,0 +1,159 @@
+import re
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.db import migrations, models
+
+# vidyutpravah time blocks are Indian Standard Time.
+SITE_TZ = ZoneInfo("Asia/Kolkata")
+BLOCK_MINUTES = 15
+BLOCK_LENGTH = timedelta(minutes=BLOCK_MINUTES)
+BATCH_SIZE = 2000
+
+
+def _mw(text):
+    digits = re.sub(r"[^\d.]", "", text or "")
+    try:
+        return round(float(digits))
+    except ValueError:
+        return None
+
+
+def _block_start(row):
+    match = re.match(r"\s*(\d{1,2}):(\d{2})", row.time_block or "")
+    if row.date and match:
+        return datetime.combine(row.date, time(int(match.group(1)), int(match.group(2))), SITE_TZ)
+    # Rows saved before time_block / date were recorded: the block the capture ran in.
+    local = row.captured_at.astimezone(SITE_TZ)
+    return local.replace(minute=local.minute - local.minute % BLOCK_MINUTES, second=0, microsecond=0)
+
+
+def backfill(apps, schema_editor):
+    """
+    Parse the text columns into current_mw / yesterday_mw / block_start. A
+    block is captured several times (every 5 minutes, 15-minute blocks):
+    only its latest capture is kept. Rows whose values do not parse are
+    dropped.
+    """
+    DemandData = apps.get_model("processor", "DemandData")
+
+    latest, dropped = {}, []
+    for row in DemandData.objects.order_by("captured_at", "id").iterator(chunk_size=BATCH_SIZE):
+        current, yesterday = _mw(row.current_demand), _mw(row.yesterday_demand)
+        if current is None or yesterday is None:
+            dropped.append(row.pk)
+            continue
+        key = (row.state, _block_start(row))
+        if key in latest:
+            dropped.append(latest[key].pk)
+        latest[key] = DemandData(pk=row.pk, current_mw=current, yesterday_mw=yesterday, block_start=key[1])
+
+    for i in range(0, len(dropped), BATCH_SIZE):
+        DemandData.objects.filter(pk__in=dropped[i:i + BATCH_SIZE]).delete()
+    DemandData.objects.bulk_update(
+        list(latest.values()), ["current_mw", "yesterday_mw", "block_start"], batch_size=BATCH_SIZE
+    )
+    print(f"\n  DemandData: {len(latest)} row(s) converted, {len(dropped)} duplicate or unparsable row(s) removed")
+
+
+def unbackfill(apps, schema_editor):
+    DemandData = apps.get_model("processor", "DemandData")
+
+    rows = []
+    for row in DemandData.objects.iterator(chunk_size=BATCH_SIZE):
+        local = row.block_start.astimezone(SITE_TZ)
+        end = (datetime.combine(local.date(), local.time()) + BLOCK_LENGTH).time()
+        row.current_demand = f"{row.current_mw:,} MW"
+        row.yesterday_demand = f"{row.yesterday_mw:,} MW"
+        row.time_block = f"{local:%H:%M} - {end:%H:%M}"
+        row.date = local.date()
+        rows.append(row)
+    DemandData.objects.bulk_update(
+        rows, ["current_demand", "yesterday_demand", "time_block", "date"], batch_size=BATCH_SIZE
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processor', '0013_demand_data_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='demanddata',
+            name='current_mw',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='demanddata',
+            name='yesterday_mw',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='demanddata',
+            name='block_start',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill, unbackfill),
+        # A default, so that unapplying this migration can add the text columns back to a filled table.
+        migrations.AlterField(
+            model_name='demanddata',
+            name='current_demand',
+            field=models.CharField(default='', help_text='Current demand value in MW', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='demanddata',
+            name='yesterday_demand',
+            field=models.CharField(default='', help_text="Yesterday's demand value in MW", max_length=50),
+        ),
+        migrations.RemoveField(
+            model_name='demanddata',
+            name='current_demand',
+        ),
+        migrations.RemoveField(
+            model_name='demanddata',
+            name='yesterday_demand',
+        ),
+        migrations.RemoveField(
+            model_name='demanddata',
+            name='time_block',
+        ),
+        migrations.RemoveField(
+            model_name='demanddata',
+            name='date',
+        ),
+        migrations.RenameField(
+            model_name='demanddata',
+            old_name='current_mw',
+            new_name='current_demand',
+        ),
+        migrations.RenameField(
+            model_name='demanddata',
+            old_name='yesterday_mw',
+            new_name='yesterday_demand',
+        ),
+        migrations.AlterField(
+            model_name='demanddata',
+            name='current_demand',
+            field=models.IntegerField(help_text='Current demand in MW'),
+        ),
+        migrations.AlterField(
+            model_name='demanddata',
+            name='yesterday_demand',
+            field=models.IntegerField(help_text='Demand in the same time block yesterday, in MW'),
+        ),
+        migrations.AlterField(
+            model_name='demanddata',
+            name='block_start',
+            field=models.DateTimeField(help_text='Start of the time block the values are for'),
+        ),
+        migrations.AlterModelOptions(
+            name='demanddata',
+            options={'ordering': ['-block_start']},
+        ),
+        migrations.AlterUniqueTogether(
+            name='demanddata',
+            unique_together={('state', 'block_start')},
+        ),
+    ]
@@ -1,32 +1,30 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 from datetime import date
 
 
 class DemandData(models.Model):
-    # Existing fields
-    current_demand = models.CharField(
+    # vidyutpravah state slug (processor.demand_capture.STATE_PAGES); rows
+    # captured before the multi-state capture are all Tamil Nadu.
+    state = models.CharField(
         max_length=50,
-        help_text="Current demand value in MW"
-    )
-    yesterday_demand = models.CharField(
-        max_length=50,
-        help_text="Yesterday's demand value in MW"
+        default="tamil-nadu",
+        help_text="vidyutpravah state slug, e.g. tamil-nadu"
     )
 
-    # NEW: Field for the time block string, e.g., "10:15 - 10:30"
-    time_block = models.CharField(
-        max_length=50,
-        help_text="The time block string extracted from the site",
-        null=True,
-        blank=True
+    # Whole MW, parsed from the site's "12,345 MW"
+    current_demand = models.IntegerField(
+        help_text="Current demand in MW"
+    )
+    yesterday_demand = models.IntegerField(
+        help_text="Demand in the same time block yesterday, in MW"
     )
 
-    # NEW: Field for just the date from the site
-    date = models.DateField(
-        help_text="The date extracted from the website",
-        null=True,
-        blank=True
+    # Start of the site's time block: "TIME BLOCK 10:15 - 10:30 DATED 16 OCT 2026"
+    # is 2026-10-16 10:15 IST. Re-captures of a block update its row.
+    block_start = models.DateTimeField(
+        help_text="Start of the time block the values are for"
     )
 
     # Timestamp for when the script ran
@@ -36,11 +34,13 @@ class DemandData(models.Model):
     )
 
     def __str__(self):
-        local_time = timezone.localtime(self.captured_at)
-        return f"Data captured at {local_time.strftime('%Y-%m-%d %H:%M:%S %Z')}"
+        local_time = timezone.localtime(self.block_start)
+        return f"{self.state} demand for the block at {local_time.strftime('%Y-%m-%d %H:%M %Z')}"
 
     class Meta:
-        ordering = ['-captured_at']
+        ordering = ['-block_start']
+        # Also the index for per-state block_start range scans (charts, aggregates).
+        unique_together = ('state', 'block_start')
 
 
 class Nrldc2AData(models.Model):
@@ -72,6 +72,8 @@ class Nrldc2AData(models.Model):
         verbose_name = "Table 2A Data"
         verbose_name_plural = "Table 2A Data"
         unique_together = ('report_date', 'state')
+        # The API's ?state= filter is case-insensitive: UPPER(state) = UPPER(%s).
+        indexes = [models.Index(Upper('state'), 'report_date', name='nrldc2a_state_date_idx')]
 
 
 class Nrldc2CData(models.Model):
@@ -106,6 +108,7 @@ class Nrldc2CData(models.Model):
         verbose_name = "Table 2C Data"
         verbose_name_plural = "Table 2C Data"
         unique_together = ('report_date', 'state')
+        indexes = [models.Index(Upper('state'), 'report_date', name='nrldc2c_state_date_idx')]
 
 
 
@@ -123,6 +126,8 @@ class PosocoTableA(models.Model):
 
     class Meta:
         db_table = 'posoco_posocotablea'  # 👈 Add this line to specify the exact table name
+        unique_together = ('category', 'report_date')
+        indexes = [models.Index(fields=['report_date'], name='posoco_a_date_idx')]
 
     def __str__(self):
         return f"TableA | {self.category} | {self.report_date}"
@@ -143,6 +148,8 @@ class PosocoTableG(models.Model):
 
     class Meta:
         db_table = 'posoco_posocotableg'  # 👈 Add this line for the second table as well
+        unique_together = ('fuel_type', 'report_date')
+        indexes = [models.Index(fields=['report_date'], name='posoco_g_date_idx')]
 
     def __str__(self):
         return f"TableG | {self.fuel_type} | {self.report_date}"
@@ -239,6 +246,7 @@ class Wrldc2AData(models.Model):
         verbose_name = "Table 2A Data"
         verbose_name_plural = "Table 2A Data"
         unique_together = ('report_date', 'state')
+        indexes = [models.Index(Upper('state'), 'report_date', name='wrldc2a_state_date_idx')]
 
 
 class Wrldc2CData(models.Model):
@@ -265,6 +273,7 @@ class Wrldc2CData(models.Model):
         verbose_name = "Table 2C Data"
         verbose_name_plural = "Table 2C Data"
         unique_together = ('report_date', 'state')
+        indexes = [models.Index(Upper('state'), 'report_date', name='wrldc2c_state_date_idx')]
 
 
 class SRLDC3BData(models.Model):
@@ -302,3 +311,76 @@ class SRLDC3BData(models.Model):
 
     def __str__(self):
         return f"{self.station} - {self.report_date}"
+
+
+class IngestionLedger(models.Model):
+    """One row per source and report date: which PDF was ingested, by which extractor, and how it went."""
+    STATUS_SUCCESS = 'success'
+    STATUS_PARTIAL = 'partial'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_SUCCESS, 'Success'),
+        (STATUS_PARTIAL, 'Partial'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    source = models.CharField(max_length=20)  # SRLDC, NRLDC, WRLDC, POSOCO, SRLDC_3B
+    report_date = models.DateField()
+    pdf_sha256 = models.CharField(max_length=64)
+    extractor_version = models.CharField(max_length=20)
+    row_counts = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_FAILED)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('source', 'report_date')
+        ordering = ['-report_date', 'source']
+
+    def __str__(self):
+        return f"{self.source} {self.report_date} [{self.status}]"
+
+
+class IngestionTiming(models.Model):
+    """Per-stage wall-clock timings of one ingestion command run (see processor.timing.StageTimer)."""
+    source = models.CharField(max_length=20)  # same values as IngestionLedger.source
+    report_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=10)  # ledger status, or "skipped" / "failed" when no ledger row was written
+    started_at = models.DateTimeField()
+    total_seconds = models.FloatField()
+    # [{"stage": "download", "seconds": 1.42, "bytes": 812345, "bytes_per_sec": 572074.0}, ...]
+    stages = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [models.Index(fields=['source', '-started_at'])]
+
+    def __str__(self):
+        return f"{self.source} {self.report_date} {self.total_seconds:.1f}s [{self.status}]"
+
+
+class MetricAggregate(models.Model):
+    """
+    Daily or monthly rollup of one numeric 2(A) column for one state of a
+    region, kept up to date by the ingestion commands (processor.aggregates).
+    """
+    PERIOD_DAY = 'day'
+    PERIOD_MONTH = 'month'
+    PERIOD_CHOICES = [(PERIOD_DAY, 'Day'), (PERIOD_MONTH, 'Month')]
+
+    region = models.CharField(max_length=20)    # SRLDC / NRLDC / WRLDC
+    state = models.CharField(max_length=100)    # normalized: lower case, no spaces ("tamilnadu")
+    metric = models.CharField(max_length=50)    # 2(A) column name, e.g. "wind"
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()           # the report date, or the 1st of the month
+    value = models.FloatField()                 # the day's value, or the month's sum
+    days = models.PositiveSmallIntegerField(default=1)  # days with a value in the period
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Also the index for report lookups: equality on the first four, range on period_start.
+        unique_together = ('region', 'state', 'metric', 'period', 'period_start')
+
+    def __str__(self):
+        return f"{self.region} {self.state} {self.metric} {self.period} {self.period_start}: {self.value}"
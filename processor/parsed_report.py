@@ -0,0 +1,89 @@
+import pdfplumber
+
+
+class ParsedReport:
+    """
+    A PSP PDF opened once with pdfplumber.
+
+    Every extractor used to call pdfplumber.open() on the same file and re-run
+    extract_words()/find_tables() on the same pages. ParsedReport keeps the
+    document open and caches each page's text, words and tables the first time
+    they are asked for, so a report is parsed page by page exactly once no
+    matter how many extractors read it.
+
+    Use it as a context manager:
+
+        with ParsedReport(pdf_path) as report:
+            df_2A = extract_table_2A_using_heading(report)
+            tables_3b = extract_table_3B_using_heading(report)
+    """
+
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+        self._pdf = pdfplumber.open(pdf_path)
+        self._text = {}
+        self._words = {}
+        self._tables = {}
+        self._table_rows = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        self._text.clear()
+        self._words.clear()
+        self._tables.clear()
+        self._table_rows.clear()
+
+    @property
+    def pages(self):
+        return self._pdf.pages
+
+    @property
+    def page_count(self):
+        return len(self._pdf.pages)
+
+    def page(self, page_idx):
+        return self._pdf.pages[page_idx]
+
+    def text(self, page_idx):
+        """Cached page.extract_text() (never None)."""
+        if page_idx not in self._text:
+            self._text[page_idx] = self.page(page_idx).extract_text() or ""
+        return self._text[page_idx]
+
+    def words(self, page_idx, use_text_flow=True):
+        """Cached page.extract_words(); falls back to the default layout if text flow fails."""
+        key = (page_idx, use_text_flow)
+        if key not in self._words:
+            page = self.page(page_idx)
+            try:
+                words = page.extract_words(use_text_flow=use_text_flow)
+            except Exception:
+                words = page.extract_words() if use_text_flow else []
+            self._words[key] = words
+        return self._words[key]
+
+    def find_tables(self, page_idx):
+        """Cached page.find_tables(); each Table keeps its bbox and row geometry."""
+        if page_idx not in self._tables:
+            self._tables[page_idx] = self.page(page_idx).find_tables()
+        return self._tables[page_idx]
+
+    def table_rows(self, page_idx, table_idx):
+        """Cached Table.extract() for the table_idx-th table on a page."""
+        key = (page_idx, table_idx)
+        if key not in self._table_rows:
+            self._table_rows[key] = self.find_tables(page_idx)[table_idx].extract()
+        return self._table_rows[key]
+
+    def extract_tables(self, page_idx):
+        """Equivalent of page.extract_tables(), served from the find_tables() cache."""
+        return [self.table_rows(page_idx, t_idx) for t_idx in range(len(self.find_tables(page_idx)))]
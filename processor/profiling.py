@@ -0,0 +1,138 @@
+"""
+Opt-in per-request profiling (settings.REQUEST_PROFILING, env REQUEST_PROFILING=1).
+
+RequestProfilingMiddleware measures, for every request:
+
+    db      SQL query count and time (all database connections)
+    render  DRF / template response rendering, i.e. JSON serialization for
+            the API views (templates rendered inside a view with render()
+            count as view time)
+    total   latency from the middleware to the returned response
+
+Streaming responses (?stream=1, exports) are measured up to their first
+byte: the body is produced after the middleware has returned.
+
+The timings go back in a Server-Timing header, so the browser dev tools
+show them next to the request. Samples are also kept per endpoint (method
+plus URL route) in memory, the last SAMPLES_PER_ENDPOINT of each, and
+summarized as p50 / p95 at the admin-only /api/request-profiles/. The
+samples belong to the worker process that served them.
+
+When REQUEST_PROFILING is off the middleware removes itself at startup and
+costs nothing.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+SAMPLES_PER_ENDPOINT = 1000
+
+_samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_ENDPOINT))
+_lock = threading.Lock()
+
+
+class _QueryCounter:
+    """connection.execute_wrapper() callable counting queries and their time."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - start
+
+
+def _endpoint(request):
+    match = getattr(request, "resolver_match", None)
+    route = f"/{match.route}" if match and match.route else (match.view_name if match else "<unresolved>")
+    return f"{request.method} {route}"
+
+
+def _percentile(values, pct):
+    # nearest-rank percentile of an already sorted list
+    return values[max(int(round(pct / 100 * len(values))) - 1, 0)]
+
+
+def record(endpoint, sample):
+    with _lock:
+        _samples[endpoint].append(sample)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+def summary():
+    """
+    One row per endpoint, slowest p95 first: request count, p50 / p95 of
+    total_ms, db_ms, queries and render_ms, and the slowest total_ms.
+    """
+    with _lock:
+        snapshot = {endpoint: list(samples) for endpoint, samples in _samples.items()}
+
+    rows = []
+    for endpoint, samples in snapshot.items():
+        row = {"endpoint": endpoint, "requests": len(samples)}
+        for metric in ("total_ms", "db_ms", "queries", "render_ms"):
+            values = sorted(s[metric] for s in samples)
+            row[f"{metric}_p50"] = _percentile(values, 50)
+            row[f"{metric}_p95"] = _percentile(values, 95)
+        row["total_ms_max"] = max(s["total_ms"] for s in samples)
+        rows.append(row)
+    return sorted(rows, key=lambda r: r["total_ms_p95"], reverse=True)
+
+
+class RequestProfilingMiddleware:
+    """Per-request SQL / render / total timings: Server-Timing header plus the per-endpoint summary()."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_PROFILING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        request._profiling = {"render_ms": 0.0}
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        sample = {
+            "total_ms": round(total_ms, 2),
+            "db_ms": round(counter.seconds * 1000, 2),
+            "queries": counter.queries,
+            "render_ms": round(request._profiling["render_ms"], 2),
+            "status": response.status_code,
+        }
+        record(_endpoint(request), sample)
+
+        response.headers["Server-Timing"] = ", ".join([
+            f'db;dur={sample["db_ms"]};desc="{sample["queries"]} queries"',
+            f'render;dur={sample["render_ms"]}',
+            f'total;dur={sample["total_ms"]}',
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before a DRF Response / TemplateResponse is rendered.
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._profiling["render_ms"] = (time.perf_counter() - start) * 1000
+
+        response.add_post_render_callback(rendered)
+        return response
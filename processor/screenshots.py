@@ -0,0 +1,121 @@
+"""
+Demand capture screenshots, written off the capture path.
+
+The capture used to save a PNG to disk and scan the screenshot directory
+for expired files in every run, with the browser page still open. Now
+grab() only takes the page image into memory and save() hands it to this
+process's background writer thread and returns at once: the writer
+compresses it (JPEG, or WebP through Pillow) and writes the file. Expired
+files are removed by prune(), run from the periodic
+sweep_screenshots_task rather than by the capture.
+
+Settings: DEMAND_SCREENSHOT_DIR, DEMAND_SCREENSHOT_FORMAT ("jpeg" or
+"webp"; WebP needs Pillow and falls back to JPEG without it),
+DEMAND_SCREENSHOT_QUALITY (1-100) and DEMAND_SCREENSHOT_KEEP_DAYS.
+"""
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+
+try:
+    from PIL import Image
+except ImportError:  # JPEG screenshots still work without Pillow
+    Image = None
+
+FORMAT_JPEG = "jpeg"
+FORMAT_WEBP = "webp"
+WEBP_AVAILABLE = Image is not None
+
+PREFIX = "vidyutpravah_"
+EXTENSIONS = (".png", ".jpg", ".webp")
+
+_writer = None
+_writer_pid = None
+_lock = threading.Lock()
+
+
+def _webp():
+    return settings.DEMAND_SCREENSHOT_FORMAT == FORMAT_WEBP and WEBP_AVAILABLE
+
+
+def _get_writer():
+    global _writer, _writer_pid
+    with _lock:
+        # A writer inherited through fork() has no thread behind it.
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot-writer")
+            _writer_pid = os.getpid()
+        return _writer
+
+
+def grab(page):
+    """The page's image as bytes, without touching the disk: JPEG, or lossless PNG when it is re-encoded to WebP."""
+    if _webp():
+        return page.screenshot(type="png")
+    return page.screenshot(type="jpeg", quality=settings.DEMAND_SCREENSHOT_QUALITY)
+
+
+def _write(data, name):
+    if _webp():
+        buffer = io.BytesIO()
+        Image.open(io.BytesIO(data)).save(buffer, "WEBP", quality=settings.DEMAND_SCREENSHOT_QUALITY)
+        data, extension = buffer.getvalue(), ".webp"
+    else:
+        extension = ".jpg"
+
+    os.makedirs(settings.DEMAND_SCREENSHOT_DIR, exist_ok=True)
+    path = os.path.join(settings.DEMAND_SCREENSHOT_DIR, f"{PREFIX}{name}{extension}")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _report(future):
+    if future.exception() is not None:
+        print("❌ Screenshot write failed:", future.exception())
+
+
+def save(data, name):
+    """Queue grab()'s bytes to be written as vidyutpravah_<name>.jpg / .webp; returns the write's Future."""
+    future = _get_writer().submit(_write, data, name)
+    future.add_done_callback(_report)
+    return future
+
+
+def flush():
+    """Wait for the queued writes of this process."""
+    global _writer
+    with _lock:
+        writer, _writer = (_writer, None) if _writer_pid == os.getpid() else (None, None)
+    if writer is not None:
+        writer.shutdown(wait=True)
+
+
+def prune(today=None, keep_days=None):
+    """Delete the screenshots older than the last keep_days days (default DEMAND_SCREENSHOT_KEEP_DAYS); returns how many."""
+    today = today or date.today()
+    keep_days = settings.DEMAND_SCREENSHOT_KEEP_DAYS if keep_days is None else keep_days
+    keep = {(today - timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(keep_days)}
+
+    removed = 0
+    try:
+        entries = list(os.scandir(settings.DEMAND_SCREENSHOT_DIR))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if entry.name.startswith(PREFIX) and entry.name.endswith(EXTENSIONS):
+            # vidyutpravah_<YYYY-MM-DD>_<HH-MM-SS>_<state>.<ext>
+            if entry.name[len(PREFIX):len(PREFIX) + 10] not in keep:
+                os.remove(entry.path)
+                removed += 1
+    return removed
+
+
+@worker_process_shutdown.connect
+def _flush_on_shutdown(**kwargs):
+    flush()
@@ -0,0 +1,62 @@
+import logging
+import threading
+
+import tabula.io as tabula_io
+from tabula.backend import TabulaVm
+
+logger = logging.getLogger(__name__)
+
+# tabula-java is not guaranteed thread safe; one extraction at a time per process.
+_lock = threading.Lock()
+_backend = None  # "jpype" or "subprocess", decided on first use
+
+
+def warm_up():
+    """
+    Start the in-process JVM (once per process) and return the backend in use.
+
+    Without jpype installed, tabula.io.read_pdf launches `java -jar tabula.jar`
+    for every call, so each NRLDC / WRLDC / POSOCO PDF paid a full JVM
+    startup. With jpype the JVM is started once inside this Python process
+    and every later read_pdf call in the same Celery worker or management
+    command reuses it. If jpype or a JVM is unavailable we fall back to the
+    old subprocess mode instead of failing.
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
+
+    with _lock:
+        if _backend is None:
+            try:
+                vm = TabulaVm(java_options=["-Dfile.encoding=UTF8"], silent=True)
+                _backend = "jpype" if vm.tabula is not None else "subprocess"
+                if _backend == "jpype":
+                    tabula_io._tabula_vm = vm
+            except Exception as e:
+                logger.warning(f"Could not start in-process JVM, using tabula subprocess mode: {e}")
+                _backend = "subprocess"
+            logger.info(f"tabula backend: {_backend}")
+    return _backend
+
+
+def read_pdf(pdf_path, **kwargs):
+    """
+    Drop-in replacement for tabula.io.read_pdf backed by the shared JVM.
+
+    Accepts the same keyword arguments (pages, lattice, multiple_tables,
+    pandas_options, ...). Pass force_subprocess=True to get the old
+    one-JVM-per-call behaviour, e.g. for benchmarking.
+    """
+    if warm_up() == "subprocess":
+        kwargs["force_subprocess"] = True
+
+    with _lock:
+        shared_vm = tabula_io._tabula_vm
+        try:
+            return tabula_io.read_pdf(pdf_path, **kwargs)
+        finally:
+            # tabula caches a forced SubprocessTabula globally; put the shared
+            # JVM back so one forced call doesn't downgrade the whole process.
+            if _backend == "jpype" and shared_vm is not None:
+                tabula_io._tabula_vm = shared_vm
@@ -1,134 +1,77 @@
 import time
-import os
-import re
-import requests
 from time import sleep
-from celery import shared_task
+from celery import chord, shared_task
 from django import db as django_db
-from datetime import datetime, timedelta
+from datetime import datetime
 from django.core.management import call_command
 from django.db import transaction, connection
-from playwright.sync_api import sync_playwright
 from .models import DemandData
+from django.conf import settings
+from . import demand_capture, http, screenshots
 
 
 @shared_task
-def capture_demand_data_task():
-
-    TARGET_URL = "https://vidyutpravah.in/state-data/tamil-nadu"
-    API_ENDPOINT = "http://172.16.7.118:8003/api/tamilnadu/demand/post.demand.php"
-    XPATH_CURRENT = '//*[@id="TamilNadu_map"]/div[6]/span/span'
-    XPATH_YESTERDAY = '//*[@id="TamilNadu_map"]/div[4]/span/span'
-    XPATH_TIME_BLOCK = '/html/body/table/tbody/tr[1]/td/table/tbody/tr[2]/td/table/tbody/tr/td[2]'
-
-    SCREENSHOT_DIR = "screenshots"
-    KEEP_DAYS = 2
-
-    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+def capture_demand_data_task(states=None):
+    """
+    Capture the current / yesterday demand of every state in states
+    (default settings.DEMAND_CAPTURE_STATES, else the verified states) in one run and save them with a
+    single bulk insert. Returns {slug: status}.
+    """
+    states = states or settings.DEMAND_CAPTURE_STATES or list(demand_capture.VERIFIED_STATES)
+    unknown = [slug for slug in states if slug not in demand_capture.STATE_PAGES]
+    if unknown:
+        print(f"⚠️ Skipping unknown states: {', '.join(unknown)}")
+        states = [slug for slug in states if slug in demand_capture.STATE_PAGES]
 
     run_start_time = datetime.now()
 
-    current_text = None
-    yesterday_text = None
-    parsed_time_block = None
-    parsed_date_obj = None
-    api_status = "UnknownError"
-
     # -------------------------------
-    # BLOCK 1: WEB SCRAPING WITH RETRY (3 attempts)
+    # BLOCK 1: CAPTURE ALL STATES (concurrent HTTP, browser fallback)
     # -------------------------------
-    MAX_RETRIES = 3
-    retry_count = 0
-
-    while retry_count < MAX_RETRIES:
-        try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.set_viewport_size({"width": 1920, "height": 1080})
-
-                page.goto(TARGET_URL, timeout=90000, wait_until="domcontentloaded")
-                page.wait_for_selector(f'xpath={XPATH_CURRENT}', timeout=30000)
-
-                current_text = page.locator(f'xpath={XPATH_CURRENT}').inner_text()
-                yesterday_text = page.locator(f'xpath={XPATH_YESTERDAY}').inner_text()
-                print(yesterday_text, "yesterday")
-
-                full_text = page.locator(f'xpath={XPATH_TIME_BLOCK}').inner_text()
-                full_text = " ".join(full_text.split())
-
-                match = re.search(
-                    r"TIME BLOCK (\d{2}:\d{2} - \d{2}:\d{2}) DATED (\d{2} [A-Z]{3} \d{4})",
-                    full_text
-                )
-
-                if match:
-                    parsed_time_block = match.group(1)
-                    parsed_date_obj = datetime.strptime(match.group(2), "%d %b %Y").date()
-                    print(parsed_time_block, "parsed_time_block")
-                    api_status = "DataCaptured"
-                else:
-                    api_status = "ParsingFailed"
-
-                # Screenshot with timestamp
-                if api_status == "DataCaptured":
-                    timestamp = run_start_time.strftime("%Y-%m-%d_%H-%M-%S")
-                    screenshot_file = f"vidyutpravah_{timestamp}.png"
-                    screenshot_path = os.path.join(SCREENSHOT_DIR, screenshot_file)
-
-                    page.screenshot(path=screenshot_path)
-
-                    # CLEANUP OLD FILES
-                    keep = {
-                        (run_start_time.date() - timedelta(days=offset)).strftime("%Y-%m-%d")
-                        for offset in range(KEEP_DAYS)
-                    }
-
-                    for f in os.listdir(SCREENSHOT_DIR):
-                        if f.startswith("vidyutpravah_") and f.endswith(".png"):
-                            date_part = f[13:23]
-                            if date_part not in keep:
-                                os.remove(os.path.join(SCREENSHOT_DIR, f))
-
-                browser.close()
-                break  # success → exit retry loop
-
-        except Exception as e:
-            retry_count += 1
-            print(f"Scraping attempt {retry_count} failed:", e)
+    results = demand_capture.capture_states(states, run_started=run_start_time)
 
-            if retry_count >= MAX_RETRIES:
-                print("All scraping retries failed.")
-                api_status = "ScrapingFailed"
-                break
-
-            time.sleep(3)
+    statuses = {slug: result["status"] for slug, result in results.items()}
+    print(statuses, "statuses")
 
     # -------------------------------
-    # BLOCK 2: PUSH DATA TO API
+    # BLOCK 2: PUSH DATA TO API (states that have an endpoint)
     # -------------------------------
-    try:
-        params = {"status": api_status}
+    for slug, result in results.items():
+        api_endpoint = demand_capture.STATE_PAGES[slug].get("push_endpoint")
+        if not api_endpoint:
+            continue
+        try:
+            params = {"status": result["status"]}
 
-        if api_status == "DataCaptured":
-            print(current_text,"current_text")
-            print(yesterday_text,"yesterday_text")
-            params.update({
-                "date": parsed_date_obj.strftime("%Y-%m-%d"),
-                "time": parsed_time_block.replace(" ", ""),
-                "current": current_text.replace(",", "").replace(" MW", "").strip(),
-                "yesterday": yesterday_text.replace(",", "").replace(" MW", "").strip(),
-            })
+            if result["status"] == "DataCaptured":
+                params.update({
+                    "date": result["date"].strftime("%Y-%m-%d"),
+                    "time": result["time_block"].replace(" ", ""),
+                    "current": result["current"],
+                    "yesterday": result["yesterday"],
+                })
 
-        requests.get(API_ENDPOINT, params=params, timeout=10)
+            http.get(api_endpoint, params=params, timeout=10)
 
-    except Exception as e:
-        print("API error:", e)
+        except Exception as e:
+            print(f"{slug}: API error:", e)
 
     # -------------------------------
-    # BLOCK 3: SAVE TO DATABASE (4 attempts)
+    # BLOCK 3: SAVE TO DATABASE, ONE BULK UPSERT (4 attempts)
     # -------------------------------
-    if api_status == "DataCaptured":
+    # A 15-minute block is captured up to three times; the latest reading replaces the earlier ones.
+    rows = [
+        DemandData(
+            state=slug,
+            current_demand=result["current"],
+            yesterday_demand=result["yesterday"],
+            block_start=result["block_start"],
+        )
+        for slug, result in results.items()
+        if result["status"] == "DataCaptured"
+    ]
+
+    if rows:
 
         attempts = 0
         max_attempts = 4
@@ -142,14 +85,16 @@ def capture_demand_data_task():
                     connection.ensure_connection()
 
                 with transaction.atomic():
-                    DemandData.objects.create(
-                        current_demand=current_text,
-                        yesterday_demand=yesterday_text,
-                        time_block=parsed_time_block,
-                        date=parsed_date_obj,
+                    DemandData.objects.bulk_create(
+                        rows,
+                        update_conflicts=True,
+                        unique_fields=["state", "block_start"],
+                        update_fields=["current_demand", "yesterday_demand", "captured_at"],
                     )
 
-                return "Saved"
+                for row in rows:
+                    statuses[row.state] = "Saved"
+                return statuses
 
             except Exception as e:
                 print("Database Error:", e)
@@ -159,13 +104,23 @@ def capture_demand_data_task():
                 except:
                     pass
 
+                if attempts == max_attempts:
+                    for row in rows:
+                        statuses[row.state] = "DB_Save_Failed"
+                    return statuses
+
                 # Wait before next retry
                 time.sleep(2 ** attempts)
 
-                if attempts == max_attempts:
-                    return "DB_Save_Failed"
+    return statuses
+
 
-    return api_status
+@shared_task
+def sweep_screenshots_task():
+    """Delete the capture screenshots past settings.DEMAND_SCREENSHOT_KEEP_DAYS."""
+    removed = screenshots.prune()
+    print(f"🧹 Removed {removed} old screenshot(s)")
+    return removed
 
 
 @shared_task(bind=True)
@@ -184,4 +139,57 @@ def run_management_commands(self, commands):
             self.retry(countdown=10, exc=e)
             print(f"Error running {command}: {e}")
         else:
-            print(f"Successfully ran command: {command}")
\ No newline at end of file
+            print(f"Successfully ran command: {command}")
+
+# Region ingestion commands that can run independently of each other.
+REGION_COMMANDS = ['nrldc_project', 'posoco', 'srldc_project', 'wrldc_project']
+
+
+@shared_task(bind=True, max_retries=2)
+def run_region_command(self, command):
+    """
+    Run one region's ingestion command as part of run_daily_ingestion's chord.
+
+    Retries twice; after that the failure is returned instead of raised so the
+    chord still fires merge_reports with whatever regions did succeed.
+    """
+    try:
+        print(f"Running command: {command}")
+        started = time.monotonic()
+        call_command(command)
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=10, exc=e)
+        print(f"Error running {command}: {e}")
+        return {"command": command, "status": "failed", "error": str(e)}
+    finally:
+        django_db.close_old_connections()
+
+    elapsed = round(time.monotonic() - started, 1)
+    print(f"Successfully ran command: {command} in {elapsed}s")
+    return {"command": command, "status": "ok", "seconds": elapsed}
+
+
+@shared_task
+def merge_reports_callback(results):
+    """Chord callback: merge the regional JSON reports once every region has finished."""
+    failed = [r["command"] for r in results if r.get("status") != "ok"]
+    if failed:
+        print(f"Merging with failed regions: {failed}")
+    call_command('merge_reports')
+    return results
+
+
+@shared_task
+def run_daily_ingestion(commands=None):
+    """
+    Fetch and ingest all regions concurrently, then merge.
+
+    Replaces the sequential run_management_commands chain for the daily runs:
+    each region command is its own task, so the worker pool downloads and
+    parses them in parallel processes, and merge_reports runs as the chord
+    callback once all of them are done. End-to-end time becomes the slowest
+    region instead of the sum of all four.
+    """
+    header = [run_region_command.s(command) for command in (commands or REGION_COMMANDS)]
+    return chord(header)(merge_reports_callback.s()).id
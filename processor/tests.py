@@ -1,3 +1,132 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import demand_capture
+from .aggregates import daily_values, refresh_day
+from .models import MetricAggregate, Srldc2AData
+from .upsert import bulk_upsert
+
+TIME_BLOCK_TEXT = "TIME BLOCK 10:15 - 10:30 DATED 16 OCT 2026"
+
+
+@override_settings(DEMAND_CAPTURE_BACKEND=demand_capture.BACKEND_HTTP)
+class CaptureStatesFallbackTests(SimpleTestCase):
+
+    @mock.patch.object(demand_capture, "_capture_with_browser")
+    @mock.patch.object(demand_capture, "capture_http")
+    def test_unparsable_http_values_fall_back_to_the_browser(self, capture_http, capture_with_browser):
+        capture_http.return_value = ("n/a", "15,234 MW", TIME_BLOCK_TEXT)
+        capture_with_browser.return_value = demand_capture._reading(("16,001 MW", "15,234 MW", TIME_BLOCK_TEXT))
+
+        results = demand_capture.capture_states(["tamil-nadu"], screenshot=False)
+
+        capture_with_browser.assert_called_once()
+        self.assertEqual(capture_with_browser.call_args.args[0], "tamil-nadu")
+        self.assertEqual(results["tamil-nadu"]["status"], "DataCaptured")
+        self.assertEqual(results["tamil-nadu"]["current"], 16001)
+
+    @mock.patch.object(demand_capture, "_capture_with_browser")
+    @mock.patch.object(demand_capture, "capture_http")
+    def test_parsed_http_values_skip_the_browser(self, capture_http, capture_with_browser):
+        capture_http.return_value = ("16,001 MW", "15,234 MW", TIME_BLOCK_TEXT)
+
+        results = demand_capture.capture_states(["tamil-nadu"], screenshot=False)
+
+        capture_with_browser.assert_not_called()
+        self.assertEqual(results["tamil-nadu"]["yesterday"], 15234)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class _HangingPage:
+    """Playwright page stand-in whose navigation uses up its whole timeout and then fails."""
+
+    def __init__(self, clock, timeouts):
+        self.clock = clock
+        self.timeouts = timeouts
+
+    def goto(self, url, timeout, wait_until):
+        self.timeouts.append(timeout)
+        self.clock.now += timeout / 1000
+        raise TimeoutError(f"Timeout {timeout}ms exceeded")
+
+
+@override_settings(DEMAND_CAPTURE_BACKEND=demand_capture.BACKEND_BROWSER)
+class CaptureStatesDeadlineTests(SimpleTestCase):
+
+    def test_browser_attempts_stop_at_the_run_budget(self):
+        clock, timeouts = _Clock(), []
+        page = mock.MagicMock()
+        page.__enter__.return_value = _HangingPage(clock, timeouts)
+
+        with mock.patch.object(demand_capture.time, "monotonic", clock.monotonic), \
+                mock.patch.object(demand_capture.time, "sleep", clock.sleep), \
+                mock.patch.object(demand_capture.browser_pool, "page", return_value=page):
+            results = demand_capture.capture_states(["tamil-nadu", "kerala"], screenshot=False)
+
+        # Two full 90 s loads, 3 s pauses, then a last load cut to the 54 s left; kerala gets none.
+        self.assertEqual(timeouts, [90000, 90000, 54000])
+        self.assertLessEqual(clock.now - 1000.0, demand_capture.BROWSER_BUDGET_SECONDS)
+        self.assertEqual(results["tamil-nadu"]["status"], "ScrapingFailed")
+        self.assertEqual(results["kerala"]["status"], "ScrapingFailed")
+
+
+class DailyValuesTests(TestCase):
+    """daily_values() reads the aggregates, and the 2(A) table for days that were never aggregated."""
+
+    start = date(2025, 1, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        Srldc2AData.objects.create(report_date=cls.start, state="Tamil Nadu", wind=10.5)
+        Srldc2AData.objects.create(report_date=cls.start + timedelta(days=1), state="TN", wind=7.0)
+        Srldc2AData.objects.create(report_date=cls.start + timedelta(days=1), state="Kerala", wind=1.0)
+
+    def test_falls_back_to_the_2a_table(self):
+        with self.assertNumQueries(2):
+            values = daily_values("SRLDC", ("tamilnadu", "tn"), "wind", self.start, self.start + timedelta(days=2))
+        self.assertEqual(values, {self.start: 10.5, self.start + timedelta(days=1): 7.0})
+
+    def test_prefers_aggregates(self):
+        refresh_day("SRLDC", self.start)
+        MetricAggregate.objects.filter(state="tamilnadu", metric="wind").update(value=99.0)
+        values = daily_values("SRLDC", ("tamilnadu", "tn"), "wind", self.start, self.start + timedelta(days=1))
+        self.assertEqual(values, {self.start: 99.0, self.start + timedelta(days=1): 7.0})
+
+
+class BulkUpsertTests(TestCase):
+    """bulk_upsert() counts, across re-runs of the same table, and its handling of NULL keys."""
+
+    report_date = date(2025, 1, 1)
+    key = ("report_date", "state")
+
+    def rows(self, **tamil_nadu):
+        return [
+            {"report_date": self.report_date, "state": "Tamil Nadu", "thermal": 1.0, **tamil_nadu},
+            {"report_date": self.report_date, "state": "Kerala", "thermal": 2.0},
+        ]
+
+    def test_second_run_counts(self):
+        self.assertEqual(bulk_upsert(Srldc2AData, self.rows(), self.key), (2, 0, 0))
+        self.assertEqual(bulk_upsert(Srldc2AData, self.rows(), self.key), (0, 0, 2))
+        self.assertEqual(bulk_upsert(Srldc2AData, self.rows(thermal=3.5), self.key), (0, 1, 1))
+        self.assertEqual(Srldc2AData.objects.get(state="Tamil Nadu").thermal, 3.5)
+        self.assertEqual(Srldc2AData.objects.count(), 2)
+
+    def test_rows_with_a_null_key_are_skipped_and_logged(self):
+        rows = self.rows() + [{"report_date": self.report_date, "state": None, "thermal": 9.0}]
+        with self.assertLogs("processor.upsert", "WARNING") as logs:
+            self.assertEqual(bulk_upsert(Srldc2AData, rows, self.key), (2, 0, 0))
+        self.assertIn("skipped 1 row(s)", logs.output[0])
+        self.assertFalse(Srldc2AData.objects.filter(state__isnull=True).exists())
@@ -0,0 +1,103 @@
+import time
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from .models import IngestionTiming
+
+# Stage names shared by the ingestion commands, in pipeline order.
+STAGE_METADATA = "metadata"
+STAGE_DOWNLOAD = "download"
+STAGE_PDF_OPEN = "pdf_open"
+STAGE_EXTRACT = "extract"      # recorded per table, e.g. "extract:2A"
+STAGE_NORMALIZE = "normalize"
+STAGE_DB_WRITE = "db_write"    # recorded per table, e.g. "db_write:Srldc2AData"
+STAGE_JSON_WRITE = "json_write"
+STAGE_AGGREGATES = "aggregates"
+
+STAGES = (STAGE_METADATA, STAGE_DOWNLOAD, STAGE_PDF_OPEN, STAGE_EXTRACT, STAGE_NORMALIZE,
+          STAGE_DB_WRITE, STAGE_JSON_WRITE, STAGE_AGGREGATES)
+# Stages that measure parsing only, as opposed to DB / JSON writes (see bench_extract).
+PARSE_STAGES = (STAGE_PDF_OPEN, STAGE_EXTRACT, STAGE_NORMALIZE)
+
+# Run status when nothing needed ingesting: the PDF was unchanged or not published yet.
+STATUS_SKIPPED = "skipped"
+
+
+class StageTimer:
+    """
+    Wall-clock timings for the stages of one ingestion run, saved as an
+    IngestionTiming row so a slow 8am run can be traced to the stage that
+    regressed (admin: Ingestion timings, API: /api/ingestion-timings/).
+
+        timer = StageTimer("NRLDC")
+        with timer.stage(STAGE_DOWNLOAD) as s:
+            cached_pdf = fetch_pdf(...)
+            s["bytes"] = os.path.getsize(pdf_path)
+        with timer.stage(f"{STAGE_DB_WRITE}:Nrldc2AData") as s:
+            s["rows"] = len(rows_2A)
+            ...
+        timer.finish(report_date, ledger.status)
+
+    Extra keys set on a stage (bytes, rows, ...) are stored with it; bytes
+    also gets a bytes_per_sec rate. A stage is recorded even when its block
+    raises, with "error" set. Code that cannot be wrapped in a with block
+    can measure itself and call record(name, seconds, ...). A name must be
+    one of STAGES, optionally followed by ":<detail>"; anything else raises
+    ValueError, so a misspelt stage fails loudly instead of starting a new one.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.started_at = timezone.now()
+        self._start = time.perf_counter()
+        self.stages = []
+
+    @staticmethod
+    def _check(name):
+        if name.split(":", 1)[0] not in STAGES:
+            raise ValueError(f"Unknown timing stage {name!r}")
+
+    @contextmanager
+    def stage(self, name, **info):
+        self._check(name)
+        entry = {"stage": name, **info}
+        start = time.perf_counter()
+        try:
+            yield entry
+        except Exception as e:
+            entry["error"] = str(e)
+            raise
+        finally:
+            self._append(entry, time.perf_counter() - start)
+
+    def record(self, name, seconds, **info):
+        self._check(name)
+        self._append({"stage": name, **info}, seconds)
+
+    def _append(self, entry, seconds):
+        entry["seconds"] = round(seconds, 4)
+        if entry.get("bytes") and entry["seconds"] > 0:
+            entry["bytes_per_sec"] = round(entry["bytes"] / entry["seconds"], 1)
+        self.stages.append(entry)
+
+    @property
+    def total_seconds(self):
+        return round(time.perf_counter() - self._start, 4)
+
+    def summary(self):
+        return ", ".join(f"{s['stage']} {s['seconds']:.2f}s" for s in self.stages)
+
+    def finish(self, report_date, status):
+        """Save the run. Timing is diagnostics only, so a failed save never fails the ingestion."""
+        try:
+            return IngestionTiming.objects.create(
+                source=self.source,
+                report_date=report_date,
+                status=status,
+                started_at=self.started_at,
+                total_seconds=self.total_seconds,
+                stages=self.stages,
+            )
+        except Exception:
+            return None
@@ -0,0 +1,111 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _comparable(field, value):
+    """Coerce an extracted value to what the field would hold after a DB round-trip."""
+    try:
+        value = field.to_python(value)
+    except ValidationError:
+        return value
+    if isinstance(field, models.DateTimeField) and value is not None \
+            and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def bulk_upsert(model, rows, unique_fields, update_fields=None):
+    """
+    Insert-or-update a whole extracted table in one statement.
+
+    Replaces the per-row ``update_or_create`` loops (a SELECT plus an
+    INSERT/UPDATE round-trip for every row) with a single
+    ``bulk_create(update_conflicts=True)``, i.e. INSERT ... ON CONFLICT DO UPDATE
+    on the model's unique_together key.
+
+    Existing rows are read once and diffed against the extracted values;
+    rows whose values are identical are left alone, so re-ingesting a
+    corrected report only rewrites the rows that actually changed.
+
+    :param model: model class with a unique constraint on ``unique_fields``
+    :param rows: iterable of dicts mapping field name -> value
+    :param unique_fields: tuple of field names forming the conflict key,
+                          e.g. ('report_date', 'state') or ('report_date', 'station')
+    :param update_fields: fields overwritten on conflict; defaults to the keys
+                          present in ``rows`` (like update_or_create's defaults)
+                          plus any auto_now field such as updated_at
+    :return: (inserted, updated, unchanged) row counts; rows with a NULL in
+             ``unique_fields`` are skipped with a warning and not counted
+    """
+    unique_fields = tuple(unique_fields)
+
+    # Later rows win, as they did with sequential update_or_create calls.
+    # Rows with a NULL key can never conflict, so they are dropped instead of duplicated.
+    by_key = {}
+    dropped = 0
+    for row in rows:
+        key = tuple(row.get(f) for f in unique_fields)
+        if any(v is None for v in key):
+            dropped += 1
+            continue
+        by_key[key] = row
+
+    if dropped:
+        logger.warning(
+            f"{model.__name__}: skipped {dropped} row(s) with an empty {'/'.join(unique_fields)} key"
+        )
+
+    if not by_key:
+        return 0, 0, 0
+
+    if update_fields is None:
+        given = set().union(*(row.keys() for row in by_key.values()))
+        update_fields = [
+            f.name for f in model._meta.concrete_fields
+            if not f.primary_key
+            and f.name not in unique_fields
+            and (f.name in given or getattr(f, "auto_now", False))
+        ]
+
+    fields = {f.name: f for f in model._meta.concrete_fields}
+    compare_fields = [name for name in update_fields if not getattr(fields[name], "auto_now", False)]
+
+    existing_filter = Q()
+    for key in by_key:
+        existing_filter |= Q(**dict(zip(unique_fields, key)))
+
+    with transaction.atomic():
+        existing = {
+            tuple(values[f] for f in unique_fields): values
+            for values in model.objects.filter(existing_filter).values(*unique_fields, *compare_fields)
+        }
+
+        inserted, updated, unchanged = 0, 0, 0
+        to_write = []
+        for key, row in by_key.items():
+            current = existing.get(key)
+            if current is None:
+                inserted += 1
+            elif any(_comparable(fields[f], row[f]) != current[f] for f in compare_fields if f in row):
+                updated += 1
+            else:
+                unchanged += 1
+                continue
+            to_write.append(model(**row))
+
+        if to_write:
+            model.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=update_fields,
+            )
+
+    return inserted, updated, unchanged